@@ -0,0 +1,85 @@
+# Chunked (streaming) AEAD format shared by encrypt.py and decrypt.py.
+#
+# Layout: MAGIC | segment_size (4, big-endian) | nonce_prefix (7) | segments...
+# Every segment is sealed on its own with nonce = prefix | counter (4) | last (1),
+# so each carries its own tag, segments cannot be reordered, and dropping the
+# tail is detected because no remaining segment was sealed with last=1.
+from typing import BinaryIO
+import secrets
+
+STREAM_MAGIC = b"SSTR"
+DEFAULT_SEGMENT_SIZE = 1024 * 1024
+NONCE_PREFIX_LEN = 7
+TAG_LEN = 16
+STREAM_HEADER_LEN = len(STREAM_MAGIC) + 4 + NONCE_PREFIX_LEN
+MAX_SEGMENTS = 2 ** 32
+
+def _segment_nonce(prefix: bytes, counter: int, last: bool) -> bytes:
+    if counter >= MAX_SEGMENTS:
+        raise ValueError("Stream too long for the 32-bit segment counter")
+    return prefix + counter.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+
+def is_stream(head: bytes) -> bool:
+    """True if head (the first bytes of a file) starts a chunked stream."""
+    return head[:len(STREAM_MAGIC)] == STREAM_MAGIC
+
+def encrypt_stream(cipher, src: BinaryIO, dest: BinaryIO, segment_size: int = DEFAULT_SEGMENT_SIZE, on_segment=None, associated_data: bytes = None) -> int:
+    """
+    Encrypt src into dest segment by segment with an AEAD cipher object
+    (AESGCM / ChaCha20Poly1305). Holds at most two plaintext segments in
+    memory. on_segment(plaintext, written), if given, is called for every
+    write (the stream header with empty plaintext). associated_data is
+    authenticated with every segment. Returns the number of plaintext bytes read.
+    """
+    if segment_size <= 0:
+        raise ValueError("segment_size must be positive")
+    prefix = secrets.token_bytes(NONCE_PREFIX_LEN)
+    header = STREAM_MAGIC + segment_size.to_bytes(4, "big") + prefix
+    dest.write(header)
+    if on_segment is not None:
+        on_segment(b"", header)
+
+    total = 0
+    counter = 0
+    chunk = src.read(segment_size)
+    while True:
+        # Look one segment ahead so the final one (possibly empty) is flagged.
+        nxt = src.read(segment_size)
+        last = not nxt
+        sealed = cipher.encrypt(_segment_nonce(prefix, counter, last), chunk, associated_data)
+        dest.write(sealed)
+        if on_segment is not None:
+            on_segment(chunk, sealed)
+        total += len(chunk)
+        if last:
+            return total
+        chunk = nxt
+        counter += 1
+
+def decrypt_stream(cipher, src: BinaryIO, dest: BinaryIO, associated_data: bytes = None) -> int:
+    """
+    Reverse encrypt_stream. Raises ValueError on a malformed or truncated
+    stream and cryptography's InvalidTag on tampering. Returns the number of
+    plaintext bytes written.
+    """
+    header = src.read(STREAM_HEADER_LEN)
+    if len(header) != STREAM_HEADER_LEN or not is_stream(header):
+        raise ValueError("Not a chunked stream")
+    segment_size = int.from_bytes(header[4:8], "big")
+    prefix = header[8:]
+
+    total = 0
+    counter = 0
+    chunk = src.read(segment_size + TAG_LEN)
+    while True:
+        if len(chunk) < TAG_LEN:
+            raise ValueError("Truncated stream")
+        nxt = src.read(segment_size + TAG_LEN)
+        last = not nxt
+        pt = cipher.decrypt(_segment_nonce(prefix, counter, last), chunk, associated_data)
+        dest.write(pt)
+        total += len(pt)
+        if last:
+            return total
+        chunk = nxt
+        counter += 1
@@ -0,0 +1,177 @@
+# Byte-histogram Shannon entropy used by the encryption metrics.
+#
+# Histograms are built zero-copy with np.frombuffer + np.bincount instead of
+# np.unique(list(data)), which boxes every byte into a Python int and sorts.
+import os
+import math
+import random
+import time
+import numpy as np
+
+# Sampling strategies for per-file entropy estimates (see sample_windows).
+SAMPLING_MODES = ("full", "head_mid_tail", "random")
+SAMPLE_WINDOW = 64 * 1024
+DEFAULT_RANDOM_WINDOWS = 8
+
+# Upper bound on bytes handled per bincount call in batch_entropy; the
+# combined (buffer, byte) index array costs 8 bytes per input byte.
+BATCH_BYTES = 8 * 1024 * 1024
+
+def byte_histogram(data) -> np.ndarray:
+    """Return a 256-bin int64 histogram of the byte values in a bytes-like object."""
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256).astype(np.int64, copy=False)
+
+def entropy_from_histogram(counts: np.ndarray) -> float:
+    """Shannon entropy in bits per byte of a 256-bin histogram."""
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    p = counts[counts > 0] / total
+    return float(0.0 - (p * np.log2(p)).sum())
+
+def shannon_entropy(data) -> float:
+    """Shannon entropy in bits per byte of a bytes-like object."""
+    if not len(data):
+        return 0.0
+    return entropy_from_histogram(byte_histogram(data))
+
+class EntropyAccumulator:
+    """Incrementally builds a byte histogram across chunks of one stream."""
+
+    def __init__(self):
+        self.counts = np.zeros(256, dtype=np.int64)
+
+    def update(self, chunk):
+        if len(chunk):
+            self.counts += byte_histogram(chunk)
+
+    def merge(self, other: "EntropyAccumulator"):
+        self.counts += other.counts
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def entropy(self) -> float:
+        return entropy_from_histogram(self.counts)
+
+def batch_entropy(buffers) -> np.ndarray:
+    """
+    Shannon entropy of many buffers at once.
+
+    Buffers are grouped up to BATCH_BYTES and each group is histogrammed with
+    a single bincount over (buffer index * 256 + byte value), which avoids the
+    per-call overhead that dominates for many small files.
+    """
+    buffers = list(buffers)
+    result = np.zeros(len(buffers), dtype=np.float64)
+    start = 0
+    while start < len(buffers):
+        end, size = start, 0
+        while end < len(buffers) and (end == start or size + len(buffers[end]) <= BATCH_BYTES):
+            size += len(buffers[end])
+            end += 1
+        group = buffers[start:end]
+        lengths = np.fromiter((len(b) for b in group), dtype=np.int64, count=len(group))
+        if size:
+            values = np.frombuffer(b"".join(group), dtype=np.uint8)
+            index = np.repeat(np.arange(len(group), dtype=np.int64) * 256, lengths) + values
+            counts = np.bincount(index, minlength=len(group) * 256).reshape(len(group), 256)
+            p = counts / np.maximum(lengths, 1)[:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                terms = np.where(p > 0, p * np.log2(p), 0.0)
+            result[start:end] = 0.0 - terms.sum(axis=1)
+        start = end
+    return result
+
+def sample_windows(size: int, mode: str = "full", k: int = DEFAULT_RANDOM_WINDOWS, window: int = SAMPLE_WINDOW, rng=None):
+    """
+    Return the (offset, length) windows to histogram for a file of `size` bytes.
+
+    "full" covers the whole file, "head_mid_tail" three windows at the start,
+    middle and end, "random" k windows at random offsets. Files too small to
+    benefit from sampling are always covered in full.
+    """
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown entropy sampling mode '{mode}', expected one of: {', '.join(SAMPLING_MODES)}")
+    count = 3 if mode == "head_mid_tail" else k
+    if mode == "full" or size <= window * count:
+        return [(0, size)]
+    if mode == "head_mid_tail":
+        return [(0, window), ((size - window) // 2, window), (size - window, window)]
+    rng = rng or random
+    return [(offset, window) for offset in sorted(rng.randrange(0, size - window + 1) for _ in range(k))]
+
+def _estimate(chunks):
+    """
+    Pool the sampled chunks into one entropy estimate.
+
+    Returns (entropy, ci95, sampled_bytes); ci95 is the 95% half-width of the
+    mean of per-window entropies, and 0 when a single window covers the data.
+    """
+    acc = EntropyAccumulator()
+    per_window = []
+    for chunk in chunks:
+        # One histogram per window serves both the window and the pooled estimate.
+        counts = byte_histogram(chunk)
+        acc.counts += counts
+        per_window.append(entropy_from_histogram(counts))
+    ci95 = 0.0
+    if len(per_window) > 1:
+        ci95 = 1.96 * float(np.std(per_window, ddof=1)) / math.sqrt(len(per_window))
+    return acc.entropy(), ci95, acc.total
+
+def sampled_entropy(data, windows):
+    """Entropy estimate of an in-memory buffer over the given windows (no copies)."""
+    view = memoryview(data)
+    return _estimate(view[offset:offset + length] for offset, length in windows)
+
+def _pread(fd: int, length: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, length, offset)
+    # Windows has no os.pread; callers own the descriptor, so seeking is safe.
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+def pread_sampled_entropy(fd: int, windows):
+    """Entropy estimate of an open file over the given windows, reading only those bytes."""
+    return _estimate(_pread(fd, length, offset) for offset, length in windows)
+
+def sampled_file_entropy(path, mode: str = "full", k: int = DEFAULT_RANDOM_WINDOWS):
+    """Entropy estimate of the file at path; only the sampled windows are read."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        return pread_sampled_entropy(fd, sample_windows(os.fstat(fd).st_size, mode, k))
+    finally:
+        os.close(fd)
+
+def _legacy_entropy(data: bytes) -> float:
+    """The previous encrypt._calculate_entropy, kept for the benchmark below."""
+    from scipy.stats import entropy
+    if not data:
+        return 0.0
+    value, counts = np.unique(list(data), return_counts=True)
+    return entropy(counts, base=2)
+
+def _bench(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    print("Entropy microbenchmark (best of 3)")
+    for size in (4 * 1024, 1024 * 1024, 16 * 1024 * 1024):
+        data = os.urandom(size)
+        assert abs(_legacy_entropy(data) - shannon_entropy(data)) < 1e-9
+        old = _bench(_legacy_entropy, data)
+        new = _bench(shannon_entropy, data)
+        print(f"  {size // 1024:>6} KiB  legacy {old * 1000:9.2f} ms  bincount {new * 1000:8.2f} ms  x{old / new:7.1f}")
+
+    small = [os.urandom(2048) for _ in range(5000)]
+    old = _bench(lambda: [_legacy_entropy(b) for b in small])
+    loop = _bench(lambda: [shannon_entropy(b) for b in small])
+    batch = _bench(batch_entropy, small)
+    print(f"  5000 x 2 KiB  legacy {old * 1000:9.2f} ms  per-buffer {loop * 1000:8.2f} ms  batch {batch * 1000:8.2f} ms")
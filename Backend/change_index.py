@@ -0,0 +1,118 @@
+# Content-change index for incremental re-simulation.
+#
+# Saved as CHANGE_INDEX_NAME in the run's encrypted/ folder. For every file
+# encrypted it keeps the source's (size, mtime_ns, inode) as listed by the
+# scan, and the name, size and mtime_ns of the encrypted copy written. A
+# later run with the same output settings and key skips a file whose listing
+# and encrypted copy both still match, so it is never opened: the saving is
+# the read (and the cipher pass and write), at the cost of one stat of the
+# encrypted copy. Like ScanIndex, files modified within RACY_MTIME_NS of the
+# save are not recorded, so a same-tick change cannot go unnoticed. Skipped
+# files are reported under "incremental", not as encrypted; force drops the
+# index and re-encrypts everything under a new key.
+import os
+import json
+import hashlib
+from pathlib import Path
+from time import time_ns
+try:
+    from .scanner import RACY_MTIME_NS
+except ImportError:
+    from scanner import RACY_MTIME_NS
+
+CHANGE_INDEX_NAME = "change_index.json"
+CHANGE_INDEX_VERSION = 1
+
+def key_digest(key: bytes) -> str:
+    """Short fingerprint of the run key, so the index never holds the key itself."""
+    return hashlib.sha256(key).hexdigest()[:16]
+
+class ChangeIndex:
+    """
+    Encrypted copies of one encrypted/ folder that are still current.
+
+    settings is a JSON-able description of the output format (cipher,
+    segment size, intermittent pattern, ...); an index written with other
+    settings is not used. bind() checks the run key against the one the
+    index was written with. current() is the per-file skip check.
+    """
+
+    def __init__(self, enc_dir, settings: dict):
+        self.enc_dir = os.fspath(enc_dir)
+        self.path = Path(enc_dir) / CHANGE_INDEX_NAME
+        self.settings = settings
+        self.key = None
+        self._old = {}      # rel_path -> [size, mtime_ns, inode, dest_name, dest_size, dest_mtime_ns]
+        self._new = {}
+        self.skipped_files = self.skipped_bytes = 0
+        self.invalidated = None       # why a saved index was not used
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CHANGE_INDEX_VERSION or data.get("settings") != settings:
+            self.invalidated = "settings"
+            return
+        self.key = data.get("key")
+        self._old = data.get("files", {})
+
+    def usable_with(self, key: bytes) -> bool:
+        """Whether the saved entries were encrypted with key."""
+        return bool(self._old) and self.key == key_digest(key)
+
+    def bind(self, key: bytes, force: bool = False):
+        """Use key for this run; the saved entries are dropped unless they match it (or with force)."""
+        if self._old and (force or self.key != key_digest(key)):
+            self.invalidated = self.invalidated or ("force" if force else "key")
+            self._old = {}
+        self.key = key_digest(key)
+
+    def current(self, rel_path: str, size: int, mtime_ns: int, inode: int) -> bool:
+        """
+        True if the encrypted copy of rel_path is up to date: the source is
+        listed with the same size, mtime and inode, and the copy is still the
+        one written. The entry carries over to the next save.
+        """
+        record = self._old.get(rel_path)
+        if record is None or record[0] != size or record[1] != mtime_ns or record[2] != inode:
+            return False
+        try:
+            st = os.stat(os.path.join(self.enc_dir, record[3]))
+        except OSError:
+            return False
+        if st.st_size != record[4] or st.st_mtime_ns != record[5]:
+            return False
+        self._new[rel_path] = record
+        self.skipped_files += 1
+        self.skipped_bytes += size
+        return True
+
+    def update(self, records):
+        """Record [rel_path, size, mtime_ns, inode, dest_name, dest_size, dest_mtime_ns] of files encrypted."""
+        for rel_path, *record in records:
+            self._new[rel_path] = record
+
+    def save(self, complete: bool = True):
+        """
+        Write the index back atomically. After a complete run only the files
+        seen are kept; after a partial one older entries stay.
+        """
+        racy = time_ns() - RACY_MTIME_NS
+        files = self._new if complete else {**self._old, **self._new}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "version": CHANGE_INDEX_VERSION,
+            "settings": self.settings,
+            "key": self.key,
+            "files": {rel: record for rel, record in files.items() if record[1] < racy},
+        }, separators=(",", ":")))
+        os.replace(tmp, self.path)
+
+    def stats(self) -> dict:
+        return {
+            "skipped_files": self.skipped_files,
+            # Never opened: not read, encrypted or written again.
+            "skipped_bytes": self.skipped_bytes,
+            "indexed_files": len(self._new),
+            "invalidated": self.invalidated,
+        }
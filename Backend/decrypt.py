@@ -1,32 +1,161 @@
 # decrypt_simulated.py
 import os
 from pathlib import Path
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from functools import lru_cache
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives import serialization, hashes
 import base64
 try:
-    from .safe_zone import _verify_safety_path, SAFE_ZONE_NAME
+    from .safe_zone import _verify_safety_path, safe_zone_verifier, SAFE_ZONE_NAME
+    from .aead_stream import decrypt_stream
+    from .intermittent import decrypt_intermittent, is_intermittent, read_footer, TRAILER_LEN
+    from .output_header import OutputHeader, parse_header, HEADER_LEN
+    from .pack_container import PackReader, PACK_SUFFIX
 except ImportError:
-    from safe_zone import _verify_safety_path, SAFE_ZONE_NAME
+    from safe_zone import _verify_safety_path, safe_zone_verifier, SAFE_ZONE_NAME
+    from aead_stream import decrypt_stream
+    from intermittent import decrypt_intermittent, is_intermittent, read_footer, TRAILER_LEN
+    from output_header import OutputHeader, parse_header, HEADER_LEN
+    from pack_container import PackReader, PACK_SUFFIX
 
 ENCRYPTED_DIRNAME = "encrypted"
 DECRYPTED_DIRNAME = "decrypted"
 KEYFILE_NAME = "sim_key.bin"
 
+@lru_cache(maxsize=8)
+def _load_rsa_private_key(key: bytes):
+    """Parse the PEM private key saved by scanner.generate_key, once."""
+    return serialization.load_pem_private_key(key, password=None)
+
+@lru_cache(maxsize=1024)
+def _unwrap_session_key_rsa(key: bytes, prefix: bytes) -> bytes:
+    """
+    AES session key of an RSA output from its prefix (len | wrapped key).
+    Cached: with --rsa-key-wrap run/directory many outputs share a prefix.
+    """
+    wrapped_len = int.from_bytes(prefix[:4], "big")
+    return _load_rsa_private_key(key).decrypt(
+        prefix[4:4 + wrapped_len],
+        padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None),
+    )
+
+def _session_cipher(header: OutputHeader, prefix: bytes, key: bytes):
+    """The AEAD cipher an output was sealed with, as its header names it."""
+    if header.algorithm == "chacha20":
+        return ChaCha20Poly1305(key)
+    if header.algorithm == "rsa":
+        return AESGCM(_unwrap_session_key_rsa(key, prefix))
+    return AESGCM(key)
+
+def _decrypt_output(src, out_path: Path, key: bytes):
+    """
+    Decrypt a one-shot or stream output read from src (an open file or a
+    pack record) into out_path, as its header says. Input without a header
+    is taken for the original AES-GCM one-shot layout (nonce | ct). A
+    partially written stream output is removed if a segment fails.
+    """
+    head = src.read(HEADER_LEN)
+    header = parse_header(head)
+    if header is None:
+        data = head + src.read()
+        out_path.write_bytes(AESGCM(key).decrypt(data[:12], data[12:], associated_data=None))
+        return
+    cipher = _session_cipher(header, src.read(header.prefix_len), key)
+    if header.layout == "oneshot":
+        data = src.read()
+        out_path.write_bytes(cipher.decrypt(data[:12], data[12:], associated_data=head))
+    elif header.layout == "stream":
+        try:
+            with open(out_path, "wb") as fout:
+                decrypt_stream(cipher, src, fout, associated_data=head)
+        except Exception:
+            out_path.unlink(missing_ok=True)
+            raise
+    else:
+        raise ValueError(f"Unexpected {header.layout} output header at the start of the file")
+
 def decrypt_file(enc_path: Path, out_path: Path, key: bytes):
     """
     Decrypts a file after verifying that both source and destination paths are
-    safely within the designated test directory.
+    safely within the designated test directory. The output header selects
+    the algorithm (AES-GCM, ChaCha20-Poly1305 or RSA, whose session key is
+    unwrapped with the private key) and the one-shot or chunked layout.
     """
     # CRITICAL SAFETY CHECK: Do not operate outside the safe zone.
     if not _verify_safety_path(enc_path) or not _verify_safety_path(out_path):
         raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+    _decrypt_file(enc_path, out_path, key)
 
-    data = enc_path.read_bytes()
-    nonce = data[:12]
-    ct = data[12:]
-    aesgcm = AESGCM(key)
-    pt = aesgcm.decrypt(nonce, ct, associated_data=None)
-    out_path.write_bytes(pt)
+def _decrypt_file(enc_path: Path, out_path: Path, key: bytes):
+    """decrypt_file without the safety check, for callers that verified both paths."""
+    with open(enc_path, "rb") as fin:
+        _decrypt_output(fin, out_path, key)
+
+def decrypt_file_streaming(enc_path: Path, out_path: Path, key: bytes):
+    """
+    Decrypts a chunked stream written with --stream / segment_size, one
+    segment at a time so memory stays bounded. decrypt_file does the same
+    for any output; this is kept for existing callers.
+    """
+    decrypt_file(enc_path, out_path, key)
+
+def decrypt_file_intermittent(enc_path: Path, out_path: Path, key: bytes):
+    """
+    Decrypts an intermittently encrypted file (--intermittent): only the
+    encrypted regions are read and decrypted, in place in a copy. A
+    partially restored output is removed if any region fails to authenticate.
+    """
+    # CRITICAL SAFETY CHECK: Do not operate outside the safe zone.
+    if not _verify_safety_path(enc_path) or not _verify_safety_path(out_path):
+        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+    _decrypt_file_intermittent(enc_path, out_path, key)
+
+def _decrypt_file_intermittent(enc_path: Path, out_path: Path, key: bytes):
+    """decrypt_file_intermittent without the safety check, for callers that verified both paths."""
+    fd = os.open(enc_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        header, prefix = read_footer(fd)[:2]
+    finally:
+        os.close(fd)
+    try:
+        decrypt_intermittent(_session_cipher(header, prefix, key), enc_path, out_path)
+    except Exception:
+        out_path.unlink(missing_ok=True)
+        raise
+
+def decrypt_from_pack(pack_path: Path, name: str, out_path: Path, key: bytes):
+    """
+    Decrypts one file from a pack (--pack): name is the .encrypted name it
+    would have had. Only the index and that record are read.
+    """
+    # CRITICAL SAFETY CHECK: Do not operate outside the safe zone.
+    if not _verify_safety_path(pack_path) or not _verify_safety_path(out_path):
+        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+    with PackReader(pack_path) as reader:
+        _decrypt_output(reader.open(name), out_path, key)
+
+def _batch_decrypt_packs(root: Path, dec_dir: Path, key: bytes):
+    for pack_path in root.glob("*" + PACK_SUFFIX):
+        try:
+            reader = PackReader(pack_path)
+        except Exception as e:
+            print(f"Failed to read pack {pack_path}: {e}")
+            continue
+        with reader:
+            names = list(reader.index)
+            out_files = [dec_dir / (Path(name).stem + ".restored") for name in names]
+            # CRITICAL SAFETY CHECK, batched: every directory is resolved once.
+            safe = safe_zone_verifier.verify_many([pack_path] + out_files)
+            for name, out_file, ok in zip(names, out_files, safe[1:]):
+                if not (safe[0] and ok):
+                    print(f"Failed to decrypt {pack_path}:{name}: Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+                    continue
+                try:
+                    _decrypt_output(reader.open(name), out_file, key)
+                    print(f"Decrypted: {pack_path}:{name} -> {out_file}")
+                except Exception as e:
+                    print(f"Failed to decrypt {pack_path}:{name}: {e}")
 
 def batch_decrypt(encrypted_dir: str):
     root = Path(encrypted_dir).resolve()
@@ -42,13 +171,29 @@ def batch_decrypt(encrypted_dir: str):
     dec_dir = root.parent / DECRYPTED_DIRNAME
     dec_dir.mkdir(parents=True, exist_ok=True)
 
-    for enc_file in root.glob("*.encrypted"):
-        out_file = dec_dir / (enc_file.stem + ".restored")
+    enc_files = list(root.glob("*.encrypted"))
+    out_files = [dec_dir / (enc_file.stem + ".restored") for enc_file in enc_files]
+    # CRITICAL SAFETY CHECK, batched: every directory is resolved once.
+    safe = safe_zone_verifier.verify_many(enc_files + out_files)
+    for i, (enc_file, out_file) in enumerate(zip(enc_files, out_files)):
+        if not (safe[i] and safe[len(enc_files) + i]):
+            print(f"Failed to decrypt {enc_file}: Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+            continue
         try:
-            decrypt_file(enc_file, out_file, key)
+            # Intermittent outputs keep the original layout and carry their header in the footer.
+            with open(enc_file, "rb") as fh:
+                fh.seek(0, os.SEEK_END)
+                if fh.tell() >= TRAILER_LEN:
+                    fh.seek(-TRAILER_LEN, os.SEEK_END)
+                intermittent = is_intermittent(fh.read(TRAILER_LEN))
+            if intermittent:
+                _decrypt_file_intermittent(enc_file, out_file, key)
+            else:
+                _decrypt_file(enc_file, out_file, key)
             print(f"Decrypted: {enc_file} -> {out_file}")
         except Exception as e:
             print(f"Failed to decrypt {enc_file}: {e}")
+    _batch_decrypt_packs(root, dec_dir, key)
 
 if __name__ == "__main__":
     import sys
@@ -5,54 +5,105 @@ import time
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 import secrets
 import threading
+import queue
+import multiprocessing
 import inspect
-import psutil
+from bisect import bisect_right
+from functools import lru_cache
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
-from scipy.stats import entropy
 from collections import Counter
 
 # Handle both relative and absolute imports
 try:
-    from .scanner import scan_for_files, generate_key, save_key, drop_ransom_notes, _verify_safety_path, SAFE_ZONE_NAME
+    from .scanner import scan_entries, generate_key, save_key, load_key, write_ransom_note, _verify_safety_path, safe_zone_verifier, open_no_follow, SAFE_ZONE_NAME
+    from .target_rules import TargetRules
+    from .file_magic import content_classifier
+    from .target_order import order_batches, order_key, ORDER_WINDOW
+    from .intermittent import IntermittentPattern, encrypt_intermittent
+    from .output_header import make_header
+    from .run_journal import RunJournal, segment_checkpoint, stitch_segments
+    from .change_index import ChangeIndex
+    from .pack_container import PackWriter, worker_pack_name, write_index, PACK_SUFFIX
+    from .aead_stream import encrypt_stream, DEFAULT_SEGMENT_SIZE
+    from .key_pool import key_pool
+    from .resource_sampler import ResourceSampler, DEFAULT_RATE_HZ
+    from .latency_histogram import file_latency_histogram, byte_cost_histogram
+    from .byte_entropy import EntropyAccumulator, sample_windows, sampled_entropy, sampled_file_entropy, pread_sampled_entropy, SAMPLING_MODES, DEFAULT_RANDOM_WINDOWS
 except ImportError:
     backend_dir = os.path.dirname(os.path.abspath(__file__))
     if backend_dir not in sys.path:
         sys.path.insert(0, backend_dir)
-    from scanner import scan_for_files, generate_key, save_key, drop_ransom_notes, _verify_safety_path, SAFE_ZONE_NAME
+    from scanner import scan_entries, generate_key, save_key, load_key, write_ransom_note, _verify_safety_path, safe_zone_verifier, open_no_follow, SAFE_ZONE_NAME
+    from target_rules import TargetRules
+    from file_magic import content_classifier
+    from target_order import order_batches, order_key, ORDER_WINDOW
+    from intermittent import IntermittentPattern, encrypt_intermittent
+    from output_header import make_header
+    from run_journal import RunJournal, segment_checkpoint, stitch_segments
+    from change_index import ChangeIndex
+    from pack_container import PackWriter, worker_pack_name, write_index, PACK_SUFFIX
+    from aead_stream import encrypt_stream, DEFAULT_SEGMENT_SIZE
+    from key_pool import key_pool
+    from resource_sampler import ResourceSampler, DEFAULT_RATE_HZ
+    from latency_histogram import file_latency_histogram, byte_cost_histogram
+    from byte_entropy import EntropyAccumulator, sample_windows, sampled_entropy, sampled_file_entropy, pread_sampled_entropy, SAMPLING_MODES, DEFAULT_RANDOM_WINDOWS
 
 # Configuration from scanner.py
 ENCRYPTED_DIRNAME = "encrypted"
 KEYFILE_NAME = "sim_key.bin"
 TEST_MODE = True
+# Pool backends for simulate_encrypt_folder; "serial" runs in the calling thread.
+# Threads scale because AESGCM/ChaCha20Poly1305 release the GIL inside OpenSSL.
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+# Phases timed for phase_breakdown: scan and key_setup for the whole run in
+# simulate_encrypt_folder, ransom_notes per batch and the rest per file in the workers.
+# copy is the test-mode copy of the bytes intermittent encryption leaves alone.
+PHASES = ("scan", "ransom_notes", "key_setup", "crypto_setup", "read", "encrypt", "write", "copy", "entropy")
+# How often RSA runs wrap a fresh AES session key: per file (one RSA-OAEP per
+# file), once per run, or once per directory. The output layout is the same.
+RSA_KEY_WRAP_MODES = ("file", "run", "directory")
+# Pipeline mode: found files buffered between the scanner and the workers,
+# and the most files handed to one worker at a time.
+PIPELINE_QUEUE_SIZE = 1024
+PIPELINE_MAX_BATCH = 64
+# Directories per ransom-note batch handed to a pool worker.
+NOTE_BATCH_SIZE = 64
+# Batches submitted ahead per pool worker, so results stream back steadily.
+# Process workers get fewer: what they have been handed cannot be cancelled.
+IN_FLIGHT_PER_WORKER = 4
+PROCESS_IN_FLIGHT_PER_WORKER = 2
+# Seconds between stop_event checks while waiting on pool results.
+STOP_POLL_S = 0.05
+# Points in the bytes-encrypted-over-time curve of the metrics.
+CURVE_POINTS = 101
+_SCAN_DONE = object()
 
-def _calculate_entropy(data: bytes) -> float:
-    """Calculate the entropy of a byte string."""
-    if not data:
-        return 0.0
-    value, counts = np.unique(list(data), return_counts=True)
-    return entropy(counts, base=2)
+@lru_cache(maxsize=8)
+def _load_rsa_public_key(key: bytes):
+    """
+    Parse a PEM RSA key once per process. Accepts the public key or the
+    private key saved by scanner.generate_key (its public half is used).
+    """
+    if b"PRIVATE KEY" in key:
+        return serialization.load_pem_private_key(key, password=None).public_key()
+    return serialization.load_pem_public_key(key)
 
-def encrypt_file_aesgcm(src: Path, dest: Path, key: bytes):
-    """Encrypt src -> dest using AES-GCM."""
-    if not _verify_safety_path(src) or not _verify_safety_path(dest):
-        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
-    
-    aesgcm = AESGCM(key)
-    nonce = secrets.token_bytes(12)
-    data = src.read_bytes()
-    ct = aesgcm.encrypt(nonce, data, associated_data=None)
-    dest.write_bytes(nonce + ct)
-    return data # Return original data for metrics
-
-def encrypt_file_rsa(src: Path, dest: Path, key: bytes):
-    """Encrypt src -> dest using RSA hybrid encryption."""
-    if not _verify_safety_path(src) or not _verify_safety_path(dest):
-        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+def _rsa_public_pem(key: bytes) -> bytes:
+    """Public PEM for an RSA key; workers only get this, never the private key."""
+    return _load_rsa_public_key(key).public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
 
-    aes_key = secrets.token_bytes(32)
-    public_key = serialization.load_pem_public_key(key)
+def _wrap_session_key_rsa(key: bytes, aes_key: bytes = None):
+    """Wrap an AES session key (fresh unless given) with the RSA public key."""
+    aes_key = aes_key or secrets.token_bytes(32)
+    public_key = _load_rsa_public_key(key)
     
     encrypted_key = public_key.encrypt(
         aes_key,
@@ -62,28 +113,174 @@ def encrypt_file_rsa(src: Path, dest: Path, key: bytes):
             label=None
         )
     )
-    
-    aesgcm = AESGCM(aes_key)
+    key_length = len(encrypted_key).to_bytes(4, byteorder='big')
+    return aes_key, key_length + encrypted_key
+
+@lru_cache(maxsize=1024)
+def _directory_session_rsa(key: bytes, run_key: bytes, rel_dir: str):
+    """
+    Per-directory session for rsa_key_wrap="directory". The AES key is derived
+    from the run key so every worker agrees on it; each worker wraps it once
+    per directory it touches.
+    """
+    aes_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=rel_dir.encode("utf-8")).derive(run_key)
+    return _wrap_session_key_rsa(key, aes_key)
+
+# Sessions: return (AEAD cipher, bytes written before the payload). The same
+# pair drives both the one-shot layout (header | prefix | nonce | ct) and the
+# chunked stream (header | prefix | stream), see _seal and
+# _encrypt_file_streaming; the header is output_header's.
+def _session_aesgcm(key: bytes):
+    return AESGCM(key), b""
+
+def _session_rsa(key: bytes):
+    aes_key, wrapped = _wrap_session_key_rsa(key)
+    return AESGCM(aes_key), wrapped
+
+def _session_chacha20(key: bytes):
+    return ChaCha20Poly1305(key), b""
+
+def _seal(cipher, algorithm: str, rel_path: str, prefix: bytes, data: bytes) -> bytes:
+    """Return exactly the one-shot bytes encrypt_file_* writes to dest."""
+    header = make_header(algorithm, "oneshot", 0, len(data), rel_path, prefix)
     nonce = secrets.token_bytes(12)
-    data = src.read_bytes()
-    ciphertext = aesgcm.encrypt(nonce, data, None)
+    return header + prefix + nonce + cipher.encrypt(nonce, data, header)
+
+def _create_output(dest: Path):
+    """Open dest for writing ("wb"), refusing a symlink planted at its name (open_no_follow)."""
+    return os.fdopen(open_no_follow(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)), "wb")
+
+class _TimedCipher:
+    """AEAD wrapper that accumulates the time spent in encrypt()."""
+
+    def __init__(self, cipher):
+        self.cipher = cipher
+        self.elapsed_ns = 0
+
+    def encrypt(self, nonce, data, associated_data):
+        start = time.perf_counter_ns()
+        try:
+            return self.cipher.encrypt(nonce, data, associated_data)
+        finally:
+            self.elapsed_ns += time.perf_counter_ns() - start
+
+class _TimedFile:
+    """File wrapper that accumulates the time spent in read()/write()."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.elapsed_ns = 0
+
+    def read(self, size=-1):
+        start = time.perf_counter_ns()
+        try:
+            return self.fh.read(size)
+        finally:
+            self.elapsed_ns += time.perf_counter_ns() - start
+
+    def write(self, data):
+        start = time.perf_counter_ns()
+        try:
+            return self.fh.write(data)
+        finally:
+            self.elapsed_ns += time.perf_counter_ns() - start
+
+def _encrypt_file_streaming(cipher, src: Path, dest, segment_size: int, prefix: bytes = b"", on_segment=None, phase_ns: dict = None, algorithm: str = "aes", rel_path: str = None) -> int:
+    """
+    Write the output header and prefix followed by src sealed as a chunked
+    stream (see aead_stream) to dest, a path or an open binary file (a pack
+    record). on_segment(plaintext, written) sees every write; returns bytes
+    read from src. With phase_ns given, time spent reading and writing is
+    added to it.
+    """
+    with open(src, "rb") as fin, (_create_output(dest) if isinstance(dest, Path) else nullcontext(dest)) as fout:
+        size = os.fstat(fin.fileno()).st_size
+        header = make_header(algorithm, "stream", segment_size, size, rel_path if rel_path is not None else src.name, prefix)
+        if phase_ns is not None:
+            fin, fout = _TimedFile(fin), _TimedFile(fout)
+        fout.write(header + prefix)
+        if on_segment is not None:
+            on_segment(b"", header + prefix)
+        bytes_read = encrypt_stream(cipher, fin, fout, segment_size, on_segment=on_segment, associated_data=header)
+    if bytes_read != size:
+        # The header (authenticated) already promised the size at open time.
+        raise ValueError(f"{src} changed size while it was being encrypted")
+    if phase_ns is not None:
+        phase_ns["read"] += fin.elapsed_ns
+        phase_ns["write"] += fout.elapsed_ns
+    return bytes_read
+
+def encrypt_file_aesgcm(src: Path, dest: Path, key: bytes, segment_size: int = None, rel_path: str = None):
+    """
+    Encrypt src -> dest using AES-GCM.
+
+    With segment_size set, src is streamed as a chunked AEAD stream in
+    bounded memory and nothing is returned. The output starts with an
+    output_header naming the algorithm and layout; rel_path (default: src's
+    name) is the original path it hashes.
+    """
+    if not _verify_safety_path(src) or not _verify_safety_path(dest):
+        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
     
-    key_length = len(encrypted_key).to_bytes(4, byteorder='big')
-    dest.write_bytes(key_length + encrypted_key + nonce + ciphertext)
+    cipher, prefix = _session_aesgcm(key)
+    if segment_size:
+        _encrypt_file_streaming(cipher, src, dest, segment_size, prefix, algorithm="aes", rel_path=rel_path)
+        return None
+    data = src.read_bytes()
+    with _create_output(dest) as fout:
+        fout.write(_seal(cipher, "aes", rel_path if rel_path is not None else src.name, prefix, data))
+    return data # Return original data for metrics
+
+def encrypt_file_rsa(src: Path, dest: Path, key: bytes, segment_size: int = None, rel_path: str = None):
+    """
+    Encrypt src -> dest using RSA hybrid encryption.
+
+    key is a PEM RSA public or private key; it is parsed once per process.
+    With segment_size set, the AES-GCM payload after the wrapped key is a
+    chunked stream and nothing is returned. The output starts with an
+    output_header naming the algorithm and layout; rel_path (default: src's
+    name) is the original path it hashes.
+    """
+    if not _verify_safety_path(src) or not _verify_safety_path(dest):
+        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+
+    cipher, prefix = _session_rsa(key)
+    if segment_size:
+        _encrypt_file_streaming(cipher, src, dest, segment_size, prefix, algorithm="rsa", rel_path=rel_path)
+        return None
+    data = src.read_bytes()
+    with _create_output(dest) as fout:
+        fout.write(_seal(cipher, "rsa", rel_path if rel_path is not None else src.name, prefix, data))
     return data
 
-def encrypt_file_chacha20(src: Path, dest: Path, key: bytes):
-    """Encrypt src -> dest using ChaCha20-Poly1305."""
+def encrypt_file_chacha20(src: Path, dest: Path, key: bytes, segment_size: int = None, rel_path: str = None):
+    """
+    Encrypt src -> dest using ChaCha20-Poly1305.
+
+    With segment_size set, src is streamed as a chunked AEAD stream in
+    bounded memory and nothing is returned. The output starts with an
+    output_header naming the algorithm and layout; rel_path (default: src's
+    name) is the original path it hashes.
+    """
     if not _verify_safety_path(src) or not _verify_safety_path(dest):
         raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
 
-    chacha = ChaCha20Poly1305(key)
-    nonce = secrets.token_bytes(12)
+    cipher, prefix = _session_chacha20(key)
+    if segment_size:
+        _encrypt_file_streaming(cipher, src, dest, segment_size, prefix, algorithm="chacha20", rel_path=rel_path)
+        return None
     data = src.read_bytes()
-    ct = chacha.encrypt(nonce, data, associated_data=None)
-    dest.write_bytes(nonce + ct)
+    with _create_output(dest) as fout:
+        fout.write(_seal(cipher, "chacha20", rel_path if rel_path is not None else src.name, prefix, data))
     return data
 
+# name -> (file-level function, session setup)
+CIPHERS = {
+    "aes": (encrypt_file_aesgcm, _session_aesgcm),
+    "rsa": (encrypt_file_rsa, _session_rsa),
+    "chacha20": (encrypt_file_chacha20, _session_chacha20),
+}
+
 def ensure_encrypted_dir(root: Path):
     """Create and return the encrypted directory."""
     enc_dir = root / ENCRYPTED_DIRNAME
@@ -105,8 +302,516 @@ def _call_generate_key_safely(algorithm):
         except TypeError:
             return generate_key()
 
-def simulate_encrypt_folder(folder: str, test_mode=True, algorithm: str = "AES", stop_event: threading.Event = None, progress_callback=None, allowed_ext=None, drop_ransom_note: bool = False, ransom_note_content: str = ""):
-    """Simulate encrypting files and return detailed metrics."""
+def _select_cipher(algorithm: str) -> str:
+    """Map an algorithm name onto its CIPHERS entry."""
+    algo = algorithm.lower()
+    if algo.startswith("aes"):
+        return "aes"
+    elif algo.startswith("rsa"):
+        return "rsa"
+    elif "chacha" in algo:
+        return "chacha20"
+    print(f"[Error] Unknown algorithm '{algorithm}', defaulting to AES-GCM.")
+    return "aes"
+
+def _dest_for(root: Path, enc_dir: Path, f: Path) -> Path:
+    """Return the encrypted copy path for a file under root."""
+    rel = f.relative_to(root)
+    return enc_dir / (str(rel).replace(os.sep, "__") + ".encrypted")
+
+def _new_partial_metrics():
+    """Empty per-worker metrics, merged into the run totals by _merge_partial_metrics."""
+    return {
+        "done": 0,
+        "failed_files": 0,
+        "total_bytes_processed": 0,
+        "disk_bytes_read": 0,
+        "bytes_encrypted": 0,
+        "entropy_sample_bytes_read": 0,
+        "entropy_sampled_bytes": 0,
+        "asymmetric_crypto_time": 0.0,
+        "symmetric_crypto_time": 0.0,
+        "file_sizes": [],
+        "file_types": [],
+        "entropy_before": [],
+        "entropy_after": [],
+        "entropy_ci95": [],
+        "outputs": [],
+        "journal": [],
+        "change_index": [],
+        "pack": [],
+        "errors": [],
+        "notes": [],
+        "note_errors": [],
+        "phase_ns": dict.fromkeys(PHASES, 0),
+        "file_latency": file_latency_histogram(),
+        "byte_cost": byte_cost_histogram(),
+    }
+
+def _merge_partial_metrics(into: dict, partial: dict):
+    """Fold one worker's partial metrics into the run totals."""
+    for name, value in partial.items():
+        if isinstance(value, list):
+            into[name].extend(value)
+        elif isinstance(value, dict):
+            for sub_name, sub_value in value.items():
+                into[name][sub_name] += sub_value
+        elif hasattr(value, "merge"):
+            into[name].merge(value)
+        else:
+            into[name] += value
+
+def _session_for(f: Path, job: dict):
+    """Pick the (cipher, prefix) session for f according to job["rsa_key_wrap"]."""
+    if job["cipher"] == "rsa":
+        if job["rsa_key_wrap"] == "run":
+            aes_key, wrapped = job["rsa_run_session"]
+            return AESGCM(aes_key), wrapped
+        if job["rsa_key_wrap"] == "directory":
+            rel_dir = f.parent.relative_to(job["root"]).as_posix()
+            aes_key, wrapped = _directory_session_rsa(job["key"], job["rsa_run_key"], rel_dir)
+            return AESGCM(aes_key), wrapped
+    return CIPHERS[job["cipher"]][1](job["key"])
+
+def _output_entropy(dest, start: int, sampling: str, k: int):
+    """sampled_file_entropy of the output: a file, or a pack record written from start on."""
+    if isinstance(dest, Path):
+        return sampled_file_entropy(dest, sampling, k)
+    dest.flush()
+    windows = sample_windows(dest.tell() - start, sampling, k)
+    return pread_sampled_entropy(dest.fileno(), [(start + offset, length) for offset, length in windows])
+
+def _encrypt_one(f: Path, dest, job: dict, file_size: int, phase_ns: dict) -> dict:
+    """
+    Read f once, encrypt it to dest and measure entropy on the plaintext and
+    ciphertext, in full or over job["entropy_sampling"] windows. dest is the
+    output path, or with pack output an open pack record (PackWriter.begin).
+    Returns the per-file stats merged by _encrypt_batch; time per phase goes
+    to phase_ns.
+    """
+    # f comes from scan_entries and dest from the verified encrypted/ folder,
+    # so a lexical check is enough (no resolve per file). Packs are checked per batch.
+    if not safe_zone_verifier.verify_trusted(f) or (isinstance(dest, Path) and not safe_zone_verifier.verify_trusted(dest)):
+        raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+    segment_size = job["segment_size"]
+    sampling, k = job["entropy_sampling"], job["entropy_windows"]
+    stats = {"entropy_sample_bytes_read": 0}
+    clock = time.perf_counter_ns
+
+    # Session setup is where RSA parses/wraps keys; everything after is AEAD.
+    start = clock()
+    session_cipher, prefix = _session_for(f, job)
+    setup_ns = clock() - start
+    phase_ns["crypto_setup"] += setup_ns
+    cipher = _TimedCipher(session_cipher)
+    rel_path = os.fspath(f)[job["root_len"]:].replace(os.sep, "/")
+    algorithm = job["cipher"]
+
+    if job["intermittent"] is not None:
+        # Only the pattern's regions go through Python; sampled entropy of the result.
+        stats["bytes_read"], stats["bytes_encrypted"] = encrypt_intermittent(cipher, f, dest, job["intermittent"], prefix, phase_ns, algorithm, rel_path)
+        phase_ns["encrypt"] += cipher.elapsed_ns
+        start = clock()
+        before = sampled_file_entropy(f, sampling, k)
+        after = sampled_file_entropy(dest, sampling, k)
+        phase_ns["entropy"] += clock() - start
+        stats["entropy_sample_bytes_read"] = before[2] + after[2]
+    elif segment_size:
+        if sample_windows(file_size, sampling, k) == [(0, file_size)]:
+            # Streaming mode: histogram each segment as it passes through.
+            before, after = EntropyAccumulator(), EntropyAccumulator()
+
+            def on_segment(plaintext, written):
+                start = clock()
+                before.update(plaintext)
+                after.update(written)
+                phase_ns["entropy"] += clock() - start
+
+            stats["bytes_read"] = _encrypt_file_streaming(cipher, f, dest, segment_size, prefix, on_segment, phase_ns, algorithm, rel_path)
+            stats["bytes_encrypted"] = stats["bytes_read"]
+            phase_ns["encrypt"] += cipher.elapsed_ns
+            stats["entropy_before"], stats["entropy_after"] = before.entropy(), after.entropy()
+            stats["entropy_ci95"], stats["entropy_sampled_bytes"] = 0.0, before.total
+            _record_crypto_time(stats, job, setup_ns, cipher.elapsed_ns)
+            return stats
+
+        # Sampled: bounded positional reads instead of histogramming every segment.
+        out_start = None if isinstance(dest, Path) else dest.tell()
+        stats["bytes_read"] = stats["bytes_encrypted"] = _encrypt_file_streaming(cipher, f, dest, segment_size, prefix, phase_ns=phase_ns, algorithm=algorithm, rel_path=rel_path)
+        phase_ns["encrypt"] += cipher.elapsed_ns
+        start = clock()
+        before = sampled_file_entropy(f, sampling, k)
+        after = _output_entropy(dest, out_start, sampling, k)
+        phase_ns["entropy"] += clock() - start
+        stats["entropy_sample_bytes_read"] = before[2] + after[2]
+    else:
+        t_read = clock()
+        data = f.read_bytes()
+        t_encrypt = clock()
+        sealed = _seal(cipher, algorithm, rel_path, prefix, data)
+        t_write = clock()
+        if isinstance(dest, Path):
+            with _create_output(dest) as fout:
+                fout.write(sealed)
+        else:
+            dest.write(sealed)
+        t_entropy = clock()
+        before = sampled_entropy(data, sample_windows(len(data), sampling, k))
+        after = sampled_entropy(sealed, sample_windows(len(sealed), sampling, k))
+        t_end = clock()
+        phase_ns["read"] += t_encrypt - t_read
+        phase_ns["encrypt"] += t_write - t_encrypt
+        phase_ns["write"] += t_entropy - t_write
+        phase_ns["entropy"] += t_end - t_entropy
+        stats["bytes_read"] = stats["bytes_encrypted"] = len(data)
+
+    stats["entropy_before"], stats["entropy_after"] = before[0], after[0]
+    # Half-width of the 95% interval on the per-file entropy increase.
+    stats["entropy_ci95"] = (before[1] ** 2 + after[1] ** 2) ** 0.5
+    stats["entropy_sampled_bytes"] = before[2]
+    _record_crypto_time(stats, job, setup_ns, cipher.elapsed_ns)
+    return stats
+
+def _record_crypto_time(stats: dict, job: dict, setup_ns: int, aead_ns: int):
+    """Split per-file crypto time into asymmetric (RSA setup) and symmetric parts."""
+    asymmetric = setup_ns if job["cipher"] == "rsa" else 0
+    stats["asymmetric_crypto_time"] = asymmetric / 1e9
+    stats["symmetric_crypto_time"] = (aead_ns + setup_ns - asymmetric) / 1e9
+
+# Stop flag of a process pool worker, set by _init_worker.
+_worker_stop = None
+
+def _init_worker(stop):
+    global _worker_stop
+    _worker_stop = stop
+
+def _stop_requested(job: dict) -> bool:
+    stop = job.get("stop") or _worker_stop
+    return stop is not None and stop.is_set()
+
+def _encrypt_batch(entries, job: dict, note_dirs=()):
+    """
+    Encrypt a batch of scanner.ScanEntry records and return their partial metrics.
+    Ransom notes (job["ransom_note"]) are first written into note_dirs.
+    The stop flag (job["stop"], or the process worker's) is checked before
+    every file; the files left over are not counted.
+
+    job carries the per-run settings (root, enc_dir, key, cipher, ...).
+    Runs inside pool workers (processes or threads), so it must stay a
+    module-level function and must not print: output lines are returned
+    and printed by the parent.
+    """
+    partial = _new_partial_metrics()
+    if note_dirs:
+        start = time.perf_counter_ns()
+        for dirpath in note_dirs:
+            try:
+                partial["notes"].append(str(write_ransom_note(dirpath, job["ransom_note"])))
+            except Exception as e:
+                partial["note_errors"].append((dirpath, str(e)))
+        partial["phase_ns"]["ransom_notes"] += time.perf_counter_ns() - start
+    pack = None
+    if entries and job["pack_run"]:
+        # One pack per worker, opened once per batch instead of a file per output.
+        pack_path = job["enc_dir"] / worker_pack_name(job["pack_run"])
+        if not safe_zone_verifier.verify_trusted(pack_path):
+            raise PermissionError(f"Operation denied: Path is outside the '{SAFE_ZONE_NAME}' directory.")
+        pack = PackWriter(pack_path)
+    try:
+        for entry in entries:
+            if _stop_requested(job):
+                break
+            f = Path(entry.path)
+            dest = _dest_for(job["root"], job["enc_dir"], f)
+            try:
+                start = time.perf_counter_ns()
+                # Size comes from the scan's directory listing, not a second stat().
+                file_size = entry.size
+                partial["total_bytes_processed"] += file_size
+
+                stats = _encrypt_one(f, dest if pack is None else pack.begin(dest.name), job, file_size, partial["phase_ns"])
+                if pack is not None:
+                    partial["pack"].append([os.path.basename(pack.path), dest.name, *pack.commit()])
+                partial["disk_bytes_read"] += stats["bytes_read"]
+                partial["bytes_encrypted"] += stats["bytes_encrypted"]
+                partial["entropy_sample_bytes_read"] += stats["entropy_sample_bytes_read"]
+                partial["entropy_sampled_bytes"] += stats["entropy_sampled_bytes"]
+                partial["asymmetric_crypto_time"] += stats["asymmetric_crypto_time"]
+                partial["symmetric_crypto_time"] += stats["symmetric_crypto_time"]
+            except Exception as e:
+                if pack is not None:
+                    pack.abort()
+                partial["failed_files"] += 1
+                partial["errors"].append((str(f), str(e)))
+                continue
+
+            latency_ns = time.perf_counter_ns() - start
+            partial["file_latency"].record(latency_ns)
+            if file_size:
+                partial["byte_cost"].record(latency_ns / file_size)
+            partial["done"] += 1
+            partial["file_sizes"].append(file_size)
+            partial["file_types"].append(entry.content_type or entry.suffix or ".none")
+            partial["entropy_before"].append(stats["entropy_before"])
+            partial["entropy_after"].append(stats["entropy_after"])
+            partial["entropy_ci95"].append(stats["entropy_ci95"])
+            partial["outputs"].append(str(dest) if pack is None else f"{pack.path}:{dest.name}")
+            partial["journal"].append([entry.path[job["root_len"]:], entry.size, entry.mtime_ns, dest.name])
+            if job["incremental"]:
+                try:
+                    st = os.stat(dest)
+                except OSError:
+                    continue
+                partial["change_index"].append([entry.path[job["root_len"]:], entry.size, entry.mtime_ns, entry.inode, dest.name, st.st_size, st.st_mtime_ns])
+    finally:
+        if pack is not None:
+            pack.close()
+    return partial
+
+def _fresh_stats(entries):
+    """
+    entries with size, mtime_ns and inode read from the files themselves,
+    dropping files that are gone. The scan index reports those of its last
+    listing for a file rewritten in place, which cannot tell whether the
+    encrypted copy of an earlier run is still current.
+    """
+    fresh = []
+    for entry in entries:
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            continue
+        fresh.append(entry._replace(size=st.st_size, mtime_ns=st.st_mtime_ns, inode=st.st_ino or entry.inode))
+    return fresh
+
+def _batch_size_for(total_files: int, workers: int) -> int:
+    """Small enough to keep progress/stop responsive, large enough to amortise IPC."""
+    return max(1, min(64, total_files // (workers * 8) if workers else total_files))
+
+def _bytes_curve(points, total_bytes: int, elapsed: float, samples: int = CURVE_POINTS) -> dict:
+    """
+    Resample (seconds, bytes encrypted so far) points, one per collected
+    batch, onto evenly spaced times from 0 to elapsed, as % of total_bytes.
+    """
+    times = [t for t, _ in points]
+    grid = [elapsed * i / (samples - 1) for i in range(samples)] if elapsed > 0 else [0.0]
+    done = [points[i - 1][1] if i else 0 for i in (bisect_right(times, t) for t in grid)]
+    return {
+        "time_s": grid,
+        "bytes_encrypted": done,
+        "pct_bytes": [(b / total_bytes) * 100 if total_bytes else 0 for b in done],
+    }
+
+def _time_to_bytes_pct(points, total_bytes: int, pcts=(25, 50, 90, 100)) -> dict:
+    """Seconds until pct% of the target bytes were encrypted (None if never reached)."""
+    result = {}
+    for pct in pcts:
+        goal = total_bytes * pct / 100
+        result[f"p{pct}"] = next((t for t, b in points if b >= goal), None) if total_bytes else None
+    return result
+
+def _phase_breakdown(phase_ns: dict) -> dict:
+    """Turn per-phase nanosecond totals into {phase: {"seconds", "pct"}}."""
+    total = sum(phase_ns.values())
+    return {
+        name: {"seconds": ns / 1e9, "pct": (ns / total) * 100 if total > 0 else 0}
+        for name, ns in phase_ns.items()
+    }
+
+class _ScanPipeline:
+    """
+    Runs the scanner on a background thread, feeding found files into a
+    bounded queue so encryption can start before the scan finishes.
+    """
+
+    def __init__(self, root: Path, scan_kwargs: dict, maxsize: int = PIPELINE_QUEUE_SIZE, note_dirs: bool = False):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.discovered = 0        # files found so far
+        self.discovered_bytes = 0  # and their total size
+        self.complete = False      # True once the whole tree has been scanned
+        self.error = None
+        self._stop = threading.Event()
+        if note_dirs:
+            # Directories to drop ransom notes into travel through the same queue.
+            scan_kwargs = {**scan_kwargs, "on_directory": self._put}
+        self._thread = threading.Thread(
+            target=self._run, args=(root, scan_kwargs),
+            name="scan-producer", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, root, scan_kwargs):
+        scan = scan_entries(root, **scan_kwargs)
+        try:
+            for entry in scan:
+                self.discovered += 1
+                self.discovered_bytes += entry.size
+                if not self._put(entry):
+                    return
+            self.complete = True
+        except BaseException as e:
+            self.error = e
+        finally:
+            scan.close()
+            self._put(_SCAN_DONE)
+
+    def batches(self, max_batch: int = PIPELINE_MAX_BATCH, poll_interval: float = 0.1):
+        """
+        Yield (files, note_dirs) batches: whatever is queued, up to a limit
+        that doubles from 1 to max_batch, so the first files finish quickly
+        and batches fill up once the scan runs ahead of the workers. While
+        the scanner has nothing new an empty batch is yielded every
+        poll_interval seconds, so the caller can still collect results and
+        notice a stop request.
+        """
+        limit = 1
+        while True:
+            try:
+                item = self.queue.get(timeout=poll_interval)
+            except queue.Empty:
+                yield [], []
+                continue
+            if item is _SCAN_DONE:
+                break
+            files, note_dirs = [], []
+            while True:
+                # Directory paths (str) are note targets, everything else a ScanEntry.
+                (note_dirs if isinstance(item, str) else files).append(item)
+                if len(files) + len(note_dirs) >= limit:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _SCAN_DONE:
+                    break
+            yield files, note_dirs
+            limit = min(max_batch, limit * 2)
+            if item is _SCAN_DONE:
+                break
+        if self.error is not None:
+            raise self.error
+
+def _run_batches(batches, job: dict, executor: str, workers: int, stop_event, collect):
+    """
+    Encrypt batches (an iterable of (scan entries, ransom note directories))
+    on the chosen executor, handing each batch's partial metrics to collect. At most
+    IN_FLIGHT_PER_WORKER batches per worker are submitted ahead, so batches
+    can be produced lazily (e.g. by a _ScanPipeline). Workers check
+    stop_event before every file, so a stop takes effect within one file.
+    """
+    if executor == "serial":
+        job = {**job, "stop": stop_event}
+        for entries, note_dirs in batches:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if entries or note_dirs:
+                collect(_encrypt_batch(entries, job, note_dirs))
+        if stop_event is not None and stop_event.is_set():
+            print("Encryption cancelled by user.")
+        return
+
+    if executor == "process":
+        # Relayed from stop_event; process workers inherit it through the initializer.
+        context = multiprocessing.get_context()
+        worker_stop = context.Event()
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(worker_stop,))
+        ahead = workers * PROCESS_IN_FLIGHT_PER_WORKER
+    else:
+        worker_stop = None
+        job = {**job, "stop": stop_event}
+        pool = EXECUTORS[executor](max_workers=workers)
+        ahead = workers * IN_FLIGHT_PER_WORKER
+    with pool:
+        in_flight = set()
+        cancelled = False
+
+        def _drain(timeout):
+            finished, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.discard(future)
+                if not future.cancelled():
+                    collect(future.result())
+
+        def _check_stop() -> bool:
+            nonlocal cancelled
+            if not cancelled and stop_event is not None and stop_event.is_set():
+                cancelled = True
+                if worker_stop is not None:
+                    worker_stop.set()
+                # Batches already running stop at their next file; what they finished is still counted.
+                for pending in in_flight:
+                    pending.cancel()
+            return cancelled
+
+        for entries, note_dirs in batches:
+            if _check_stop():
+                break
+            # Pass on finished results right away, not only when the pool is full.
+            _drain(timeout=0)
+            if not entries and not note_dirs:
+                continue  # nothing new from the scanner yet
+            while len(in_flight) >= ahead and not _check_stop():
+                _drain(timeout=STOP_POLL_S)
+            if cancelled:
+                break
+            in_flight.add(pool.submit(_encrypt_batch, entries, job, note_dirs))
+        while in_flight:
+            _check_stop()
+            _drain(timeout=STOP_POLL_S)
+        if cancelled:
+            print("Encryption cancelled by user.")
+
+def simulate_encrypt_folder(folder: str, test_mode=True, algorithm: str = "AES", stop_event: threading.Event = None, progress_callback=None, allowed_ext=None, drop_ransom_note: bool = False, ransom_note_content: str = "", *,
+                            workers: int = None, executor: str = "process", segment_size: int = None, rsa_key_wrap: str = "file", use_key_pool: bool = True, intermittent: IntermittentPattern = None, pack: bool = False,
+                            scan_workers: int = 1, pipeline: bool = False, use_index: bool = False, rules: TargetRules = None, sniff_types: bool = False, ordering: str = "walk",
+                            entropy_sampling: str = "full", entropy_windows: int = DEFAULT_RANDOM_WINDOWS, sample_rate_hz: float = DEFAULT_RATE_HZ,
+                            resume: bool = False, incremental: bool = False, force: bool = False):
+    """
+    Simulate encrypting files and return detailed metrics.
+
+    Encryption: workers on executor "process", "thread" or "serial";
+    segment_size (aead_stream), rsa_key_wrap "file", "run" or "directory",
+    use_key_pool (key_pool), intermittent (intermittent) and pack
+    (pack_container, not with intermittent or incremental).
+    Targets: scan_workers and use_index (scanner), pipeline (encrypt while
+    the scan runs), rules (target_rules), sniff_types (file_magic) and
+    ordering (target_order).
+    Measurement: entropy_sampling and entropy_windows (byte_entropy),
+    sample_rate_hz (resource_sampler).
+    Repeat runs: resume (run_journal), incremental and force (change_index).
+
+    progress_callback(done, discovered, elapsed, scan_complete) gets the
+    files encrypted and found so far; stop_event ends the run within one
+    file per worker.
+    """
+    if executor not in EXECUTORS and executor != "serial":
+        raise ValueError(f"Unknown executor '{executor}', expected one of: serial, {', '.join(EXECUTORS)}")
+    if entropy_sampling not in SAMPLING_MODES:
+        raise ValueError(f"Unknown entropy sampling mode '{entropy_sampling}', expected one of: {', '.join(SAMPLING_MODES)}")
+    if rsa_key_wrap not in RSA_KEY_WRAP_MODES:
+        raise ValueError(f"Unknown RSA key wrap mode '{rsa_key_wrap}', expected one of: {', '.join(RSA_KEY_WRAP_MODES)}")
+    key_fn = order_key(ordering)
+    if intermittent is not None:
+        intermittent.validate()
+    if pack and (intermittent is not None or incremental):
+        raise ValueError("pack output cannot be combined with intermittent or incremental runs")
+
     root = Path(folder).resolve()
     if not root.exists() or not root.is_dir():
         raise ValueError("Folder path invalid")
@@ -119,98 +824,273 @@ def simulate_encrypt_folder(folder: str, test_mode=True, algorithm: str = "AES",
         return None
 
     enc_dir = ensure_encrypted_dir(root)
+    # Full check once (encrypted/ could be a planted symlink); per-file checks are lexical.
+    if not _verify_safety_path(enc_dir):
+        raise PermissionError(f"Operation denied: The path '{enc_dir}' is outside the designated '{SAFE_ZONE_NAME}' directory.")
     key_path = enc_dir / KEYFILE_NAME
+    cipher = _select_cipher(algorithm)
+    journal = RunJournal(enc_dir, cipher, resume=resume)
+    # Earlier segments' outputs must stay decryptable with the saved key.
+    resuming = journal.resumed and bool(journal.completed) and key_path.exists()
+    change_index = None
+    if incremental:
+        change_index = ChangeIndex(enc_dir, {
+            "cipher": cipher,
+            "segment_size": segment_size,
+            "rsa_key_wrap": rsa_key_wrap if cipher == "rsa" else None,
+            "intermittent": intermittent._asdict() if intermittent is not None else None,
+        })
 
-    if drop_ransom_note and ransom_note_content:
-        drop_ransom_notes(root, ransom_note_content)
+    run_phase_ns = dict.fromkeys(PHASES, 0)
+    drop_notes = bool(drop_ransom_note and ransom_note_content)
 
-    try:
-        key = _call_generate_key_safely(algorithm)
-    except Exception as e:
-        print(f"[Error] generate_key failed: {e}")
-        return None
+    key_start = time.perf_counter_ns()
+    key = None
+    key_source = "generated"
+    if resuming:
+        key, key_source = load_key(key_path), "resumed"
+    elif change_index is not None and not force and key_path.exists():
+        saved_key = load_key(key_path)
+        if change_index.usable_with(saved_key):
+            # Skipped files stay encrypted with the saved key.
+            key, key_source = saved_key, "reused"
+    if key is None and use_key_pool:
+        try:
+            key = key_pool.take(algorithm, refill=False)
+            if key is not None:
+                key_source = "pool"
+        except Exception as e:
+            print(f"[Key pool] Unavailable, generating key instead: {e}")
+    if key is None:
+        try:
+            key = _call_generate_key_safely(algorithm)
+        except Exception as e:
+            print(f"[Error] generate_key failed: {e}")
+            return None
+    run_phase_ns["key_setup"] += time.perf_counter_ns() - key_start
+    key_setup_time = run_phase_ns["key_setup"] / 1e9
     save_key(key, key_path)
     print(f"Encryption key saved to: {key_path}")
+    if change_index is not None:
+        change_index.bind(key, force=force)
+    if pack and not resuming:
+        # Like overwritten .encrypted files: earlier packs are under a replaced key.
+        for stale in enc_dir.glob("*" + PACK_SUFFIX):
+            stale.unlink()
+
+    workers = 1 if executor == "serial" else max(1, workers or os.cpu_count() or 1)
+    if workers == 1:
+        executor = "serial"
+    run_asymmetric_time = 0.0
+    if cipher == "rsa":
+        # Parse the (slow to validate) private key once, here, not per worker.
+        parse_start = time.perf_counter()
+        key = _rsa_public_pem(key)
+        run_asymmetric_time += time.perf_counter() - parse_start
+    job = {
+        "root": root,
+        "root_len": len(os.fspath(root)) + len(os.sep),
+        "enc_dir": enc_dir,
+        "key": key,
+        "cipher": cipher,
+        "segment_size": segment_size,
+        "entropy_sampling": entropy_sampling,
+        "entropy_windows": entropy_windows,
+        "rsa_key_wrap": rsa_key_wrap,
+        "ransom_note": ransom_note_content if drop_notes else None,
+        "intermittent": intermittent,
+        "incremental": change_index is not None,
+        # Names this run's packs apart from those of earlier runs.
+        "pack_run": secrets.token_hex(4) if pack else None,
+    }
+    if cipher == "rsa" and rsa_key_wrap != "file":
+        job["rsa_run_key"] = secrets.token_bytes(32)
+        if rsa_key_wrap == "run":
+            wrap_start = time.perf_counter()
+            job["rsa_run_session"] = _wrap_session_key_rsa(key, job["rsa_run_key"])
+            run_asymmetric_time += time.perf_counter() - wrap_start
+
+    scan_start = time.perf_counter()
+    index_stats = {}
+    scan_kwargs = {
+        "allowed_ext": allowed_ext,
+        "timings": run_phase_ns,
+        "workers": scan_workers,
+        "use_index": use_index,
+        "index_stats": index_stats,
+        "rules": rules,
+        "classifier": content_classifier if sniff_types else None,
+    }
+    sniff_baseline = content_classifier.stats() if sniff_types else None
+    skipped_files = 0
+
+    def _pending(entries):
+        """Drop files journaled by an earlier segment or whose encrypted copy is current."""
+        nonlocal skipped_files
+        root_len = job["root_len"]
+        if use_index and (resuming or change_index is not None):
+            entries = _fresh_stats(entries)
+        if resuming:
+            todo = [e for e in entries if not journal.done(e.path[root_len:], e.size, e.mtime_ns)]
+            skipped_files += len(entries) - len(todo)
+            entries = todo
+        if change_index is not None:
+            entries = [e for e in entries if not change_index.current(e.path[root_len:], e.size, e.mtime_ns, e.inode)]
+        return entries
+    # Ransom notes are dropped from the same traversal that finds the files,
+    # and written by the pool workers in batches of directories.
+    scan = None
+    if pipeline:
+        scan = _ScanPipeline(root, scan_kwargs, note_dirs=drop_notes)
+        batches = ((_pending(entries), note_dirs) for entries, note_dirs in scan.batches())
+        if key_fn is not None:
+            batches = order_batches(batches, key_fn, PIPELINE_MAX_BATCH, window=ORDER_WINDOW)
+    else:
+        note_dirs = []
+        if drop_notes:
+            scan_kwargs["on_directory"] = note_dirs.append
+        files = list(scan_entries(root, **scan_kwargs))
+        print(f"Found {len(files)} target files to encrypt.")
+        todo = _pending(files)
+        if skipped_files:
+            print(f"Resuming: {skipped_files} files were already encrypted by an earlier run.")
+        if change_index is not None and change_index.skipped_files:
+            print(f"Incremental: {change_index.skipped_files} files are unchanged since they were encrypted.")
+        batch_size = _batch_size_for(len(todo), workers)
+        batches = [([], note_dirs[i:i + NOTE_BATCH_SIZE]) for i in range(0, len(note_dirs), NOTE_BATCH_SIZE)]
+        batches += [(todo[i:i + batch_size], []) for i in range(0, len(todo), batch_size)]
+        if key_fn is not None:
+            batches = order_batches(batches, key_fn, batch_size)
+
+    def _progress():
+        if scan is None:
+            return len(files), True
+        return scan.discovered, scan.complete
 
-    files = list(scan_for_files(root, allowed_ext=allowed_ext))
-    total_files = len(files)
-    print(f"Found {total_files} target files to encrypt.")
+    def _target_bytes():
+        return scan.discovered_bytes if scan is not None else sum(entry.size for entry in files)
 
     # Metrics Initialization
-    process = psutil.Process(os.getpid())
+    # No background key generation while the run is measured or forks its workers.
+    key_pool.pause()
+    sampler = ResourceSampler(rate_hz=sample_rate_hz)
+    sampler.start()
     start_ts = time.time()
-    cpu_usages = []
-    mem_usages = []
-    total_bytes_processed = 0
-    file_sizes = []
-    file_types = []
-    entropy_before = []
-    entropy_after = []
-    done = 0
-    failed_files = 0
+    totals = _new_partial_metrics()
+    first_file_time = None
+    bytes_done = 0
+    bytes_points = []     # (seconds since start, bytes encrypted so far), one per collected batch
+    type_counts = Counter()
+    entropy_increase_sum = 0.0
+    pack_records = {}     # pack name -> [name, record_offset, payload_len]
+
+    def _checkpoint():
+        return segment_checkpoint(totals, type_counts, entropy_increase_sum, time.time() - start_ts)
 
     if callable(progress_callback):
-        progress_callback(0, total_files, 0.0)
+        discovered, complete = _progress()
+        progress_callback(0, discovered, 0.0, complete)
 
-    algo = algorithm.lower()
-    if algo.startswith("aes"):
-        encrypt_fn = encrypt_file_aesgcm
-    elif algo.startswith("rsa"):
-        encrypt_fn = encrypt_file_rsa
-    elif "chacha" in algo:
-        encrypt_fn = encrypt_file_chacha20
-    else:
-        print(f"[Error] Unknown algorithm '{algorithm}', defaulting to AES-GCM.")
-        encrypt_fn = encrypt_file_aesgcm
+    def _collect(partial):
+        nonlocal first_file_time, bytes_done, entropy_increase_sum
+        if partial["file_sizes"]:
+            bytes_done += sum(partial["file_sizes"])
+            bytes_points.append((time.time() - start_ts, bytes_done))
+        _merge_partial_metrics(totals, partial)
+        type_counts.update(partial["file_types"])
+        entropy_increase_sum += sum(partial["entropy_after"]) - sum(partial["entropy_before"])
+        journal.record(partial["journal"], _checkpoint)
+        if change_index is not None:
+            change_index.update(partial["change_index"])
+        for pack_name, *record in partial["pack"]:
+            pack_records.setdefault(pack_name, []).append(record)
+        if first_file_time is None and totals["done"]:
+            first_file_time = time.perf_counter() - scan_start
+        for dest in partial["outputs"]:
+            print(f"-> {dest}")
+        for path, err in partial["errors"]:
+            print(f"Failed to encrypt {path}: {err}")
+        for note_path in partial["notes"]:
+            print(f"Dropped ransom note: {note_path}")
+        for dirpath, err in partial["note_errors"]:
+            print(f"Failed to drop ransom note in {dirpath}: {err}")
+        if callable(progress_callback):
+            discovered, complete = _progress()
+            progress_callback(totals["done"], discovered, time.time() - start_ts, complete)
 
     print("Encrypted files:")
-    for i, f in enumerate(files):
-        if stop_event is not None and stop_event.is_set():
-            print("Encryption cancelled by user.")
-            break
-
-        rel = f.relative_to(root)
-        dest = enc_dir / (str(rel).replace(os.sep, "__") + ".encrypted")
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        
-        try:
-            # Record metrics per file
-            cpu_usages.append(process.cpu_percent())
-            mem_usages.append(process.memory_info().rss)
-            
-            file_size = f.stat().st_size
-            file_sizes.append(file_size)
-            total_bytes_processed += file_size
-            file_types.append(f.suffix.lower() if f.suffix else ".none")
-
-            original_data = f.read_bytes()
-            entropy_before.append(_calculate_entropy(original_data))
-            
-            encrypt_fn(f, dest, key)
-            
-            encrypted_data = dest.read_bytes()
-            entropy_after.append(_calculate_entropy(encrypted_data))
-
-            done += 1
-            elapsed = time.time() - start_ts
-            print(f"-> {dest}")
-            if callable(progress_callback):
-                progress_callback(done, total_files, elapsed)
-        except Exception as e:
-            failed_files += 1
-            print(f"Failed to encrypt {f}: {e}")
+    try:
+        if scan is not None:
+            scan.start()
+        _run_batches(batches, job, executor, workers, stop_event, _collect)
+    finally:
+        if scan is not None:
+            scan.stop()
+        elapsed = time.time() - start_ts
+        sampler.stop()
+        key_pool.resume()
+    if use_key_pool:
+        key_pool.start(algorithm)
+    resource_usage = sampler.summary()
+    total_files, scan_complete = _progress()
+    if scan is not None:
+        print(f"Found {total_files} target files to encrypt{'' if scan_complete else ' before the scan was stopped'}.")
+        if callable(progress_callback):
+            progress_callback(totals["done"], total_files, elapsed, scan_complete)
+    # Scanner timings are complete only now that the producer has stopped.
+    _merge_partial_metrics(totals, {"phase_ns": run_phase_ns})
+    final_checkpoint = segment_checkpoint(totals, type_counts, entropy_increase_sum, elapsed)
+    journal.close(final_checkpoint)
+    pack_stats = None
+    if pack:
+        # Workers are done with the packs: append their indexes.
+        pack_bytes = 0
+        for pack_name, records in pack_records.items():
+            write_index(enc_dir / pack_name, records)
+            pack_bytes += (enc_dir / pack_name).stat().st_size
+        pack_stats = {
+            "packs": len(pack_records),
+            "records": sum(len(records) for records in pack_records.values()),
+            "payload_bytes": sum(length for records in pack_records.values() for _, _, length in records),
+            "pack_bytes": pack_bytes,
+        }
+    if change_index is not None:
+        change_index.save(complete=scan_complete and not (stop_event and stop_event.is_set()))
+    whole_run = None
+    if resuming:
+        whole_run = stitch_segments(journal.segments + [final_checkpoint])
+        whole_run["phase_breakdown"] = _phase_breakdown(whole_run.pop("phase_ns"))
 
-    elapsed = time.time() - start_ts
+    done = totals["done"]
+    failed_files = totals["failed_files"]
+    total_bytes_processed = totals["total_bytes_processed"]
+    disk_bytes_read = totals["disk_bytes_read"]
+    file_sizes = totals["file_sizes"]
+    bytes_encrypted = totals["bytes_encrypted"]
+    file_types = totals["file_types"]
+    entropy_before = totals["entropy_before"]
+    entropy_after = totals["entropy_after"]
+    entropy_ci95 = totals["entropy_ci95"]
+    asymmetric_crypto_time = totals["asymmetric_crypto_time"] + run_asymmetric_time
+    symmetric_crypto_time = totals["symmetric_crypto_time"]
 
     # Final Metrics Calculation
     encryption_speed = done / elapsed if elapsed > 0 else 0
     throughput = (total_bytes_processed / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+    effective_throughput = (bytes_encrypted / (1024 * 1024)) / elapsed if elapsed > 0 else 0
+    file_bytes_done = sum(file_sizes)
+    # Single-pass pipeline: every input byte is read from disk exactly once.
+    read_amplification = disk_bytes_read / total_bytes_processed if total_bytes_processed > 0 else 0
     avg_file_size = np.mean(file_sizes) if file_sizes else 0
-    peak_cpu_usage = max(cpu_usages) if cpu_usages else 0
-    peak_mem_overhead = (max(mem_usages) - mem_usages[0]) / (1024*1024) if mem_usages else 0
+    peak_cpu_usage = resource_usage.get("cpu_peak_pct", 0)
+    peak_mem_overhead = (resource_usage.get("rss_peak_bytes", 0) - resource_usage.get("rss_baseline_bytes", 0)) / (1024*1024)
     avg_entropy_increase = np.mean(np.array(entropy_after) - np.array(entropy_before)) if entropy_before else 0
+    # Mean of per-file half-widths: a conservative bound on the average's error.
+    avg_entropy_ci95 = float(np.mean(entropy_ci95)) if entropy_ci95 else 0.0
+    entropy_sampled_pct = (totals["entropy_sampled_bytes"] / disk_bytes_read) * 100 if disk_bytes_read > 0 else 0
     survival_rate = (failed_files / total_files) * 100 if total_files > 0 else 0
     
+    target_bytes = _target_bytes()
     file_type_counts = Counter(file_types)
     file_type_distribution = {ft: (count / total_files) * 100 for ft, count in file_type_counts.items()} if total_files > 0 else {}
 
@@ -218,50 +1098,208 @@ def simulate_encrypt_folder(folder: str, test_mode=True, algorithm: str = "AES",
     
     simulation_metrics = {
         "algorithm": algorithm,
+        "executor": executor,
+        "workers": workers,
+        "segment_size": segment_size,
+        "pipeline": pipeline,
         "elapsed_time": elapsed,
+        # From the start of the scan, so it includes the scan when not pipelined.
+        "time_to_first_file_s": first_file_time,
         "total_files": total_files,
+        "scan_complete": scan_complete,
+        "scan_index": index_stats if use_index else None,
+        "target_rules": rules.to_dict() if rules is not None else None,
         "encrypted_files": done,
         "failed_files": failed_files,
         "encryption_speed_fps": encryption_speed,
         "throughput_mbps": throughput,
+        "intermittent": intermittent._asdict() if intermittent is not None else None,
+        # Bytes actually run through the cipher, vs the size of the files encrypted.
+        "bytes_encrypted": bytes_encrypted,
+        "encrypted_bytes_pct": (bytes_encrypted / file_bytes_done) * 100 if file_bytes_done else 0,
+        "effective_throughput_mbps": effective_throughput,
+        "disk_bytes_read": disk_bytes_read,
+        "read_amplification": read_amplification,
         "average_file_size_bytes": avg_file_size,
         "peak_cpu_usage_pct": peak_cpu_usage,
         "peak_memory_overhead_mb": peak_mem_overhead,
         "average_entropy_increase": avg_entropy_increase,
+        "entropy_sampling": entropy_sampling,
+        "entropy_ci95_bits": avg_entropy_ci95,
+        "entropy_sampled_pct": entropy_sampled_pct,
+        "entropy_sample_bytes_read": totals["entropy_sample_bytes_read"],
+        "key_source": key_source,
+        "resume": {"resumed": resuming, "segments": len(journal.segments) + 1 if resuming else 1, "skipped_files": skipped_files},
+        # Stitched across every segment of a resumed run.
+        "whole_run": whole_run,
+        # Unchanged since the last run: skipped before being read, not counted as encrypted.
+        "incremental": {**change_index.stats(), "forced": force} if change_index is not None else None,
+        # pack_bytes includes the alignment holes (not allocated on disk) and indexes.
+        "pack_output": pack_stats,
+        "key_setup_time_s": key_setup_time,
+        "rsa_key_wrap": rsa_key_wrap if job["cipher"] == "rsa" else None,
+        # Summed across workers, so these can exceed elapsed_time.
+        "asymmetric_crypto_time_s": asymmetric_crypto_time,
+        "symmetric_crypto_time_s": symmetric_crypto_time,
         "survival_rate_pct": survival_rate,
-        "file_type_distribution_pct": file_type_distribution
+        "ransom_notes_dropped": len(totals["notes"]),
+        "file_type_distribution_pct": file_type_distribution,
+        "ordering": ordering,
+        "total_target_bytes": target_bytes,
+        # Damage before detection: when each share of the target bytes was encrypted.
+        "time_to_bytes_pct_s": _time_to_bytes_pct(bytes_points, target_bytes),
+        "bytes_encrypted_curve": _bytes_curve(bytes_points, target_bytes, elapsed),
+        "file_type_source": "content" if sniff_types else "extension",
+        "content_sniffing": content_classifier.stats(sniff_baseline) if sniff_types else None,
+        # Worker phases are summed across workers; pct is of all phase time.
+        "phase_breakdown": _phase_breakdown(totals["phase_ns"]),
+        "file_latency_ms": totals["file_latency"].summary(scale=1e6),
+        "per_byte_cost_ns": totals["byte_cost"].summary(),
+        # Full histograms, stored with the report so runs can be merged/compared later.
+        "latency_histograms": {
+            "file_latency_ns": totals["file_latency"].to_dict(),
+            "byte_cost_ns": totals["byte_cost"].to_dict(),
+        },
+        "resource_usage": resource_usage,
+        "resource_timeseries": sampler.timeseries()
     }
 
     return simulation_metrics
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python encrypt.py <sandbox_folder> [--algorithm=ALGO] [--all-files]")
+        print("Usage: python encrypt.py <sandbox_folder> [--algorithm=ALGO] [--all-files] [options]\n"
+              "  encryption: [--workers=N] [--executor=thread|process|serial] [--stream | --segment-size=BYTES]\n"
+              "              [--rsa-key-wrap=file|run|directory] [--no-key-pool] [--pack]\n"
+              "              [--intermittent=header|skip_step|percent] [--intermittent-block=BYTES]\n"
+              "              [--intermittent-step=BYTES] [--intermittent-percent=PCT]\n"
+              "  targets:    [--scan-workers=N] [--pipeline] [--use-index] [--sniff-types]\n"
+              "              [--include=GLOB] [--exclude=GLOB] [--exclude-dir=GLOB] [--max-depth=N]\n"
+              "              [--min-size=BYTES] [--max-size=BYTES] [--modified-after=ISO_DATE] [--modified-before=ISO_DATE]\n"
+              "              [--ordering=walk|smallest_first|largest_first|by_extension_priority|random]\n"
+              "  measuring:  [--entropy-sampling=full|head_mid_tail|random] [--entropy-windows=K] [--sample-rate=HZ]\n"
+              "  repeat:     [--resume] [--incremental] [--force]")
         sys.exit(1)
     
     folder = sys.argv[1]
     algorithm = "AES"
     all_files_mode = False
+    workers = None
+    executor = "process"
+    segment_size = None
+    entropy_sampling = "full"
+    entropy_windows = DEFAULT_RANDOM_WINDOWS
+    rsa_key_wrap = "file"
+    use_key_pool = True
+    sample_rate_hz = DEFAULT_RATE_HZ
+    scan_workers = 1
+    pipeline = False
+    use_index = False
+    rule_args = {}
+    sniff_types = False
+    ordering = "walk"
+    intermittent_args = {}
+    resume = False
+    incremental = False
+    force = False
+    pack = False
     
     for arg in sys.argv[2:]:
         if arg.startswith("--algorithm="):
             algorithm = arg.split("=")[1].strip()
         elif arg == "--all-files":
             all_files_mode = True
+        elif arg.startswith("--workers="):
+            workers = int(arg.split("=")[1].strip())
+        elif arg.startswith("--executor="):
+            executor = arg.split("=")[1].strip().lower()
+        elif arg == "--stream":
+            segment_size = DEFAULT_SEGMENT_SIZE
+        elif arg.startswith("--segment-size="):
+            segment_size = int(arg.split("=")[1].strip())
+        elif arg.startswith("--entropy-sampling="):
+            entropy_sampling = arg.split("=")[1].strip().lower()
+        elif arg.startswith("--entropy-windows="):
+            entropy_windows = int(arg.split("=")[1].strip())
+        elif arg.startswith("--rsa-key-wrap="):
+            rsa_key_wrap = arg.split("=")[1].strip().lower()
+        elif arg == "--no-key-pool":
+            use_key_pool = False
+        elif arg.startswith("--sample-rate="):
+            sample_rate_hz = float(arg.split("=")[1].strip())
+        elif arg.startswith("--scan-workers="):
+            scan_workers = int(arg.split("=")[1].strip())
+        elif arg == "--pipeline":
+            pipeline = True
+        elif arg == "--use-index":
+            use_index = True
+        elif arg.startswith(("--include=", "--exclude=", "--exclude-dir=")):
+            name, glob = arg[2:].split("=", 1)
+            field = "exclude_dirs" if name == "exclude-dir" else name
+            rule_args[field] = rule_args.get(field, ()) + (glob,)
+        elif arg.startswith(("--min-size=", "--max-size=", "--max-depth=")):
+            name, value = arg[2:].split("=", 1)
+            rule_args[name.replace("-", "_")] = int(value.strip())
+        elif arg.startswith(("--modified-after=", "--modified-before=")):
+            name, value = arg[2:].split("=", 1)
+            rule_args[name.replace("-", "_")] = value.strip()
+        elif arg == "--sniff-types":
+            sniff_types = True
+        elif arg.startswith("--ordering="):
+            ordering = arg.split("=")[1].strip().lower()
+        elif arg.startswith("--intermittent="):
+            intermittent_args["mode"] = arg.split("=")[1].strip().lower()
+        elif arg.startswith("--intermittent-block="):
+            intermittent_args["block_size"] = int(arg.split("=")[1].strip())
+        elif arg.startswith("--intermittent-step="):
+            intermittent_args["step"] = int(arg.split("=")[1].strip())
+        elif arg.startswith("--intermittent-percent="):
+            intermittent_args["percent"] = float(arg.split("=")[1].strip())
+        elif arg == "--resume":
+            resume = True
+        elif arg == "--incremental":
+            incremental = True
+        elif arg == "--force":
+            # Re-encrypt everything and rebuild the change index.
+            incremental = force = True
+        elif arg == "--pack":
+            pack = True
     
     # Get ALLOWED_EXT from scanner module
     from scanner import ALLOWED_EXT as DEFAULT_EXT
     allowed_ext = None if all_files_mode else DEFAULT_EXT
+    rules = TargetRules(**rule_args) if rule_args else None
+    intermittent = IntermittentPattern(**intermittent_args) if intermittent_args else None
     
-    metrics = simulate_encrypt_folder(folder, test_mode=TEST_MODE, algorithm=algorithm, allowed_ext=allowed_ext)
+    metrics = simulate_encrypt_folder(folder, test_mode=TEST_MODE, algorithm=algorithm, allowed_ext=allowed_ext,
+                                      workers=workers, executor=executor, segment_size=segment_size, rsa_key_wrap=rsa_key_wrap, use_key_pool=use_key_pool, intermittent=intermittent, pack=pack,
+                                      scan_workers=scan_workers, pipeline=pipeline, use_index=use_index, rules=rules, sniff_types=sniff_types, ordering=ordering,
+                                      entropy_sampling=entropy_sampling, entropy_windows=entropy_windows, sample_rate_hz=sample_rate_hz,
+                                      resume=resume, incremental=incremental, force=force)
     
     if metrics:
         print("\n--- Simulation Metrics ---")
         for key, value in metrics.items():
-            if isinstance(value, dict):
+            if key == "resource_timeseries":
+                print(f"{key}: {len(value['time_s'])} samples")
+            elif key == "bytes_encrypted_curve":
+                # Every tenth point: % of target bytes encrypted by then.
+                print(f"{key}: " + ", ".join(f"{t:.2f}s {pct:.0f}%" for t, pct in list(zip(value["time_s"], value["pct_bytes"]))[::10]))
+            elif key == "latency_histograms":
+                print(f"{key}: {', '.join(value)}")
+            elif key == "phase_breakdown":
+                print(f"{key}:")
+                for phase, timing in value.items():
+                    print(f"  - {phase}: {timing['seconds']:.4f}s ({timing['pct']:.1f}%)")
+            elif isinstance(value, dict):
                 print(f"{key}:")
                 for sub_key, sub_value in value.items():
-                    print(f"  - {sub_key}: {sub_value:.2f}%")
+                    if key.endswith("_pct"):
+                        print(f"  - {sub_key}: {sub_value:.2f}%")
+                    elif isinstance(sub_value, float):
+                        print(f"  - {sub_key}: {sub_value:.2f}")
+                    else:
+                        print(f"  - {sub_key}: {sub_value}")
             elif isinstance(value, float):
                 print(f"{key}: {value:.2f}")
             else:
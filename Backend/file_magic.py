@@ -0,0 +1,253 @@
+# Magic-byte content sniffing for file-type classification.
+#
+# Only the first SNIFF_BYTES of a file are read (one os.pread), and matched
+# against a signature table compiled into a dict keyed by the first two
+# bytes, so a lookup tries a handful of candidates instead of every
+# signature. Results are cached by (inode, mtime), so re-scans of unchanged
+# files cost no IO at all. Files whose start matches nothing get a second
+# read of their last TAIL_BYTES, for formats marked at the end
+# (TAIL_SIGNATURES).
+import os
+import threading
+import time
+from collections import namedtuple
+try:
+    from .byte_entropy import _pread
+except ImportError:
+    from byte_entropy import _pread
+
+SNIFF_BYTES = 80         # covers the longest signature (odf ends at byte 72)
+CACHE_LIMIT = 1_000_000   # cached (inode, mtime) entries; the cache is dropped when full
+
+Signature = namedtuple("Signature", "label parts extensions")
+
+def _sig(label, parts, *extensions):
+    """parts: (offset, magic) pairs that must all match; a bare bytes value means offset 0."""
+    if isinstance(parts, bytes):
+        parts = ((0, parts),)
+    return Signature(label, tuple(parts), frozenset(extensions))
+
+# More specific signatures first: the first match wins.
+SIGNATURES = (
+    _sig("pdf", b"%PDF-", ".pdf"),
+    _sig("ooxml", ((0, b"PK\x03\x04"), (30, b"[Content_Types].xml")), ".docx", ".xlsx", ".pptx", ".docm", ".xlsm", ".pptm"),
+    _sig("odf", ((0, b"PK\x03\x04"), (30, b"mimetype"), (38, b"application/vnd.oasis.opendocument.")), ".odt", ".ods", ".odp", ".odg"),
+    _sig("epub", ((0, b"PK\x03\x04"), (30, b"mimetype"), (38, b"application/epub+zip")), ".epub"),
+    _sig("zip", b"PK\x03\x04", ".zip", ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".jar", ".apk", ".epub"),
+    _sig("zip", b"PK\x05\x06", ".zip"),
+    _sig("ole2", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", ".doc", ".xls", ".ppt", ".msg", ".msi"),
+    _sig("rtf", b"{\\rtf", ".rtf", ".doc"),
+    _sig("png", b"\x89PNG\r\n\x1a\n", ".png"),
+    _sig("jpeg", b"\xff\xd8\xff", ".jpg", ".jpeg", ".jfif"),
+    _sig("gif", b"GIF87a", ".gif"),
+    _sig("gif", b"GIF89a", ".gif"),
+    _sig("webp", ((0, b"RIFF"), (8, b"WEBP")), ".webp"),
+    _sig("wav", ((0, b"RIFF"), (8, b"WAVE")), ".wav"),
+    _sig("avi", ((0, b"RIFF"), (8, b"AVI ")), ".avi"),
+    _sig("tiff", b"II*\x00", ".tif", ".tiff", ".dng", ".cr2", ".nef"),
+    _sig("tiff", b"MM\x00*", ".tif", ".tiff"),
+    _sig("bmp", b"BM", ".bmp"),
+    _sig("mp3", b"ID3", ".mp3"),
+    _sig("ogg", b"OggS", ".ogg", ".oga", ".ogv", ".opus"),
+    _sig("flac", b"fLaC", ".flac"),
+    _sig("mp4", ((4, b"ftyp"),), ".mp4", ".m4a", ".m4v", ".mov", ".heic", ".3gp"),
+    _sig("elf", b"\x7fELF", "", ".elf", ".so", ".o", ".bin"),
+    _sig("pe", b"MZ", ".exe", ".dll", ".sys", ".scr", ".efi"),
+    _sig("mach-o", b"\xcf\xfa\xed\xfe", "", ".dylib"),
+    _sig("mach-o", b"\xce\xfa\xed\xfe", "", ".dylib"),
+    _sig("mach-o", b"\xca\xfe\xba\xbe", "", ".dylib", ".class"),
+    _sig("gzip", b"\x1f\x8b", ".gz", ".tgz"),
+    _sig("bzip2", b"BZh", ".bz2", ".tbz2"),
+    _sig("xz", b"\xfd7zXZ\x00", ".xz", ".txz"),
+    _sig("zstd", b"\x28\xb5\x2f\xfd", ".zst"),
+    _sig("7z", b"7z\xbc\xaf\x27\x1c", ".7z"),
+    _sig("rar", b"Rar!\x1a\x07", ".rar"),
+    _sig("sqlite", b"SQLite format 3\x00", ".sqlite", ".sqlite3", ".db"),
+    _sig("postscript", b"%!PS", ".ps", ".eps"),
+    # This simulator's own outputs (output_header, pack_container). An
+    # intermittent output of an empty file is all footer, so it starts with
+    # its header (layout 2 at byte 6).
+    _sig("sim_intermittent", ((0, b"SENC\x01"), (6, b"\x02")), ".encrypted"),
+    _sig("sim_encrypted", b"SENC\x01", ".encrypted"),
+    _sig("sim_pack", b"SIMPACK1", ".spk"),
+)
+
+# Offsets counted from the end of the file; tried in order when no
+# signature above matches the start and the start is not text. An
+# intermittent output whose first block (the ciphertext) happens to pass as
+# one of those is labelled by it instead.
+TAIL_SIGNATURES = (
+    # Intermittent outputs start with ciphertext; their footer ends in this trailer (intermittent).
+    _sig("sim_intermittent", ((-8, b"SINTRMT2"),), ".encrypted"),
+)
+TAIL_BYTES = max(-offset for sig in TAIL_SIGNATURES for offset, _ in sig.parts)
+
+# Labels that say nothing about the extension, so never count as mismatches.
+TEXT, EMPTY, UNKNOWN = "text", "empty", "unknown"
+
+def _compile(signatures):
+    """
+    Group signatures by their first two bytes at offset 0; the ones that
+    do not start at offset 0 are tried for every file.
+    """
+    by_prefix, anywhere = {}, []
+    for sig in signatures:
+        offset, magic = sig.parts[0]
+        if offset == 0 and len(magic) >= 2:
+            by_prefix.setdefault(magic[:2], []).append(sig)
+        else:
+            anywhere.append(sig)
+    return {prefix: tuple(sigs) for prefix, sigs in by_prefix.items()}, tuple(anywhere)
+
+_BY_PREFIX, _ANYWHERE = _compile(SIGNATURES)
+
+def _matches(head: bytes, sig: Signature) -> bool:
+    # A negative offset counts from the end, as in slicing.
+    return all(head.startswith(magic, offset) for offset, magic in sig.parts)
+
+def _is_text(head: bytes) -> bool:
+    if b"\x00" in head:
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The read may cut a multi-byte character in half.
+        return e.start >= len(head) - 3 and e.reason == "unexpected end of data"
+    return True
+
+def sniff(head: bytes):
+    """(label, extensions consistent with it or None) for the first bytes of a file."""
+    if not head:
+        return EMPTY, None
+    for sig in _BY_PREFIX.get(head[:2], ()):
+        if _matches(head, sig):
+            return sig.label, sig.extensions
+    for sig in _ANYWHERE:
+        if _matches(head, sig):
+            return sig.label, sig.extensions
+    return (TEXT if _is_text(head) else UNKNOWN), None
+
+def sniff_tail(tail: bytes):
+    """(label, extensions) for the last bytes of a file, or None when no TAIL_SIGNATURES entry matches."""
+    for sig in TAIL_SIGNATURES:
+        if len(tail) >= TAIL_BYTES and _matches(tail, sig):
+            return sig.label, sig.extensions
+    return None
+
+class ContentClassifier:
+    """
+    Classifies files by content with one bounded read each (two when the
+    start matches nothing), caching the label by (inode, mtime_ns). Safe to
+    share between scanner threads.
+    """
+
+    def __init__(self, sniff_bytes: int = SNIFF_BYTES, cache_limit: int = CACHE_LIMIT):
+        self.sniff_bytes = sniff_bytes
+        self.cache_limit = cache_limit
+        self._cache = {}          # (inode, mtime_ns) -> (label, extensions)
+        self._lock = threading.Lock()
+        self.files = self.cache_hits = self.bytes_read = self.errors = self.mismatches = 0
+        self.time_ns = 0
+
+    def classify(self, path: str, inode: int = 0, mtime_ns: int = 0, suffix: str = "") -> str:
+        """
+        Content label for path ("pdf", "ooxml", "text", ...). inode and
+        mtime_ns come from the directory listing; with inode 0 (unknown)
+        nothing is cached. Unreadable files are labelled "unknown".
+        """
+        start = time.perf_counter_ns()
+        key = (inode, mtime_ns) if inode else None
+        result = self._cache.get(key) if key is not None else None
+        hit = result is not None
+        read = 0
+        failed = False
+        if not hit:
+            try:
+                # O_NONBLOCK: the scanner also yields FIFOs, which would block a plain open.
+                fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_NONBLOCK", 0))
+                try:
+                    head = _pread(fd, self.sniff_bytes, 0)
+                    read = len(head)
+                    result = sniff(head)
+                    if result[0] == UNKNOWN:
+                        tail = head
+                        if read == self.sniff_bytes:
+                            tail = _pread(fd, TAIL_BYTES, max(0, os.fstat(fd).st_size - TAIL_BYTES))
+                            read += len(tail)
+                        result = sniff_tail(tail) or result
+                finally:
+                    os.close(fd)
+            except OSError:
+                result = (UNKNOWN, None)
+                failed = True
+        label, extensions = result
+        with self._lock:
+            if key is not None and not hit and not failed:
+                if len(self._cache) >= self.cache_limit:
+                    self._cache.clear()
+                self._cache[key] = result
+            self.files += 1
+            self.cache_hits += hit
+            self.bytes_read += read
+            self.errors += failed
+            self.mismatches += extensions is not None and suffix not in extensions
+            self.time_ns += time.perf_counter_ns() - start
+        return label
+
+    def stats(self, baseline: dict = None) -> dict:
+        """Classification counts and cost, optionally since an earlier stats() result."""
+        baseline = baseline or {}
+        with self._lock:
+            counts = {
+                "files": self.files,
+                "cache_hits": self.cache_hits,
+                "bytes_read": self.bytes_read,
+                "errors": self.errors,
+                "extension_mismatches": self.mismatches,
+                "time_s": self.time_ns / 1e9,
+            }
+        counts = {name: value - baseline.get(name, 0) for name, value in counts.items()}
+        counts["cache_hit_rate_pct"] = (counts["cache_hits"] / counts["files"]) * 100 if counts["files"] else 0
+        counts["ns_per_file"] = (counts["time_s"] * 1e9 / counts["files"]) if counts["files"] else 0
+        return counts
+
+# Global instance, so repeated runs in one process reuse the cache.
+content_classifier = ContentClassifier()
+
+if __name__ == "__main__":
+    # Classification cost per file: cold (pread), warm (cache), vs reading whole files.
+    import random
+    import shutil
+    import tempfile
+    samples = [b"%PDF-1.7\n" + os.urandom(4000), b"\x89PNG\r\n\x1a\n" + os.urandom(4000),
+               b"\xff\xd8\xff\xe0" + os.urandom(4000), b"PK\x03\x04" + bytes(26) + b"[Content_Types].xml" + os.urandom(4000),
+               b"hello world\n" * 300, b"\x7fELF" + os.urandom(4000), os.urandom(4000)]
+    suffixes = (".pdf", ".png", ".jpg", ".docx", ".txt", "", ".dat")
+    root = tempfile.mkdtemp(prefix="sniff-bench-")
+    try:
+        entries = []
+        for i in range(20_000):
+            kind = random.randrange(len(samples))
+            # A tenth of the files get a misleading extension.
+            suffix = suffixes[kind] if random.random() > 0.1 else random.choice(suffixes)
+            path = os.path.join(root, f"f{i}{suffix}")
+            with open(path, "wb") as f:
+                f.write(samples[kind])
+            st = os.stat(path)
+            entries.append((path, st.st_ino, st.st_mtime_ns, suffix))
+        classifier = ContentClassifier()
+        print(f"Content sniffing cost per file ({len(entries)} files of ~4 KiB, page cache warm)")
+        for label in ("cold", "warm"):
+            before = classifier.stats()
+            for path, inode, mtime_ns, suffix in entries:
+                classifier.classify(path, inode, mtime_ns, suffix)
+            stats = classifier.stats(before)
+            print(f"  {label:<11} {stats['ns_per_file']:9.1f} ns  {stats['bytes_read'] / len(entries):5.1f} B read  "
+                  f"hit rate {stats['cache_hit_rate_pct']:5.1f}%  mismatches {stats['extension_mismatches']}")
+        start = time.perf_counter_ns()
+        for path, *_ in entries:
+            with open(path, "rb") as f:
+                f.read()
+        print(f"  full read   {(time.perf_counter_ns() - start) / len(entries):9.1f} ns")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
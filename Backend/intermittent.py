@@ -0,0 +1,243 @@
+# Intermittent (partial) encryption format shared by encrypt.py and decrypt.py.
+#
+# Like LockBit/BlackCat "fast" modes, only some regions of a file are
+# encrypted: the header, one block every `step` bytes, or blocks spread over
+# a percentage of the file. The output keeps the original layout: regions
+# are overwritten in place with same-length ciphertext (positional writes),
+# everything else is left as plaintext, and a footer is appended:
+#
+#   output header | prefix | mode (1) | block_size (8) | step (8) | size (8)
+#   | nonce_prefix (7) | regions (4) | tags (16 each) | footer_len (4) | MAGIC
+#
+# The output header (output_header, layout "intermittent") names the
+# algorithm and gives the length of prefix, the session prefix (the wrapped
+# key for RSA). Regions follow from (block_size, step, size), are sealed with
+# the aead_stream nonce layout and authenticate the header and the pattern
+# fields as associated data.
+import os
+import secrets
+import struct
+import time
+from typing import NamedTuple, Optional
+try:
+    from .aead_stream import _segment_nonce, NONCE_PREFIX_LEN, TAG_LEN
+    from .byte_entropy import _pread
+    from .output_header import OutputHeader, make_header, parse_header, HEADER_LEN
+    from .safe_zone import open_no_follow
+except ImportError:
+    from aead_stream import _segment_nonce, NONCE_PREFIX_LEN, TAG_LEN
+    from byte_entropy import _pread
+    from output_header import OutputHeader, make_header, parse_header, HEADER_LEN
+    from safe_zone import open_no_follow
+
+INTERMITTENT_MAGIC = b"SINTRMT2"
+TRAILER_LEN = 4 + len(INTERMITTENT_MAGIC)
+INTERMITTENT_MODES = ("header", "skip_step", "percent")
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_STEP_BLOCKS = 10        # skip_step without a step: one block in ten
+DEFAULT_PERCENT = 10.0
+_PARAMS = struct.Struct(">BQQQ")
+
+def _pwrite(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        return os.pwrite(fd, data, offset)
+    # Windows has no os.pwrite; callers own the descriptor, so seeking is safe.
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, data)
+
+def _copy(fd_in: int, fd_out: int):
+    """
+    Copy all of fd_in into the empty fd_out in the kernel: copy_file_range
+    where available (a reflink clone on filesystems that support it), else
+    in chunks through Python.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(fd_in, fd_out, 1 << 30):
+                pass
+            return
+        except OSError:
+            # e.g. EXDEV on older kernels: start over the plain way.
+            os.lseek(fd_in, 0, os.SEEK_SET)
+            os.lseek(fd_out, 0, os.SEEK_SET)
+            os.ftruncate(fd_out, 0)
+    while True:
+        chunk = memoryview(os.read(fd_in, 1 << 20))
+        if not chunk:
+            return
+        while chunk:
+            chunk = chunk[os.write(fd_out, chunk):]
+
+def _create(dest) -> int:
+    """The output, opened without following a symlink planted at its name."""
+    return open_no_follow(dest, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0))
+
+def is_intermittent(tail: bytes) -> bool:
+    """True if tail (the last TRAILER_LEN bytes of a file) ends an intermittent footer."""
+    return tail[-len(INTERMITTENT_MAGIC):] == INTERMITTENT_MAGIC
+
+def read_output_header(fd: int) -> Optional[OutputHeader]:
+    """
+    Output header of an open file written by encrypt.py: from the footer
+    when it ends with an intermittent trailer, else from its first bytes.
+    The trailer is checked first because an intermittent output starts with
+    ciphertext, which may look like anything. None for other files; raises
+    ValueError for a damaged header or footer.
+    """
+    total = os.fstat(fd).st_size
+    if total >= TRAILER_LEN and is_intermittent(_pread(fd, TRAILER_LEN, total - TRAILER_LEN)):
+        return read_footer(fd)[0]
+    return parse_header(_pread(fd, HEADER_LEN, 0))
+
+def _regions(block_size: int, step: int, size: int):
+    """(offset, length) of every encrypted region; step 0 means the first block only."""
+    if step == 0 or size <= block_size:
+        return [(0, min(block_size, size))]
+    return [(offset, min(block_size, size - offset)) for offset in range(0, size, step)]
+
+class IntermittentPattern(NamedTuple):
+    """
+    Which parts of a file intermittent encryption covers.
+
+    "header" encrypts the first block_size bytes, "skip_step" block_size
+    bytes every step bytes (default DEFAULT_STEP_BLOCKS blocks), and
+    "percent" about `percent`% of the file in block_size blocks spread
+    evenly over it. Files no larger than one block are encrypted whole.
+    """
+    mode: str = "header"
+    block_size: int = DEFAULT_BLOCK_SIZE
+    step: Optional[int] = None
+    percent: float = DEFAULT_PERCENT
+
+    def validate(self):
+        if self.mode not in INTERMITTENT_MODES:
+            raise ValueError(f"Unknown intermittent mode '{self.mode}', expected one of: {', '.join(INTERMITTENT_MODES)}")
+        if self.block_size <= 0:
+            raise ValueError("block_size must be positive")
+        if self.mode == "skip_step" and self.step is not None and self.step < self.block_size:
+            raise ValueError("step must be at least block_size")
+        if self.mode == "percent" and not 0 < self.percent <= 100:
+            raise ValueError("percent must be in (0, 100]")
+        return self
+
+    def effective_step(self) -> int:
+        if self.mode == "header":
+            return 0
+        if self.mode == "skip_step":
+            return self.step or self.block_size * DEFAULT_STEP_BLOCKS
+        return max(self.block_size, int(self.block_size * 100 / self.percent))
+
+    def regions(self, size: int):
+        return _regions(self.block_size, self.effective_step(), size)
+
+def encrypt_intermittent(cipher, src, dest, pattern: IntermittentPattern, prefix: bytes = b"", phase_ns: dict = None, algorithm: str = "aes", rel_path: str = None):
+    """
+    Write dest as a copy of src with pattern's regions encrypted in place
+    and the footer appended. Only the regions are read and written from
+    Python (os.pread/os.pwrite); the rest is a kernel-side copy (_copy), which
+    an in-place strain would not need at all and which is timed as "copy".
+    algorithm and rel_path (default: src's name) go into the output header.
+    Returns (bytes read from src, bytes encrypted).
+    """
+    clock = time.perf_counter_ns
+    phase_ns = phase_ns if phase_ns is not None else {}
+    fd_in = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        fd_out = _create(dest)
+        try:
+            start = clock()
+            _copy(fd_in, fd_out)
+            phase_ns["copy"] = phase_ns.get("copy", 0) + clock() - start
+            size = os.fstat(fd_in).st_size
+            step = pattern.effective_step()
+            params = _PARAMS.pack(INTERMITTENT_MODES.index(pattern.mode), pattern.block_size, step, size)
+            header = make_header(algorithm, "intermittent", pattern.block_size, size,
+                                 rel_path if rel_path is not None else os.path.basename(src), prefix)
+            aad = header + params
+            nonce_prefix = secrets.token_bytes(NONCE_PREFIX_LEN)
+            regions = _regions(pattern.block_size, step, size)
+            tags = []
+            read = encrypt = write = 0
+            bytes_read = 0
+            for i, (offset, length) in enumerate(regions):
+                t0 = clock()
+                plaintext = _pread(fd_in, length, offset)
+                t1 = clock()
+                sealed = cipher.encrypt(_segment_nonce(nonce_prefix, i, i == len(regions) - 1), plaintext, aad)
+                t2 = clock()
+                _pwrite(fd_out, sealed[:-TAG_LEN], offset)
+                write += clock() - t2
+                encrypt += t2 - t1
+                read += t1 - t0
+                tags.append(sealed[-TAG_LEN:])
+                bytes_read += len(plaintext)
+            footer = header + prefix + params + nonce_prefix + len(regions).to_bytes(4, "big") + b"".join(tags)
+            t0 = clock()
+            _pwrite(fd_out, footer + len(footer).to_bytes(4, "big") + INTERMITTENT_MAGIC, size)
+            write += clock() - t0
+        finally:
+            os.close(fd_out)
+    finally:
+        os.close(fd_in)
+    for phase, ns in (("read", read), ("encrypt", encrypt), ("write", write)):
+        phase_ns[phase] = phase_ns.get(phase, 0) + ns
+    return bytes_read, sum(length for _, length in regions)
+
+def read_footer(fd: int):
+    """
+    Parse the footer of an open intermittent file. Returns (OutputHeader,
+    prefix, associated data, (block_size, step, size), nonce_prefix, tags);
+    raises ValueError on a malformed footer.
+    """
+    total = os.fstat(fd).st_size
+    trailer = _pread(fd, TRAILER_LEN, total - TRAILER_LEN) if total >= TRAILER_LEN else b""
+    if len(trailer) != TRAILER_LEN or not is_intermittent(trailer):
+        raise ValueError("Not an intermittent file")
+    footer_len = int.from_bytes(trailer[:4], "big")
+    if footer_len > total - TRAILER_LEN:
+        raise ValueError("Truncated intermittent footer")
+    footer = _pread(fd, footer_len, total - TRAILER_LEN - footer_len)
+    header = parse_header(footer)
+    if header is None or header.layout != "intermittent":
+        raise ValueError("Malformed intermittent footer")
+    pos = HEADER_LEN + header.prefix_len
+    prefix = footer[HEADER_LEN:pos]
+    params = footer[pos:pos + _PARAMS.size]
+    if len(params) != _PARAMS.size:
+        raise ValueError("Malformed intermittent footer")
+    _, block_size, step, size = _PARAMS.unpack(params)
+    pos += _PARAMS.size
+    nonce_prefix = footer[pos:pos + NONCE_PREFIX_LEN]
+    pos += NONCE_PREFIX_LEN
+    count = int.from_bytes(footer[pos:pos + 4], "big")
+    pos += 4
+    tags = [footer[pos + i * TAG_LEN:pos + (i + 1) * TAG_LEN] for i in range(count)]
+    if size + footer_len + TRAILER_LEN != total or pos + count * TAG_LEN != footer_len or block_size == 0 \
+            or count != len(_regions(block_size, step, size)):
+        raise ValueError("Malformed intermittent footer")
+    return header, prefix, footer[:HEADER_LEN] + params, (block_size, step, size), nonce_prefix, tags
+
+def decrypt_intermittent(cipher, src, dest) -> int:
+    """
+    Reverse encrypt_intermittent into dest: copy, cut the footer off and
+    decrypt the regions in place, one at a time. Raises ValueError on a
+    malformed file and cryptography's InvalidTag on tampering (dest is then
+    partly restored; callers remove it). Returns the restored size.
+    """
+    fd_in = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        _, _, aad, (block_size, step, size), nonce_prefix, tags = read_footer(fd_in)
+        regions = _regions(block_size, step, size)
+        fd_out = _create(dest)
+        try:
+            _copy(fd_in, fd_out)
+            os.ftruncate(fd_out, size)
+            for i, ((offset, length), tag) in enumerate(zip(regions, tags)):
+                ciphertext = _pread(fd_in, length, offset)
+                nonce = _segment_nonce(nonce_prefix, i, i == len(regions) - 1)
+                _pwrite(fd_out, cipher.decrypt(nonce, ciphertext + tag, aad), offset)
+        finally:
+            os.close(fd_out)
+    finally:
+        os.close(fd_in)
+    return size
@@ -0,0 +1,193 @@
+# Pre-generated key material for simulation runs.
+#
+# RSA keypairs take a noticeable time to generate, so instead of generating
+# them on the critical path of every run, a background worker keeps a small
+# pool of keys on disk inside the safe zone and runs take one in O(1).
+# Refills happen between runs: a run pauses the worker (pause/resume) so
+# key generation never competes with the measured encryption, and its
+# process pool never forks while a key is being generated.
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+try:
+    from .safe_zone import _verify_safety_path, SAFE_ZONE_NAME, SAFE_ZONE_PATH
+    from .scanner import generate_key, save_key, load_key, ENCRYPTED_DIRNAME, RSA_KEY_BITS
+except ImportError:
+    from safe_zone import _verify_safety_path, SAFE_ZONE_NAME, SAFE_ZONE_PATH
+    from scanner import generate_key, save_key, load_key, ENCRYPTED_DIRNAME, RSA_KEY_BITS
+
+POOL_DIRNAME = "keypool"        # under <safe zone>/encrypted/, which the scanner skips
+DEFAULT_POOL_SIZE = 4           # keys kept ready per kind
+KEY_SUFFIX = ".key"
+
+def _key_kind(algorithm: str) -> str:
+    """Pool bucket for an algorithm; AES and ChaCha20 share 32-byte keys."""
+    if algorithm.lower().startswith("rsa"):
+        return f"rsa{RSA_KEY_BITS}"
+    return "sym256"
+
+def _generator_algorithm(kind: str) -> str:
+    return "RSA" if kind.startswith("rsa") else "AES"
+
+class KeyMaterialPool:
+    """On-disk pool of ready-to-use keys, refilled by a background thread."""
+
+    def __init__(self, pool_dir=None, target_size: int = DEFAULT_POOL_SIZE):
+        self.pool_dir = Path(pool_dir) if pool_dir else SAFE_ZONE_PATH / ENCRYPTED_DIRNAME / POOL_DIRNAME
+        self.target_size = target_size
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pauses = 0          # pause() calls not yet resumed
+        self._generating = False  # the worker is generating a key
+        self._available = {}      # kind -> deque of key file paths
+        self._wanted = set()      # kinds the worker keeps topped up
+        self._wake = threading.Event()
+        self._worker = None
+
+    def _kind_dir(self, kind: str) -> Path:
+        kind_dir = self.pool_dir / kind
+        # CRITICAL SAFETY CHECK: key material never leaves the safe zone.
+        if not _verify_safety_path(kind_dir):
+            raise PermissionError(f"Operation denied: Key pool '{kind_dir}' is outside the '{SAFE_ZONE_NAME}' directory.")
+        return kind_dir
+
+    def _entries(self, kind: str) -> deque:
+        """Known key files for kind; the directory is listed once per process."""
+        if kind not in self._available:
+            kind_dir = self._kind_dir(kind)
+            kind_dir.mkdir(parents=True, exist_ok=True)
+            self._available[kind] = deque(
+                Path(entry.path) for entry in os.scandir(kind_dir)
+                if entry.is_file() and entry.name.endswith(KEY_SUFFIX)
+            )
+        return self._available[kind]
+
+    def size(self, algorithm: str) -> int:
+        with self._lock:
+            return len(self._entries(_key_kind(algorithm)))
+
+    def take(self, algorithm: str, refill: bool = True):
+        """
+        Pop a pre-generated key for algorithm, or return None when the pool is
+        empty. Unless refill is False the background worker then tops it up;
+        runs pass False and call start() once they are over.
+        """
+        kind = _key_kind(algorithm)
+        key = None
+        with self._lock:
+            entries = self._entries(kind)
+            while entries and key is None:
+                path = entries.popleft()
+                claimed = path.with_name(f"{path.name}.claimed-{os.getpid()}-{threading.get_ident()}")
+                try:
+                    # Atomic claim, so two processes sharing the pool never get the same key.
+                    os.replace(path, claimed)
+                except FileNotFoundError:
+                    continue
+                try:
+                    key = load_key(claimed)
+                finally:
+                    claimed.unlink(missing_ok=True)
+        if refill:
+            self.start(algorithm)
+        return key
+
+    def put(self, algorithm: str, key: bytes):
+        """Add a key to the pool (written to a temp name, then renamed in)."""
+        kind = _key_kind(algorithm)
+        kind_dir = self._kind_dir(kind)
+        kind_dir.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        tmp = kind_dir / (name + ".tmp")
+        save_key(key, tmp)
+        final = kind_dir / (name + KEY_SUFFIX)
+        os.replace(tmp, final)
+        with self._lock:
+            self._entries(kind).append(final)
+
+    def fill(self, algorithm: str, count: int = None):
+        """Synchronously top the pool for algorithm up to count (default target_size)."""
+        count = self.target_size if count is None else count
+        while self.size(algorithm) < count:
+            self.put(algorithm, generate_key(_generator_algorithm(_key_kind(algorithm))))
+
+    def start(self, *algorithms):
+        """Keep the pools for algorithms filled from a background daemon thread."""
+        with self._lock:
+            self._wanted.update(_key_kind(a) for a in algorithms)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="key-pool", daemon=True)
+                self._worker.start()
+        self._wake.set()
+
+    def pause(self):
+        """
+        Hold off background key generation until resume(). Waits for the key
+        in progress, if any, so no keygen runs once this returns.
+        """
+        with self._idle:
+            self._pauses += 1
+            while self._generating:
+                self._idle.wait()
+
+    def resume(self):
+        with self._idle:
+            self._pauses -= 1
+            self._idle.notify_all()
+
+    def _generate_one(self, kind: str) -> bool:
+        """Add one key to kind's pool unless it is full; waits while paused."""
+        with self._idle:
+            while self._pauses:
+                self._idle.wait()
+            if len(self._entries(kind)) >= self.target_size:
+                return False
+            self._generating = True
+        try:
+            algorithm = _generator_algorithm(kind)
+            self.put(algorithm, generate_key(algorithm))
+        finally:
+            with self._idle:
+                self._generating = False
+                self._idle.notify_all()
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            for kind in list(self._wanted):
+                try:
+                    while self._generate_one(kind):
+                        pass
+                except Exception as e:
+                    print(f"[Key pool] Failed to pre-generate {kind} keys: {e}")
+            self._wake.wait()
+
+# Global instance
+key_pool = KeyMaterialPool()
+
+if __name__ == "__main__":
+    # Cold vs warm start latency: generating a key vs taking one from the pool.
+    import shutil
+    import statistics
+    bench_dir = SAFE_ZONE_PATH / ENCRYPTED_DIRNAME / (POOL_DIRNAME + "-bench")
+    bench_pool = KeyMaterialPool(bench_dir, target_size=5)
+    print("Key setup latency (median of 5)")
+    try:
+        for algorithm in ("AES", "ChaCha20", "RSA"):
+            cold = []
+            for _ in range(5):
+                start = time.perf_counter()
+                generate_key(algorithm)
+                cold.append(time.perf_counter() - start)
+            bench_pool.fill(algorithm)
+            warm = []
+            for _ in range(5):
+                start = time.perf_counter()
+                bench_pool.take(algorithm, refill=False)
+                warm.append(time.perf_counter() - start)
+            print(f"  {algorithm:<9} cold {statistics.median(cold) * 1000:9.3f} ms   warm {statistics.median(warm) * 1000:9.3f} ms")
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
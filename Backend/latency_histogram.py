@@ -0,0 +1,100 @@
+# Compact log-bucketed (HDR-style) histogram for per-file latencies.
+#
+# Values are counted in logarithmic buckets with SUB_BUCKETS buckets per
+# doubling (~2% relative error), so memory is fixed by the value range, not
+# by how many files were recorded. Histograms with the same layout merge by
+# adding their bucket counts, which is how pool workers' results combine.
+import math
+import numpy as np
+
+SUB_BUCKETS = 32
+PERCENTILES = {"p50": 50.0, "p90": 90.0, "p99": 99.0, "p999": 99.9}
+
+class LatencyHistogram:
+    """Log-bucketed histogram of positive values between lowest and highest."""
+
+    def __init__(self, lowest: float = 1e3, highest: float = 1e13, sub_buckets: int = SUB_BUCKETS):
+        if not 0 < lowest < highest:
+            raise ValueError("Expected 0 < lowest < highest")
+        self.lowest = lowest
+        self.highest = highest
+        self.sub_buckets = sub_buckets
+        self.counts = np.zeros(int(math.ceil(math.log2(highest / lowest) * sub_buckets)) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return min(len(self.counts) - 1, int(math.log2(value / self.lowest) * self.sub_buckets))
+
+    def _bucket_upper(self, index: int) -> float:
+        return self.lowest * 2 ** ((index + 1) / self.sub_buckets)
+
+    def record(self, value: float):
+        value = float(value)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        if (other.lowest, other.highest, other.sub_buckets) != (self.lowest, self.highest, self.sub_buckets):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """Upper edge of the bucket holding the pct-th percentile (never above max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * pct / 100.0))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._bucket_upper(index), self.max)
+
+    def summary(self, scale: float = 1.0) -> dict:
+        """p50/p90/p99/p999, mean and max, each divided by scale (e.g. 1e6 for ns -> ms)."""
+        result = {name: self.percentile(pct) / scale for name, pct in PERCENTILES.items()}
+        result["mean"] = (self.total / self.count) / scale if self.count else 0.0
+        result["max"] = self.max / scale
+        result["count"] = self.count
+        return result
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form; only non-empty buckets are stored."""
+        nonzero = np.nonzero(self.counts)[0]
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "sub_buckets": self.sub_buckets,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "buckets": {str(int(i)): int(self.counts[i]) for i in nonzero},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        hist = cls(data["lowest"], data["highest"], data["sub_buckets"])
+        for index, count in data["buckets"].items():
+            hist.counts[int(index)] = count
+        hist.count = data["count"]
+        hist.total = data["total"]
+        hist.min = data["min"] if hist.count else math.inf
+        hist.max = data["max"]
+        return hist
+
+def file_latency_histogram() -> LatencyHistogram:
+    """Per-file wall time in nanoseconds, 1 us .. ~2.8 h."""
+    return LatencyHistogram(lowest=1e3, highest=1e13)
+
+def byte_cost_histogram() -> LatencyHistogram:
+    """Per-file cost in nanoseconds per byte, 0.001 .. 1e9 ns/B (tiny files cost a lot per byte)."""
+    return LatencyHistogram(lowest=1e-3, highest=1e9)
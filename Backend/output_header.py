@@ -0,0 +1,69 @@
+# Self-describing header of encrypted outputs, shared by encrypt.py,
+# decrypt.py and tooling that classifies files (indexers, the Sentinel).
+#
+#   MAGIC (4) | version (1) | algorithm (1) | layout (1) | reserved (1)
+#   | chunk_size (4) | original_size (8) | prefix_len (4) | path_hash (16) | crc32 (4)
+#
+# HEADER_LEN bytes, big-endian. One-shot and stream outputs start with it,
+# followed by the session prefix (prefix_len bytes: the wrapped session key
+# for RSA) and the payload (nonce | ciphertext, or an aead_stream stream).
+# Intermittent outputs keep the original layout, so the header opens their
+# footer instead (intermittent.read_output_header finds it in either place,
+# file_magic labels both kinds). chunk_size is the stream segment size or intermittent
+# block size (0 for one-shot); path_hash is the start of the SHA-256 of the
+# original path relative to the run root. The whole header is the AEAD
+# associated data, so altering it fails decryption; crc32 lets a classifier
+# tell a real header from a chance match of MAGIC without any key.
+import hashlib
+import struct
+import zlib
+from typing import NamedTuple, Optional
+
+HEADER_MAGIC = b"SENC"
+HEADER_VERSION = 1
+ALGORITHMS = ("aes", "chacha20", "rsa")              # stored as index + 1
+LAYOUTS = ("oneshot", "stream", "intermittent")
+PATH_HASH_LEN = 16
+_HEADER = struct.Struct(">4sBBBxIQI16s")
+HEADER_LEN = _HEADER.size + 4
+
+def path_hash(rel_path: str) -> bytes:
+    """Hash of an original path relative to the run root, "/"-separated."""
+    return hashlib.sha256(rel_path.encode("utf-8")).digest()[:PATH_HASH_LEN]
+
+class OutputHeader(NamedTuple):
+    algorithm: str           # a CIPHERS name: "aes", "chacha20" or "rsa"
+    layout: str              # one of LAYOUTS
+    chunk_size: int
+    original_size: int
+    prefix_len: int
+    path_hash: bytes
+    version: int = HEADER_VERSION
+
+    def pack(self) -> bytes:
+        body = _HEADER.pack(HEADER_MAGIC, self.version, ALGORITHMS.index(self.algorithm) + 1,
+                            LAYOUTS.index(self.layout), self.chunk_size, self.original_size,
+                            self.prefix_len, self.path_hash)
+        return body + zlib.crc32(body).to_bytes(4, "big")
+
+def make_header(algorithm: str, layout: str, chunk_size: int, original_size: int, rel_path: str, prefix: bytes = b"") -> bytes:
+    """Packed header for an output of rel_path with the given session prefix."""
+    return OutputHeader(algorithm, layout, chunk_size, original_size, len(prefix), path_hash(rel_path)).pack()
+
+def parse_header(head: bytes) -> Optional[OutputHeader]:
+    """
+    Header at the start of head (at least HEADER_LEN bytes), or None when
+    head does not start with one. Raises ValueError for a damaged header or
+    one from an unknown version.
+    """
+    if len(head) < HEADER_LEN or head[:len(HEADER_MAGIC)] != HEADER_MAGIC:
+        return None
+    body = head[:_HEADER.size]
+    if zlib.crc32(body) != int.from_bytes(head[_HEADER.size:HEADER_LEN], "big"):
+        raise ValueError("Output header checksum mismatch")
+    _, version, algorithm, layout, chunk_size, original_size, prefix_len, digest = _HEADER.unpack(body)
+    if version != HEADER_VERSION:
+        raise ValueError(f"Unsupported output header version {version}")
+    if not 1 <= algorithm <= len(ALGORITHMS) or layout >= len(LAYOUTS):
+        raise ValueError("Malformed output header")
+    return OutputHeader(ALGORITHMS[algorithm - 1], LAYOUTS[layout], chunk_size, original_size, prefix_len, digest, version)
@@ -0,0 +1,215 @@
+# Pack output for encrypt.py: encrypted copies appended to a few container
+# files instead of one .encrypted file each.
+#
+# Creating a file per input costs metadata operations (create, inode and
+# directory updates) that dominate once a corpus has many small files. A
+# pack is append-only and written by a single worker, so one open serves a
+# whole batch:
+#
+#   MAGIC | record | record | ... | index | index_offset (8) | count (4) | MAGIC
+#
+# Every record starts on a PACK_ALIGN boundary (the gap is left as a hole):
+#
+#   RECORD_MAGIC | name_len (4) | payload_len (8) | name | payload
+#
+# payload is exactly what the .encrypted file named `name` would hold. The
+# index (record_offset (8), payload_len (8), name_len (2), name per record)
+# is appended by the parent once the run is over; a pack without one (the
+# run was interrupted) is read by walking its records instead. Records hold
+# whole outputs, so packs take neither intermittent outputs (rewritten in
+# place) nor incremental runs (which check each encrypted copy's stat).
+import os
+import struct
+import threading
+from typing import BinaryIO
+try:
+    from .byte_entropy import _pread
+    from .safe_zone import open_no_follow
+except ImportError:
+    from byte_entropy import _pread
+    from safe_zone import open_no_follow
+
+PACK_MAGIC = b"SIMPACK1"
+PACK_SUFFIX = ".spk"
+PACK_ALIGN = 4096
+RECORD_MAGIC = b"SREC"
+_RECORD = struct.Struct(">4sIQ")
+_ENTRY = struct.Struct(">QQH")
+_TRAILER = struct.Struct(">QI8s")
+
+def _align(offset: int) -> int:
+    return -(-offset // PACK_ALIGN) * PACK_ALIGN
+
+def worker_pack_name(run_id: str) -> str:
+    """Pack of the calling worker (process and thread) for one run."""
+    return f"pack-{run_id}-{os.getpid()}-{threading.get_native_id()}{PACK_SUFFIX}"
+
+class PackWriter:
+    """
+    Appends records to one pack. There must be a single writer per pack at
+    a time, which per-worker packs (worker_pack_name) guarantee.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        fd = open_no_follow(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        self.fh = os.fdopen(fd, "r+b")
+        end = self.fh.seek(0, os.SEEK_END)
+        if end == 0:
+            self.fh.write(PACK_MAGIC)
+            end = len(PACK_MAGIC)
+        self._end = end
+        self._record = None
+
+    def begin(self, name: str) -> BinaryIO:
+        """Start the record for name; write its payload to the returned file, then commit() or abort()."""
+        offset = _align(self._end)
+        encoded = name.encode("utf-8")
+        # The record header goes in on commit, once the payload length is known.
+        self.fh.seek(offset + _RECORD.size + len(encoded))
+        self._record = (offset, encoded)
+        return self.fh
+
+    def commit(self):
+        """Finish the current record. Returns (record_offset, payload_len)."""
+        offset, encoded = self._record
+        payload_offset = offset + _RECORD.size + len(encoded)
+        length = self.fh.tell() - payload_offset
+        self.fh.seek(offset)
+        self.fh.write(_RECORD.pack(RECORD_MAGIC, len(encoded), length) + encoded)
+        self._end = payload_offset + length
+        self._record = None
+        return offset, length
+
+    def abort(self):
+        """Drop the current record; the next one reuses its space."""
+        self._record = None
+
+    def close(self):
+        # Cut off what an aborted last record left behind.
+        self.fh.truncate(self._end)
+        self.fh.close()
+
+def write_index(path, records):
+    """Append the trailing index of [name, record_offset, payload_len] records to a pack."""
+    body = []
+    for name, offset, length in records:
+        encoded = name.encode("utf-8")
+        body.append(_ENTRY.pack(offset, length, len(encoded)) + encoded)
+    with os.fdopen(open_no_follow(path, os.O_RDWR | getattr(os, "O_BINARY", 0)), "r+b") as fh:
+        index_offset = _align(fh.seek(0, os.SEEK_END))
+        fh.seek(index_offset)
+        fh.write(b"".join(body) + _TRAILER.pack(index_offset, len(records), PACK_MAGIC))
+
+def _walk_records(fd: int, size: int) -> dict:
+    index = {}
+    offset = _align(len(PACK_MAGIC))
+    while offset + _RECORD.size <= size:
+        magic, name_len, length = _RECORD.unpack(_pread(fd, _RECORD.size, offset))
+        payload_offset = offset + _RECORD.size + name_len
+        if magic != RECORD_MAGIC or payload_offset + length > size:
+            break
+        name = _pread(fd, name_len, offset + _RECORD.size).decode("utf-8")
+        index[name] = (payload_offset, length)
+        offset = _align(payload_offset + length)
+    return index
+
+def read_index(fd: int) -> dict:
+    """name -> (payload_offset, payload_len) of an open pack; raises ValueError if it is not one."""
+    size = os.fstat(fd).st_size
+    if _pread(fd, len(PACK_MAGIC), 0) != PACK_MAGIC:
+        raise ValueError("Not a pack")
+    trailer = _pread(fd, _TRAILER.size, size - _TRAILER.size) if size >= _TRAILER.size else b""
+    if len(trailer) != _TRAILER.size or trailer[-len(PACK_MAGIC):] != PACK_MAGIC:
+        return _walk_records(fd, size)
+    index_offset, count, _ = _TRAILER.unpack(trailer)
+    if index_offset > size - _TRAILER.size:
+        raise ValueError("Malformed pack index")
+    body = _pread(fd, size - _TRAILER.size - index_offset, index_offset)
+    index = {}
+    pos = 0
+    for _ in range(count):
+        if pos + _ENTRY.size > len(body):
+            raise ValueError("Malformed pack index")
+        offset, length, name_len = _ENTRY.unpack_from(body, pos)
+        pos += _ENTRY.size
+        name = body[pos:pos + name_len].decode("utf-8")
+        pos += name_len
+        index[name] = (offset + _RECORD.size + name_len, length)
+    return index
+
+class _RecordReader:
+    """Read-only file over one record's payload (positional reads, no shared offset)."""
+
+    def __init__(self, fd: int, offset: int, length: int):
+        self.fd, self.pos, self.end = fd, offset, offset + length
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.end - self.pos
+        data = _pread(self.fd, remaining if size < 0 else min(size, remaining), self.pos)
+        self.pos += len(data)
+        return data
+
+class PackReader:
+    """Random access to the records of a pack through its index."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.fd = os.open(self.path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            self.index = read_index(self.fd)
+        except Exception:
+            os.close(self.fd)
+            raise
+
+    def open(self, name: str) -> _RecordReader:
+        offset, length = self.index[name]
+        return _RecordReader(self.fd, offset, length)
+
+    def read(self, name: str) -> bytes:
+        return self.open(name).read()
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    # Benchmark: one file per output vs one pack, for many small outputs.
+    import sys
+    import shutil
+    import tempfile
+    import time
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    payload = os.urandom(1024)
+    tmp = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            with open(os.path.join(tmp, f"f{i}.encrypted"), "wb") as fh:
+                fh.write(payload)
+        files_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pack_path = os.path.join(tmp, "bench" + PACK_SUFFIX)
+        writer = PackWriter(pack_path)
+        records = []
+        for i in range(count):
+            writer.begin(f"f{i}.encrypted").write(payload)
+            records.append([f"f{i}.encrypted", *writer.commit()])
+        writer.close()
+        write_index(pack_path, records)
+        pack_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with PackReader(pack_path) as reader:
+            assert all(reader.read(f"f{i}.encrypted") == payload for i in range(0, count, 97))
+        index_s = time.perf_counter() - start
+        print(f"{count} x 1 KiB outputs: files {files_s:.3f}s, pack {pack_s:.3f}s ({files_s / pack_s:.1f}x), "
+              f"pack index load + {len(range(0, count, 97))} random reads {index_s * 1000:.1f}ms")
+    finally:
+        shutil.rmtree(tmp)
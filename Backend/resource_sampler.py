@@ -0,0 +1,140 @@
+# Background resource sampling for simulation runs.
+#
+# A daemon thread samples CPU, RSS, IO bytes and context switches of the
+# current process (plus pool worker children) at a fixed rate into a
+# fixed-size numpy ring buffer, instead of calling psutil once per file.
+# Peaks and means of CPU and RSS are kept as running totals, so they cover
+# the whole run even after the ring wraps; p95 covers the retained window.
+import os
+import threading
+import time
+import numpy as np
+import psutil
+
+FIELDS = ("time_s", "cpu_pct", "rss_bytes", "io_read_bytes", "io_write_bytes", "ctx_switches")
+DEFAULT_RATE_HZ = 10.0
+DEFAULT_CAPACITY = 3000   # 5 minutes at 10 Hz; older samples are overwritten
+_TOTALED = [1, 2]         # cpu_pct, rss_bytes: running peak and sum over every sample
+
+class ResourceSampler:
+    """Samples process resource usage into a ring buffer from a daemon thread."""
+
+    def __init__(self, rate_hz: float = DEFAULT_RATE_HZ, capacity: int = DEFAULT_CAPACITY, pid: int = None, include_children: bool = True):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.rate_hz = rate_hz
+        self.include_children = include_children
+        self._root = psutil.Process(pid or os.getpid())
+        self._procs = {}          # pid -> psutil.Process, kept so cpu_percent has a baseline
+        self._cumulative = {}     # pid -> last seen (io_read, io_write, ctx) so exited workers still count
+        self._buf = np.zeros((capacity, len(FIELDS)), dtype=np.float64)
+        self._count = 0
+        self._first = None        # first sample, kept even after the ring wraps
+        self._peak = np.zeros(len(_TOTALED))
+        self._sum = np.zeros(len(_TOTALED))
+        self._start = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+
+    def _run(self):
+        interval = 1.0 / self.rate_hz
+        while not self._stop.wait(interval):
+            self._sample()
+
+    def _processes(self):
+        procs = [self._root]
+        if self.include_children:
+            try:
+                procs.extend(self._root.children(recursive=True))
+            except psutil.Error:
+                pass
+        live = []
+        for proc in procs:
+            # Reuse Process objects: cpu_percent() measures since the previous call on the same object.
+            live.append(self._procs.setdefault(proc.pid, proc))
+        return live
+
+    def _sample(self):
+        cpu = rss = 0.0
+        for proc in self._processes():
+            try:
+                with proc.oneshot():
+                    cpu += proc.cpu_percent(interval=None)
+                    rss += proc.memory_info().rss
+                    ctx = proc.num_ctx_switches()
+                    try:
+                        io = proc.io_counters()
+                        io_read, io_write = io.read_bytes, io.write_bytes
+                    except (AttributeError, psutil.AccessDenied):
+                        # io_counters() is unavailable on macOS.
+                        io_read = io_write = 0
+                self._cumulative[proc.pid] = (io_read, io_write, ctx.voluntary + ctx.involuntary)
+            except psutil.Error:
+                self._procs.pop(proc.pid, None)
+        io_read, io_write, ctx = (sum(values) for values in zip(*self._cumulative.values())) if self._cumulative else (0, 0, 0)
+        row = (time.perf_counter() - self._start, cpu, rss, io_read, io_write, ctx)
+        if self._first is None:
+            self._first = np.array(row)
+        self._buf[self._count % len(self._buf)] = row
+        self._count += 1
+        totaled = np.take(row, _TOTALED)
+        np.maximum(self._peak, totaled, out=self._peak)
+        self._sum += totaled
+
+    def samples(self) -> np.ndarray:
+        """All retained samples in chronological order, one row per sample (columns = FIELDS)."""
+        if self._count <= len(self._buf):
+            return self._buf[:self._count].copy()
+        split = self._count % len(self._buf)
+        return np.concatenate((self._buf[split:], self._buf[:split]))
+
+    def timeseries(self) -> dict:
+        """Retained samples as {field: [values]}, for charts and JSON reports."""
+        samples = self.samples()
+        return {field: samples[:, i].tolist() for i, field in enumerate(FIELDS)}
+
+    def summary(self) -> dict:
+        """
+        Peak/mean CPU and RSS, IO bytes and context switches over the run;
+        p95 CPU and RSS over the retained window (window_samples).
+        """
+        samples = self.samples()
+        if not len(samples):
+            return {}
+        cpu, rss = samples[:, 1], samples[:, 2]
+        first, last = self._first, samples[-1]
+        peak, mean = self._peak, self._sum / self._count
+        return {
+            "samples": int(self._count),
+            "window_samples": len(samples),
+            "sample_rate_hz": self.rate_hz,
+            "cpu_peak_pct": float(peak[0]),
+            "cpu_mean_pct": float(mean[0]),
+            "cpu_p95_pct": float(np.percentile(cpu, 95)),
+            "rss_peak_bytes": float(peak[1]),
+            "rss_mean_bytes": float(mean[1]),
+            "rss_p95_bytes": float(np.percentile(rss, 95)),
+            "rss_baseline_bytes": float(first[2]),
+            "io_read_bytes": float(last[3] - first[3]),
+            "io_write_bytes": float(last[4] - first[4]),
+            "ctx_switches": float(last[5] - first[5]),
+        }
@@ -0,0 +1,162 @@
+# Append-only progress journal for resumable simulation runs.
+#
+# Saved as JOURNAL_NAME in the run's encrypted/ folder, one JSON value per
+# line: an object opening each segment (one simulate_encrypt_folder call), a
+# [rel_path, size, mtime_ns, output_name] array per encrypted file, and
+# periodic cumulative checkpoints of the segment's metrics. Lines are
+# buffered and fsync'ed in batches, so a crash loses at most the last batch;
+# a torn last line is ignored on load. A resumed run reuses the journaled
+# run's key, skips the files it finished (unless changed since) and reports
+# the totals of all segments stitched together under "whole_run".
+import os
+import json
+import time
+from collections import Counter
+try:
+    from .latency_histogram import LatencyHistogram
+except ImportError:
+    from latency_histogram import LatencyHistogram
+
+JOURNAL_NAME = "run_journal.jsonl"
+JOURNAL_VERSION = 1
+FSYNC_EVERY = 512          # file records per fsync
+FSYNC_INTERVAL_S = 1.0     # or at least this often while files complete
+
+class RunJournal:
+    """
+    Progress journal of one encrypted/ folder. With resume, the files of
+    earlier segments are loaded into a set for O(1) done() checks and their
+    last checkpoints are kept for stitching; otherwise the journal restarts.
+    """
+
+    def __init__(self, enc_dir, algorithm: str, resume: bool = False):
+        self.path = os.path.join(os.fspath(enc_dir), JOURNAL_NAME)
+        self.algorithm = algorithm
+        self.completed = set()     # (rel_path, size, mtime_ns) of journaled files
+        self.segments = []         # last checkpoint of every earlier segment
+        self.resumed = False
+        self._torn = False
+        if resume:
+            self._load()
+        self._fh = open(self.path, "a" if self.resumed else "w", encoding="utf-8")
+        if self.resumed and self._torn:
+            self._fh.write("\n")      # end the torn line so the next record parses
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._write({"type": "segment", "version": JOURNAL_VERSION, "algorithm": algorithm, "started": time.time()})
+        self._sync()
+
+    def _load(self):
+        try:
+            fh = open(self.path, encoding="utf-8")
+        except OSError:
+            return
+        completed, segments, checkpoint = set(), [], None
+        line = "\n"
+        with fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue       # torn write from a crash
+                if isinstance(record, list):
+                    completed.add((record[0], record[1], record[2]))
+                elif record.get("type") == "segment":
+                    if record.get("version") != JOURNAL_VERSION or record.get("algorithm") != self.algorithm:
+                        # Earlier outputs use another key or format: start over.
+                        print(f"[Journal] {self.path} is from another algorithm or version, not resuming.")
+                        return
+                    if checkpoint is not None:
+                        segments.append(checkpoint)
+                    checkpoint = None
+                elif record.get("type") == "checkpoint":
+                    checkpoint = record["metrics"]
+        if checkpoint is not None:
+            segments.append(checkpoint)
+        self._torn = not line.endswith("\n")
+        self.completed, self.segments, self.resumed = completed, segments, True
+
+    def done(self, rel_path: str, size: int, mtime_ns: int) -> bool:
+        """Whether an earlier segment encrypted this file, unchanged since."""
+        return (rel_path, size, mtime_ns) in self.completed
+
+    def _write(self, record):
+        self._fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def _sync(self):
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def record(self, files, checkpoint):
+        """
+        Append [rel_path, size, mtime_ns, output_name] records. When a batch
+        is due, checkpoint() (the segment's cumulative metrics so far) is
+        appended too and the journal is fsync'ed.
+        """
+        for item in files:
+            self._write(item)
+        self._pending += len(files)
+        if self._pending >= FSYNC_EVERY or (self._pending and time.monotonic() - self._last_sync >= FSYNC_INTERVAL_S):
+            self._write({"type": "checkpoint", "metrics": checkpoint()})
+            self._sync()
+
+    def close(self, checkpoint: dict):
+        """Final checkpoint of this segment, fsync'ed."""
+        self._write({"type": "checkpoint", "metrics": checkpoint})
+        self._sync()
+        self._fh.close()
+
+def segment_checkpoint(totals: dict, type_counts: Counter, entropy_increase_sum: float, elapsed: float) -> dict:
+    """Cumulative metrics of a segment that stitch_segments can add up."""
+    return {
+        "elapsed_time": elapsed,
+        "done": totals["done"],
+        "failed_files": totals["failed_files"],
+        "total_bytes_processed": totals["total_bytes_processed"],
+        "bytes_encrypted": totals["bytes_encrypted"],
+        "disk_bytes_read": totals["disk_bytes_read"],
+        "phase_ns": dict(totals["phase_ns"]),
+        "file_types": dict(type_counts),
+        "entropy_increase_sum": entropy_increase_sum,
+        "file_latency": totals["file_latency"].to_dict(),
+        "byte_cost": totals["byte_cost"].to_dict(),
+    }
+
+def stitch_segments(segments) -> dict:
+    """
+    Whole-run metrics from the checkpoints of every segment: counts, bytes
+    and phase times (phase_ns) are summed, latency histograms merged.
+    """
+    segments = list(segments)
+    done = sum(s["done"] for s in segments)
+    elapsed = sum(s["elapsed_time"] for s in segments)
+    file_bytes = sum(s["total_bytes_processed"] for s in segments)
+    phase_ns, types = Counter(), Counter()
+    for s in segments:
+        phase_ns.update(s["phase_ns"])
+        types.update(s["file_types"])
+    latency = byte_cost = None
+    for s in segments:
+        seg_latency, seg_cost = LatencyHistogram.from_dict(s["file_latency"]), LatencyHistogram.from_dict(s["byte_cost"])
+        if latency is None:
+            latency, byte_cost = seg_latency, seg_cost
+        else:
+            latency.merge(seg_latency)
+            byte_cost.merge(seg_cost)
+    return {
+        "segments": len(segments),
+        "elapsed_time": elapsed,
+        "encrypted_files": done,
+        "failed_files": sum(s["failed_files"] for s in segments),
+        "total_bytes_processed": file_bytes,
+        "bytes_encrypted": sum(s["bytes_encrypted"] for s in segments),
+        "encryption_speed_fps": done / elapsed if elapsed > 0 else 0,
+        "throughput_mbps": (file_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0,
+        "average_entropy_increase": sum(s["entropy_increase_sum"] for s in segments) / done if done else 0,
+        "file_type_distribution_pct": {ft: (count / done) * 100 for ft, count in types.items()} if done else {},
+        "phase_ns": dict(phase_ns),
+        "file_latency_ms": latency.summary(scale=1e6) if latency is not None else {},
+        "per_byte_cost_ns": byte_cost.summary() if byte_cost is not None else {},
+    }
@@ -8,6 +8,100 @@ from typing import Union
 SAFE_ZONE_NAME = "Ransomware_Test"
 SAFE_ZONE_PATH = Path(os.getcwd()) / SAFE_ZONE_NAME
 
+class SafeZoneVerifier:
+    """
+    Checks that paths stay inside the safe zone, resolving the zone only once.
+
+    verify() resolves the path itself (so "..", symlinks and relative paths
+    cannot escape) and compares it to the cached zone root as a string.
+    verify_trusted() and verify_entry() are for paths produced by a trusted
+    traversal (scanner.scan_entries from a verified root, which never follows
+    symlinked directories): they are lexical checks with no syscalls, except
+    that a symlinked DirEntry still gets the full check. verify_many()
+    batches full checks, resolving each parent directory once.
+
+    The zone is resolved on first use; call refresh() if it may have moved.
+    """
+
+    def __init__(self, zone_path: Union[str, Path] = None):
+        self.zone_path = Path(zone_path) if zone_path is not None else SAFE_ZONE_PATH
+        self._zone = None
+        self._prefix = None
+
+    @property
+    def zone(self) -> str:
+        """The resolved zone root (normcased), as a string."""
+        if self._zone is None:
+            self.refresh()
+        return self._zone
+
+    def refresh(self):
+        self._zone = os.path.normcase(str(self.zone_path.resolve()))
+        self._prefix = self._zone.rstrip(os.sep) + os.sep
+
+    def _contains(self, resolved: str) -> bool:
+        resolved = os.path.normcase(resolved)
+        zone = self.zone
+        return resolved == zone or resolved.startswith(self._prefix)
+
+    def verify(self, path: Union[str, Path]) -> bool:
+        """Full check: resolve path (following symlinks) and require it inside the zone."""
+        try:
+            return self._contains(str(Path(path).resolve()))
+        except Exception as e:
+            print(f"Error during path verification: {e}")
+            return False
+
+    def verify_trusted(self, path: Union[str, Path]) -> bool:
+        """
+        Lexical check for a path built by a trusted traversal of a verified
+        root: it must be absolute, already normalised (no "..", "." or
+        doubled separators) and under the zone. Anything else is rejected,
+        never resolved.
+        """
+        path = os.fspath(path)
+        if not os.path.isabs(path) or os.path.normpath(path) != path:
+            return False
+        return self._contains(path)
+
+    def verify_entry(self, entry: os.DirEntry) -> bool:
+        """verify_trusted for a DirEntry, with the full check when it is a symlink."""
+        try:
+            if entry.is_symlink():
+                return self.verify(entry.path)
+        except OSError:
+            return False
+        return self.verify_trusted(entry.path)
+
+    def verify_many(self, paths) -> list:
+        """
+        verify() for many paths. Each parent directory is resolved once and
+        a plain name is joined to it lexically, so only symlinked names and
+        "."/".." get a resolve of their own.
+        """
+        results = []
+        parents = {}
+        for path in paths:
+            try:
+                path = os.fspath(path)
+                if not os.path.isabs(path):
+                    # Not abspath(): normalising "link/.." lexically would skip the symlink.
+                    path = os.path.join(os.getcwd(), path)
+                parent, name = os.path.split(path)
+                if name in ("", ".", "..") or os.path.islink(path):
+                    results.append(self.verify(path))
+                    continue
+                if parent not in parents:
+                    parents[parent] = os.path.realpath(parent)
+                results.append(self._contains(os.path.join(parents[parent], name)))
+            except Exception as e:
+                print(f"Error during path verification: {e}")
+                results.append(False)
+        return results
+
+# Global instance
+safe_zone_verifier = SafeZoneVerifier()
+
 def _verify_safety_path(path: Union[str, Path]) -> bool:
     """
     Verifies that the given path is strictly within the SAFE_ZONE_PATH.
@@ -18,14 +112,22 @@ def _verify_safety_path(path: Union[str, Path]) -> bool:
     Returns:
         True if the path is within the safe zone, False otherwise.
     """
-    try:
-        # Resolve the path to an absolute path to prevent traversal attacks (e.g., ../)
-        resolved_path = Path(path).resolve()
-        # Check if the resolved path is a subpath of the safe zone
-        return SAFE_ZONE_PATH.resolve() in resolved_path.parents or resolved_path == SAFE_ZONE_PATH.resolve()
-    except Exception as e:
-        print(f"Error during path verification: {e}")
-        return False
+    # Resolves the path to prevent traversal attacks (e.g., ../ or symlinks);
+    # the safe zone itself is resolved once, by safe_zone_verifier.
+    return safe_zone_verifier.verify(path)
+
+def open_no_follow(path: Union[str, Path], flags: int = os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode: int = 0o644) -> int:
+    """
+    os.open for an output file that refuses a symlink at path (O_NOFOLLOW).
+
+    Outputs are placed by lexical checks (verify_trusted) in a verified
+    folder, so this is what stops a link planted at an output name from
+    redirecting the write outside the safe zone. Where O_NOFOLLOW does not
+    exist the link is checked for first.
+    """
+    if not hasattr(os, "O_NOFOLLOW") and os.path.islink(path):
+        raise PermissionError(f"Refusing to write through symlink: {path}")
+    return os.open(path, flags | getattr(os, "O_NOFOLLOW", 0), mode)
 
 def populate_safe_zone():
     """
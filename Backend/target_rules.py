@@ -0,0 +1,187 @@
+# Include/exclude rules for picking simulation targets during a scan.
+#
+# TargetRules is the user-facing description (globs, size and mtime windows,
+# depth limits). compile() turns it into a TargetMatcher bound to one scan
+# root: every glob list becomes a single regular expression, and checks that
+# no rule asks for are skipped, so an entry costs a few dict/regex lookups.
+import os
+import re
+import time
+import fnmatch
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+def _timestamp_ns(value) -> Optional[int]:
+    """Epoch seconds, a datetime or an ISO date string -> epoch nanoseconds."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        value = value.timestamp()
+    return int(value * 1e9)
+
+def _glob_regex(glob: str, on_path: bool) -> str:
+    """
+    Regex source for one glob. Globs with a "/" match the path relative to
+    the scan root (a leading "/" is optional); the others match the name,
+    which on a relative path means "the last component".
+    """
+    if "/" in glob:
+        return fnmatch.translate(glob.lstrip("/"))
+    if on_path:
+        return "(?:.*/)?" + fnmatch.translate(glob)
+    return fnmatch.translate(glob)
+
+def _compile_globs(include=(), exclude=()):
+    """
+    Compile include/exclude globs into ONE case-insensitive regex that
+    matches when no exclude and (if any are given) some include matches.
+    Returns (regex or None, True if it must be matched against the
+    relative path rather than the name).
+    """
+    if not include and not exclude:
+        return None, False
+    on_path = any("/" in g for g in (*include, *exclude))
+    source = ""
+    if exclude:
+        source += "(?!" + "|".join(_glob_regex(g, on_path) for g in exclude) + ")"
+    if include:
+        source += "(?:" + "|".join(_glob_regex(g, on_path) for g in include) + ")"
+    return re.compile(source, re.IGNORECASE), on_path
+
+class TargetRules(NamedTuple):
+    """
+    Which files a scan targets, on top of the allowed_ext filter.
+
+    include/exclude are globs for files ("*.docx", "backup_*",
+    "Projects/*/src/*"), exclude_dirs globs for directories that are not
+    entered at all ("Windows", ".git", "Archives/old"). Sizes are in bytes;
+    modified_after/before take epoch seconds, datetimes or ISO dates.
+    max_depth limits how many directory levels below the root are entered
+    (0 = root only); depth_limits does the same below directories matching
+    a glob, e.g. (("Archives", 1),).
+    """
+    include: Tuple[str, ...] = ()
+    exclude: Tuple[str, ...] = ()
+    exclude_dirs: Tuple[str, ...] = ()
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    modified_after: object = None
+    modified_before: object = None
+    max_depth: Optional[int] = None
+    depth_limits: Tuple[Tuple[str, int], ...] = ()
+
+    def compile(self, root) -> "TargetMatcher":
+        return TargetMatcher(self, root)
+
+    def to_dict(self) -> dict:
+        """The rules as JSON-safe values (for metrics and saved reports): datetimes become ISO strings."""
+        rules = self._asdict()
+        for key in ("modified_after", "modified_before"):
+            if isinstance(rules[key], datetime):
+                rules[key] = rules[key].isoformat()
+        return rules
+
+class TargetMatcher:
+    """TargetRules compiled for one (resolved) scan root; used by scanner._list_dir."""
+
+    def __init__(self, rules: TargetRules, root):
+        self._root_len = len(os.fspath(root).rstrip(os.sep)) + 1
+        self._files_re, self._files_on_path = _compile_globs(rules.include, rules.exclude)
+        self._dirs_re, self._dirs_on_path = _compile_globs(include=rules.exclude_dirs)
+        # Matched against path prefixes, so name globs match their last component.
+        self._depth_limits = [(re.compile(_glob_regex(glob, on_path=True), re.IGNORECASE), limit)
+                              for glob, limit in rules.depth_limits]
+        self._max_depth = rules.max_depth
+        self.min_size = rules.min_size
+        self.max_size = rules.max_size
+        self.mtime_after_ns = _timestamp_ns(rules.modified_after)
+        self.mtime_before_ns = _timestamp_ns(rules.modified_before)
+        # Unused checks are skipped entirely by the scanner.
+        self.checks_name = self._files_re is not None
+        self.checks_stat = any(v is not None for v in (self.min_size, self.max_size, self.mtime_after_ns, self.mtime_before_ns))
+        self.checks_dirs = self._dirs_re is not None or self._max_depth is not None or bool(self._depth_limits)
+
+    def _rel(self, path: str) -> str:
+        rel = path[self._root_len:]
+        return rel if os.sep == "/" else rel.replace(os.sep, "/")
+
+    def match_name(self, path: str, name: str) -> bool:
+        """Glob rules for a file (before it is stat'ed)."""
+        return self._files_re.match(self._rel(path) if self._files_on_path else name) is not None
+
+    def match_stat(self, size: int, mtime_ns: int) -> bool:
+        """Size and mtime windows for a file."""
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.mtime_after_ns is not None and mtime_ns < self.mtime_after_ns:
+            return False
+        if self.mtime_before_ns is not None and mtime_ns >= self.mtime_before_ns:
+            return False
+        return True
+
+    def admit_dir(self, path: str, name: str) -> bool:
+        """Whether the scan should enter the subdirectory at path."""
+        rel = self._rel(path)
+        if self._dirs_re is not None and self._dirs_re.match(rel if self._dirs_on_path else name):
+            return False
+        if self._max_depth is None and not self._depth_limits:
+            return True
+        parts = rel.split("/")
+        depth = len(parts)
+        if self._max_depth is not None and depth > self._max_depth:
+            return False
+        for limit_re, limit in self._depth_limits:
+            # A matching ancestor more than `limit` levels above this directory.
+            for level in range(1, depth - limit):
+                if limit_re.match("/".join(parts[:level])):
+                    return False
+        return True
+
+    def match(self, path: str, name: str, size: int, mtime_ns: int) -> bool:
+        """Every file rule at once (for callers without a scanner in between)."""
+        return (not self.checks_name or self.match_name(path, name)) and \
+            (not self.checks_stat or self.match_stat(size, mtime_ns))
+
+if __name__ == "__main__":
+    # Matcher cost per entry on synthetic paths.
+    import random
+    root = os.path.join(os.sep, "zone")
+    names = [f"file{i}{random.choice(('.txt', '.pdf', '.docx', '.png', '.jpg', '.log', '.iso'))}" for i in range(200_000)]
+    entries = [(os.path.join(root, f"d{i % 50}", f"s{i % 7}", n), n, random.randint(0, 10**9), random.randint(1.5e18, 1.7e18))
+               for i, n in enumerate(names)]
+    dirs = [(os.path.join(root, f"d{i % 50}", f"s{i % 7}", f"x{i}"), f"x{i}") for i in range(50_000)]
+    now = time.time()
+    cases = {
+        "name globs": TargetRules(include=("*.docx", "*.pdf", "report*"), exclude=("*.tmp", "~*")),
+        "path globs": TargetRules(include=("d1*/*/*", "*/s3/*.txt")),
+        "size + mtime": TargetRules(max_size=100 * 1024 * 1024, modified_after=now - 30 * 86400),
+        "everything": TargetRules(include=("*.docx", "*.pdf", "d1*/*/*"), exclude=("*.tmp",), min_size=1,
+                                  max_size=100 * 1024 * 1024, modified_after=now - 30 * 86400),
+    }
+    print("Matcher cost per entry (best of 3)")
+    allowed_ext = {".txt", ".pdf", ".docx", ".png", ".jpg"}
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter_ns()
+        for path, name, size, mtime in entries:
+            os.path.splitext(name)[1].lower() in allowed_ext
+        best = min(best, time.perf_counter_ns() - start)
+    print(f"  files, {'allowed_ext only':<14} {best / len(entries):8.1f} ns  (baseline)")
+    for label, rules in cases.items():
+        matcher = rules.compile(root)
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter_ns()
+            for path, name, size, mtime in entries:
+                matcher.match(path, name, size, mtime)
+            best = min(best, time.perf_counter_ns() - start)
+        print(f"  files, {label:<14} {best / len(entries):8.1f} ns")
+    matcher = TargetRules(exclude_dirs=("Windows", ".git", "d3/*"), max_depth=4, depth_limits=(("d1*", 2),)).compile(root)
+    start = time.perf_counter_ns()
+    for path, name in dirs:
+        matcher.admit_dir(path, name)
+    print(f"  dirs,  excludes + depth  {(time.perf_counter_ns() - start) / len(dirs):8.1f} ns")
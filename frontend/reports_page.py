@@ -183,11 +183,14 @@ class ReportCard(ctk.CTkFrame):
             metrics_text_content = ""
             for key, value in sim_data.items():
                 formatted_key = key.replace('_', ' ').title()
-                if key != "file_type_distribution_pct":
+                if key not in ("file_type_distribution_pct", "phase_breakdown", "resource_timeseries", "latency_histograms", "bytes_encrypted_curve"):
                     if isinstance(value, dict):
                         metrics_text_content += f"{formatted_key}:\n"
                         for sub_key, sub_value in value.items():
-                            metrics_text_content += f"  - {sub_key}: {sub_value:.2f}%\n"
+                            if isinstance(sub_value, float):
+                                metrics_text_content += f"  - {sub_key}: {sub_value:.2f}\n"
+                            else:
+                                metrics_text_content += f"  - {sub_key}: {sub_value}\n"
                     elif isinstance(value, float):
                         metrics_text_content += f"{formatted_key}: {value:.2f}\n"
                     else:
@@ -198,6 +201,21 @@ class ReportCard(ctk.CTkFrame):
             metrics_textbox.insert("0.0", metrics_text_content)
             metrics_textbox.configure(state="disabled")
 
+            # Phase Breakdown
+            phases = sim_data.get("phase_breakdown")
+            if phases and isinstance(phases, dict):
+                phases_title_label = ctk.CTkLabel(main_frame, text="Phase Breakdown", font=SUBTITLE_FONT, text_color=COLOR_TEXT)
+                phases_title_label.pack(anchor="w", pady=(10, 5))
+
+                phases_text_content = ""
+                for phase, timing in sorted(phases.items(), key=lambda item: item[1].get("seconds", 0), reverse=True):
+                    phases_text_content += f"{phase.replace('_', ' ').title()}: {timing.get('seconds', 0):.3f}s ({timing.get('pct', 0):.1f}%)\n"
+
+                phases_textbox = ctk.CTkTextbox(main_frame, wrap="word", font=FONT, text_color=COLOR_TEXT, fg_color=COLOR_CARD, height=180, border_spacing=5)
+                phases_textbox.pack(fill="x", expand=False, pady=(0, 10))
+                phases_textbox.insert("0.0", phases_text_content)
+                phases_textbox.configure(state="disabled")
+
             # File Type Distribution Chart
             dist = sim_data.get("file_type_distribution_pct")
             if dist and isinstance(dist, dict) and sum(dist.values()) > 0:
@@ -296,13 +314,22 @@ class ReportCard(ctk.CTkFrame):
             
             for key, value in sim_data.items():
                 formatted_key = key.replace('_', ' ').title()
-                if key != "file_type_distribution_pct":
+                if key not in ("file_type_distribution_pct", "phase_breakdown", "resource_timeseries", "latency_histograms", "bytes_encrypted_curve"):
                     if isinstance(value, float):
                         pdf.cell(0, 6, f"- {formatted_key}: {value:.2f}", 0, 1)
                     else:
                         pdf.cell(0, 6, f"- {formatted_key}: {value}", 0, 1)
             pdf.ln(5)
 
+            phases = sim_data.get("phase_breakdown")
+            if phases and isinstance(phases, dict):
+                pdf.set_font("Helvetica", "B", 12)
+                pdf.cell(0, 8, "Phase Breakdown", 0, 1)
+                pdf.set_font("Helvetica", "", 10)
+                for phase, timing in sorted(phases.items(), key=lambda item: item[1].get("seconds", 0), reverse=True):
+                    pdf.cell(0, 6, f"- {phase.replace('_', ' ').title()}: {timing.get('seconds', 0):.3f}s ({timing.get('pct', 0):.1f}%)", 0, 1)
+                pdf.ln(5)
+
             # Chart
             dist = sim_data.get("file_type_distribution_pct")
             if dist and isinstance(dist, dict) and sum(dist.values()) > 0:
@@ -7,6 +7,8 @@ from datetime import datetime
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from Backend.intermittent import read_output_header
+from Backend.output_header import path_hash
 
 # Define common fonts and colors to match existing pages
 FONT = ("Roboto", 12)
@@ -61,6 +63,7 @@ class CanaryFileSystemEventHandler(FileSystemEventHandler):
             
             # Access the live canary list from the monitoring panel
             canaries_list = self.sentinel_page.canary_monitor.canaries
+            header_hash = self._output_path_hash(file_path)
             
             # Check each deployed canary
             for canary_entry in canaries_list:
@@ -80,8 +83,9 @@ class CanaryFileSystemEventHandler(FileSystemEventHandler):
                 
                 print(f"[Sentinel] Checking: file={file_name} vs expected={expected_enc_name}")
                 
-                # Check if created file matches the encrypted canary name
-                if file_name == expected_enc_name:
+                # Check if created file matches the encrypted canary name, or its
+                # output header names the canary (e.g. the output was renamed)
+                if file_name == expected_enc_name or self._header_names_canary(header_hash, file_path, canary_path, canary_name):
                     # Verify it's in or near the canary's deployment location
                     if self._is_in_encrypted_folder(file_path, canary_path):
                         print(f"[Sentinel] MATCH FOUND: Canary '{canary_name}' triggered!")
@@ -94,6 +98,28 @@ class CanaryFileSystemEventHandler(FileSystemEventHandler):
         except Exception as e:
             print(f"[Sentinel] Error in _check_trigger: {e}")
     
+    def _output_path_hash(self, file_path):
+        """Original-path hash from the simulator's output header, or None if the file has none (yet)."""
+        if file_path.parent.name != "encrypted":
+            return None
+        try:
+            # Intermittent outputs keep the original layout and carry the header in their footer.
+            with open(file_path, "rb") as fh:
+                header = read_output_header(fh.fileno())
+        except (OSError, ValueError):
+            return None
+        return header.path_hash if header is not None else None
+
+    def _header_names_canary(self, header_hash, file_path, canary_path, canary_name):
+        """Check if the header hash is that of the canary's path relative to the run root (the parent of encrypted/)."""
+        if header_hash is None:
+            return False
+        try:
+            rel_path = (Path(canary_path) / canary_name).resolve().relative_to(file_path.parent.parent)
+        except ValueError:
+            return False
+        return header_hash == path_hash(rel_path.as_posix())
+
     def _is_in_encrypted_folder(self, file_path, canary_base_path):
         """Check if file_path is within an 'encrypted' subfolder of canary_base_path."""
         try:
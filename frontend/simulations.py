@@ -9,6 +9,7 @@ import time
 import AI.shared_data as shared_data
 import re
 from Backend.safe_zone import populate_safe_zone, SAFE_ZONE_PATH
+from Backend.scanner import ALLOWED_EXT
 
 
 # Constants
@@ -349,7 +350,7 @@ class SimulationSettings(ctk.CTkFrame):
             algorithm = alg_raw
 
 
-        allowed_ext = None if all_files else None  # keep None here so encrypt.py default is used                                           # but when calling in-process we can pass None to mean all
+        allowed_ext = None if all_files else ALLOWED_EXT
         # Try to run in-process (preferred) so we can receive structured progress callbacks
         
         try:
@@ -359,9 +360,9 @@ class SimulationSettings(ctk.CTkFrame):
 
             last_data = {'files': 0, 'time': 0}
 
-            def progress_callback(done, total, elapsed):
+            def progress_callback(done, discovered, elapsed, scan_complete):
                 nonlocal last_data
-                last_data['files'] = total
+                last_data['files'] = discovered
                 last_data['time'] = elapsed
                 # Update Dashboard cards safely on the UI thread
                 root = self.winfo_toplevel()
@@ -374,8 +375,8 @@ class SimulationSettings(ctk.CTkFrame):
                     def ui_update():
                         # Files Encrypted
                         dashboard.card_files_encrypted.set_value(str(done))
-                        # Files Found (total)
-                        dashboard.card_files_found.set_value(str(total))
+                        # Files Found (discovered so far until the scan completes)
+                        dashboard.card_files_found.set_value(str(discovered) if scan_complete else f"{discovered}+")
                         # Time elapsed
                         mins, secs = divmod(int(elapsed), 60)
                         dashboard.card_time_elapsed.set_value(f"{mins:02d}:{secs:02d}")
@@ -384,7 +385,7 @@ class SimulationSettings(ctk.CTkFrame):
                     dashboard.after(0, ui_update)
 
             # Call the simulation (this will print to stdout as well)
-            simulation_metrics = simulate_encrypt_folder(folder, test_mode=True, algorithm=algorithm, stop_event=stop_event, progress_callback=progress_callback, allowed_ext=(None if all_files else None), drop_ransom_note=drop_ransom_note, ransom_note_content=ransom_note_content)
+            simulation_metrics = simulate_encrypt_folder(folder, test_mode=True, algorithm=algorithm, stop_event=stop_event, progress_callback=progress_callback, allowed_ext=allowed_ext, drop_ransom_note=drop_ransom_note, ransom_note_content=ransom_note_content, pipeline=True)
             # print("[UI] simulate_encrypt_folder returned (in-process).")
             # Store simulation data
             if simulation_metrics:
@@ -405,7 +406,7 @@ class SimulationSettings(ctk.CTkFrame):
 
         try:
             # Use unbuffered Python so printed lines are available immediately
-            command = [sys.executable, "-u", backend_script_path, folder, f"--algorithm={algorithm}"]
+            command = [sys.executable, "-u", backend_script_path, folder, f"--algorithm={algorithm}", "--pipeline"]
             if all_files:
                 command.append("--all-files")
 
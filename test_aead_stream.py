@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Chunked streaming AEAD: round trips at segment boundaries, and every kind
+of damage (tampering, reordering, truncation) is rejected.
+"""
+
+import io
+import os
+import sys
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend.aead_stream import encrypt_stream, decrypt_stream, STREAM_HEADER_LEN, TAG_LEN
+
+SEGMENT = 1000
+
+
+def _seal(cipher, data, **kwargs):
+    out = io.BytesIO()
+    assert encrypt_stream(cipher, io.BytesIO(data), out, SEGMENT, **kwargs) == len(data)
+    return out.getvalue()
+
+
+def _open(cipher, sealed, **kwargs):
+    out = io.BytesIO()
+    assert decrypt_stream(cipher, io.BytesIO(sealed), out, **kwargs) == len(out.getvalue())
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("make", [AESGCM, ChaCha20Poly1305])
+@pytest.mark.parametrize("size", [0, 1, SEGMENT - 1, SEGMENT, SEGMENT + 1, 3 * SEGMENT])
+def test_round_trip(make, size):
+    cipher = make(make.generate_key() if make is ChaCha20Poly1305 else make.generate_key(bit_length=256))
+    data = os.urandom(size)
+    writes = []
+    sealed = _seal(cipher, data, on_segment=lambda pt, ct: writes.append((len(pt), len(ct))),
+                   associated_data=b"header")
+    segments = max(1, -(-size // SEGMENT))
+    assert len(sealed) == STREAM_HEADER_LEN + size + segments * TAG_LEN
+    assert writes[0] == (0, STREAM_HEADER_LEN) and len(writes) == segments + 1
+    assert _open(cipher, sealed, associated_data=b"header") == data
+    with pytest.raises(InvalidTag):
+        _open(cipher, sealed, associated_data=b"other header")
+
+
+def test_damage_is_rejected():
+    cipher = AESGCM(AESGCM.generate_key(bit_length=256))
+    sealed = _seal(cipher, os.urandom(3 * SEGMENT + 10))
+    record = SEGMENT + TAG_LEN
+    segments = [sealed[STREAM_HEADER_LEN + i:STREAM_HEADER_LEN + i + record] for i in range(0, len(sealed) - STREAM_HEADER_LEN, record)]
+    header = sealed[:STREAM_HEADER_LEN]
+
+    flipped = bytearray(sealed)
+    flipped[STREAM_HEADER_LEN + record + 5] ^= 1
+    damaged = {
+        "tampered": bytes(flipped),
+        "reordered": header + segments[1] + segments[0] + b"".join(segments[2:]),
+        "tail dropped": header + b"".join(segments[:-1]),       # ends on a segment boundary
+        "segment dropped": header + segments[0] + b"".join(segments[2:]),
+    }
+    for data in damaged.values():
+        with pytest.raises(InvalidTag):
+            _open(cipher, data)
+    with pytest.raises(ValueError):
+        _open(cipher, header + segments[0] + segments[1][:TAG_LEN - 1])  # cut inside a tag
+    with pytest.raises(ValueError):
+        _open(cipher, sealed[:STREAM_HEADER_LEN - 1])
+    with pytest.raises(ValueError):
+        _open(cipher, b"XXXX" + sealed[4:])
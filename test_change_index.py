@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Change index: an encrypted copy is current only while the source listing,
+the copy itself, the output settings and the key are all unchanged.
+"""
+
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import change_index, encrypt, scanner
+from Backend.change_index import ChangeIndex
+from Backend.safe_zone import SafeZoneVerifier
+
+SETTINGS = {"cipher": "aes", "segment_size": None, "rsa_key_wrap": None, "intermittent": None}
+
+
+def test_current_until_anything_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(change_index, "RACY_MTIME_NS", 0)
+    dest = tmp_path / "a.txt.encrypted"
+    dest.write_bytes(b"x" * 40)
+    st = dest.stat()
+    index = ChangeIndex(tmp_path, SETTINGS)
+    index.bind(b"k1")
+    index.update([["a.txt", 10, 1, 7, dest.name, st.st_size, st.st_mtime_ns]])
+    index.save()
+
+    index = ChangeIndex(tmp_path, SETTINGS)
+    assert index.usable_with(b"k1") and not index.usable_with(b"k2")
+    index.bind(b"k1")
+    assert index.current("a.txt", 10, 1, 7)
+    assert index.stats()["skipped_bytes"] == 10
+    assert not index.current("a.txt", 11, 1, 7)        # source changed
+    assert not index.current("a.txt", 10, 1, 8)        # replaced by another file
+
+    dest.write_bytes(b"y" * 41)                        # encrypted copy changed
+    assert not index.current("a.txt", 10, 1, 7)
+
+    other = ChangeIndex(tmp_path, {**SETTINGS, "cipher": "chacha20"})
+    assert other.invalidated == "settings" and not other.usable_with(b"k1")
+    rekeyed = ChangeIndex(tmp_path, SETTINGS)
+    rekeyed.bind(b"k2")
+    assert rekeyed.invalidated == "key" and not rekeyed.current("a.txt", 10, 1, 7)
+
+
+def test_in_place_rewrite_with_scan_index(tmp_path, monkeypatch):
+    """The scan index reports stale stats for a file rewritten in place; incremental runs must not trust them."""
+    zone = tmp_path / "Ransomware_Test"
+    (zone / "d").mkdir(parents=True)
+    verifier = SafeZoneVerifier(zone)
+    monkeypatch.setattr(scanner, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "_verify_safety_path", verifier.verify)
+    old = time.time_ns() - 10**11                      # clear of the racy-mtime window
+    for name in ("a.txt", "b.txt"):
+        (zone / "d" / name).write_text(name * 100)
+    for path in (zone / "d" / "a.txt", zone / "d" / "b.txt", zone / "d", zone):
+        os.utime(path, ns=(old, old))
+    run = dict(executor="serial", use_key_pool=False, use_index=True, incremental=True)
+    encrypt.simulate_encrypt_folder(str(zone), **run)
+
+    with open(zone / "d" / "a.txt", "r+") as fh:
+        fh.write("rewritten")
+    metrics = encrypt.simulate_encrypt_folder(str(zone), **run)
+    assert metrics["scan_index"]["hits"] == 1          # d/ came from the index
+    assert metrics["incremental"]["skipped_files"] == 1
+    assert metrics["encrypted_files"] == 1
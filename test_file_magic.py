@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Content sniffing: signature table lookups, the tail read for formats marked
+at the end, and the (inode, mtime) cache.
+"""
+
+import os
+import sys
+import zipfile
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend.file_magic import ContentClassifier, sniff, SNIFF_BYTES, TAIL_BYTES
+from Backend.intermittent import IntermittentPattern, encrypt_intermittent
+
+
+def test_sniff_signatures():
+    assert sniff(b"%PDF-1.7\n")[0] == "pdf"
+    assert sniff(b"PK\x03\x04" + bytes(26) + b"[Content_Types].xml")[0] == "ooxml"
+    assert sniff(b"PK\x03\x04" + bytes(40))[0] == "zip"
+    assert sniff(b"PK\x03\x04" + bytes(26) + b"mimetypeapplication/epub+zip")[0] == "epub"
+    assert sniff(b"\x00\x00\x00\x18ftypmp42")[0] == "mp4"
+    assert sniff(b"caf\xc3\xa9 ol\xc3")[0] == "text"   # multi-byte character cut by the read
+    assert sniff(b"\x00\x01\x02\x03")[0] == "unknown"
+    assert sniff(b"")[0] == "empty"
+
+
+def test_classifier_reads_once_and_flags_renamed_files(tmp_path):
+    path = tmp_path / "invoice.txt"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + os.urandom(10000))
+    st = path.stat()
+    classifier = ContentClassifier()
+    for _ in range(3):
+        assert classifier.classify(str(path), st.st_ino, st.st_mtime_ns, ".txt") == "png"
+    stats = classifier.stats()
+    assert stats["files"] == 3 and stats["cache_hits"] == 2
+    assert stats["bytes_read"] == SNIFF_BYTES
+    assert stats["extension_mismatches"] == 3
+
+
+def test_classifier_tells_zip_based_documents_apart(tmp_path):
+    """ODF and EPUB store their mimetype first, uncompressed; it must fit in the bounded read."""
+    classifier = ContentClassifier()
+    for name, mimetype, label in (("a.odt", "application/vnd.oasis.opendocument.text", "odf"),
+                                  ("b.ods", "application/vnd.oasis.opendocument.spreadsheet", "odf"),
+                                  ("c.epub", "application/epub+zip", "epub"),
+                                  ("d.zip", None, "zip")):
+        path = tmp_path / name
+        with zipfile.ZipFile(path, "w") as archive:
+            if mimetype:
+                archive.writestr("mimetype", mimetype, compress_type=zipfile.ZIP_STORED)
+            archive.writestr("content.xml", "<office:document/>", compress_type=zipfile.ZIP_DEFLATED)
+        assert classifier.classify(str(path), suffix=path.suffix) == label
+    assert classifier.stats()["extension_mismatches"] == 0
+
+
+def test_classifier_finds_intermittent_outputs_by_their_tail(tmp_path):
+    """Intermittent outputs start with ciphertext and keep their header in the footer."""
+    cipher = AESGCM(AESGCM.generate_key(bit_length=256))
+    classifier = ContentClassifier()
+    for size in (0, 100, 50_000):
+        src, enc = tmp_path / f"{size}.txt", tmp_path / f"{size}.txt.encrypted"
+        src.write_bytes(b"plain text\n" * (size // 11))
+        encrypt_intermittent(cipher, src, enc, IntermittentPattern("skip_step", block_size=1024, step=8192))
+        assert classifier.classify(str(enc), suffix=".encrypted") == "sim_intermittent"
+        assert classifier.classify(str(src), suffix=".txt") == ("empty" if size < 11 else "text")
+    assert classifier.stats()["extension_mismatches"] == 0
+
+    unknown = tmp_path / "noise.bin"
+    unknown.write_bytes(os.urandom(1000))
+    before = classifier.stats()
+    assert classifier.classify(str(unknown)) == "unknown"
+    assert classifier.stats(before)["bytes_read"] == SNIFF_BYTES + TAIL_BYTES
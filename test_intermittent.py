@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Intermittent encryption: every pattern round-trips through decrypt, only
+the pattern's regions change, tampering is detected, and the output header
+is found in the footer.
+"""
+
+import os
+import sys
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend.intermittent import IntermittentPattern, encrypt_intermittent, decrypt_intermittent, read_output_header, TRAILER_LEN
+from Backend.output_header import make_header, path_hash
+
+
+@pytest.mark.parametrize("pattern", [
+    IntermittentPattern("header", block_size=4096),
+    IntermittentPattern("skip_step", block_size=4096, step=16384),
+    IntermittentPattern("percent", block_size=1000, percent=30),
+])
+@pytest.mark.parametrize("size", [0, 100, 4096, 100_000])
+def test_round_trip(tmp_path, pattern, size):
+    src, enc, out = tmp_path / "src.bin", tmp_path / "src.enc", tmp_path / "src.out"
+    data = os.urandom(size)
+    src.write_bytes(data)
+    cipher = AESGCM(AESGCM.generate_key(bit_length=256))
+    bytes_read, bytes_encrypted = encrypt_intermittent(cipher, src, enc, pattern, prefix=b"wrapped")
+    regions = pattern.regions(size)
+    assert bytes_read == bytes_encrypted == sum(length for _, length in regions)
+    sealed = enc.read_bytes()
+    # Same layout as the original: plaintext outside the regions, footer appended.
+    covered = set()
+    for offset, length in regions:
+        covered.update(range(offset, offset + length))
+    assert all(sealed[i] == data[i] for i in range(size) if i not in covered)
+    assert len(sealed) > size + TRAILER_LEN
+    assert decrypt_intermittent(cipher, enc, out) == size
+    assert out.read_bytes() == data
+
+
+def test_tampering_is_detected(tmp_path):
+    src, enc, out = tmp_path / "src.bin", tmp_path / "src.enc", tmp_path / "src.out"
+    src.write_bytes(os.urandom(50_000))
+    cipher = AESGCM(AESGCM.generate_key(bit_length=256))
+    encrypt_intermittent(cipher, src, enc, IntermittentPattern("skip_step", block_size=1000, step=10_000))
+    sealed = bytearray(enc.read_bytes())
+    sealed[20_500] ^= 1
+    enc.write_bytes(bytes(sealed))
+    with pytest.raises(InvalidTag):
+        decrypt_intermittent(cipher, enc, out)
+    with pytest.raises(ValueError):
+        decrypt_intermittent(cipher, src, out)
+
+
+@pytest.mark.parametrize("size", [0, 50_000])
+def test_output_header_from_the_footer(tmp_path, size):
+    src, enc = tmp_path / "src.bin", tmp_path / "src.enc"
+    src.write_bytes(os.urandom(size))
+    cipher = AESGCM(AESGCM.generate_key(bit_length=256))
+    encrypt_intermittent(cipher, src, enc, IntermittentPattern("header", block_size=4096), prefix=b"wrapped", rel_path="a/src.bin")
+    with open(enc, "rb") as fh:
+        header = read_output_header(fh.fileno())
+    assert (header.layout, header.original_size, header.prefix_len) == ("intermittent", size, 7)
+    assert header.path_hash == path_hash("a/src.bin")
+
+    # Other outputs carry it at the start; anything else has none.
+    oneshot = tmp_path / "oneshot.enc"
+    oneshot.write_bytes(make_header("chacha20", "oneshot", 0, size, "a/src.bin") + os.urandom(size))
+    with open(oneshot, "rb") as fh:
+        assert read_output_header(fh.fileno()).layout == "oneshot"
+    with open(src, "rb") as fh:
+        assert read_output_header(fh.fileno()) is None
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Key material pool: a key is handed out once even when pools in several
+processes share the directory, and refills wait while a run holds the pool
+paused.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import key_pool
+from Backend.key_pool import KeyMaterialPool
+from Backend.safe_zone import SafeZoneVerifier
+
+
+@pytest.fixture
+def pool_dir(tmp_path, monkeypatch):
+    zone = tmp_path / "Ransomware_Test"
+    zone.mkdir()
+    monkeypatch.setattr(key_pool, "_verify_safety_path", SafeZoneVerifier(zone).verify)
+    return zone / "encrypted" / "keypool"
+
+
+def test_claims_are_exclusive(pool_dir):
+    filler = KeyMaterialPool(pool_dir, target_size=40)
+    filler.fill("AES")
+    # Separate instances list the directory on their own, like other processes would.
+    pools = [KeyMaterialPool(pool_dir) for _ in range(4)]
+    for pool in pools:
+        assert pool.size("ChaCha20") == 40          # AES and ChaCha20 share a bucket
+    with ThreadPoolExecutor(8) as executor:
+        keys = list(executor.map(lambda i: pools[i % 4].take("AES", refill=False), range(60)))
+    taken = [key for key in keys if key is not None]
+    assert len(taken) == len(set(taken)) == 40
+    assert not list(pool_dir.glob("*/*"))
+
+
+def test_refill_waits_while_paused(pool_dir):
+    pool = KeyMaterialPool(pool_dir, target_size=2)
+    pool.pause()
+    try:
+        pool.start("AES")
+        time.sleep(0.2)
+        assert pool.size("AES") == 0
+    finally:
+        pool.resume()
+    deadline = time.monotonic() + 10
+    while pool.size("AES") < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.size("AES") == 2
+    pool.pause()                                    # returns once the worker is idle
+    assert not pool._generating
+    pool.resume()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Latency histogram: percentiles within one bucket of the exact value, and
+worker histograms merge (directly or through to_dict) into the same result.
+"""
+
+import math
+import os
+import random
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend.latency_histogram import LatencyHistogram, file_latency_histogram, PERCENTILES, SUB_BUCKETS
+
+BUCKET_ERROR = 2 ** (1 / SUB_BUCKETS)
+
+
+def test_percentiles_within_a_bucket():
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(14, 2) for _ in range(20000))   # ns, ~1 ms median
+    hist = file_latency_histogram()
+    for value in values:
+        hist.record(value)
+    summary = hist.summary(scale=1e6)
+    for name, pct in PERCENTILES.items():
+        exact = values[max(1, math.ceil(len(values) * pct / 100)) - 1]
+        assert exact <= summary[name] * 1e6 <= exact * BUCKET_ERROR * (1 + 1e-9)
+    assert summary["max"] == values[-1] / 1e6
+    assert summary["mean"] == pytest.approx(sum(values) / len(values) / 1e6)
+    assert summary["count"] == len(values)
+
+
+def test_merge_matches_a_single_histogram():
+    values = [random.uniform(1e3, 1e9) for _ in range(5000)]
+    single, workers = file_latency_histogram(), [file_latency_histogram() for _ in range(4)]
+    for i, value in enumerate(values):
+        single.record(value)
+        workers[i % 4].record(value)
+    merged = file_latency_histogram()
+    for worker in workers:
+        # Pool results travel as dicts.
+        merged.merge(LatencyHistogram.from_dict(worker.to_dict()))
+    assert merged.summary() == pytest.approx(single.summary())
+    assert (merged.min, merged.max) == (single.min, single.max)
+    with pytest.raises(ValueError):
+        merged.merge(LatencyHistogram(1e-3, 1e9))
+
+
+def test_empty_and_out_of_range():
+    hist = file_latency_histogram()
+    assert hist.summary() == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "p999": 0.0, "mean": 0.0, "max": 0.0, "count": 0}
+    assert LatencyHistogram.from_dict(hist.to_dict()).summary() == hist.summary()
+    hist.record(1)            # below lowest: first bucket
+    hist.record(1e15)         # above highest: last bucket
+    assert hist.counts[0] == hist.counts[-1] == 1
+    # Percentiles stop at the range; max keeps the real value.
+    assert hist.highest <= hist.percentile(100) < hist.max == 1e15
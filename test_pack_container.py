@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Pack container: aligned records, random access through the trailing index,
+reading a pack whose run was interrupted before the index went in, and a
+serial run that opens the pack once per batch and decrypts back.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import decrypt, encrypt, scanner
+from Backend.pack_container import PackReader, PackWriter, write_index, PACK_ALIGN, PACK_SUFFIX
+from Backend.safe_zone import SafeZoneVerifier
+
+
+def _write(path, payloads, abort=()):
+    writer = PackWriter(path)
+    records = []
+    for name, payload in payloads.items():
+        out = writer.begin(name)
+        out.write(payload)
+        if name in abort:
+            writer.abort()
+            continue
+        offset, length = writer.commit()
+        assert offset % PACK_ALIGN == 0 and length == len(payload)
+        records.append([name, offset, length])
+    writer.close()
+    return records
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_random_access(tmp_path, indexed):
+    path = tmp_path / "p.spk"
+    payloads = {"a.txt.encrypted": b"a" * 5000, "empty.encrypted": b"", "failed.encrypted": b"f" * 9000,
+                "b.pdf.encrypted": os.urandom(100)}
+    records = _write(path, payloads, abort=("failed.encrypted",))
+    # A second batch of the same worker appends to the same pack.
+    records += _write(path, {"c.encrypted": b"c" * 10})
+    if indexed:
+        write_index(path, records)
+    with PackReader(path) as reader:
+        assert set(reader.index) == {"a.txt.encrypted", "empty.encrypted", "b.pdf.encrypted", "c.encrypted"}
+        assert reader.read("b.pdf.encrypted") == payloads["b.pdf.encrypted"]
+        assert reader.read("c.encrypted") == b"c" * 10
+        stream = reader.open("a.txt.encrypted")
+        assert stream.read(4096) + stream.read(4096) + stream.read() == payloads["a.txt.encrypted"]
+        assert reader.read("empty.encrypted") == b""
+
+
+def test_not_a_pack(tmp_path):
+    path = tmp_path / "x.spk"
+    path.write_bytes(b"nonce" * 10)
+    with pytest.raises(ValueError):
+        PackReader(path)
+
+
+def test_serial_run_keeps_the_pack_open_per_batch(tmp_path, monkeypatch):
+    zone = tmp_path / "Ransomware_Test"
+    originals = {}
+    for d in range(2):
+        (zone / f"d{d}").mkdir(parents=True)
+        for f in range(20):
+            originals[f"d{d}__f{f}.dat"] = os.urandom(100 * f)
+            (zone / f"d{d}" / f"f{f}.dat").write_bytes(originals[f"d{d}__f{f}.dat"])
+    verifier = SafeZoneVerifier(zone)
+    for module in (scanner, encrypt, decrypt):
+        monkeypatch.setattr(module, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "_verify_safety_path", verifier.verify)
+    monkeypatch.setattr(decrypt, "_verify_safety_path", verifier.verify)
+    opened = []
+    monkeypatch.setattr(encrypt, "PackWriter", lambda path: opened.append(path) or PackWriter(path))
+
+    metrics = encrypt.simulate_encrypt_folder(str(zone), executor="serial", use_key_pool=False, pack=True)
+    assert metrics["encrypted_files"] == 40
+    assert len(opened) == -(-40 // encrypt._batch_size_for(40, 1)) and len(set(opened)) == 1
+    assert [p.name for p in (zone / "encrypted").iterdir() if p.suffix == PACK_SUFFIX] == [opened[0].name]
+    decrypt.batch_decrypt(str(zone / "encrypted"))
+    restored = {p.name[:-len(".restored")]: p.read_bytes() for p in (zone / "decrypted").iterdir()}
+    assert restored == originals
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Resource sampler: peaks and means cover every sample of the run, even
+once the ring buffer has overwritten the early ones.
+"""
+
+import contextlib
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend.resource_sampler import ResourceSampler, FIELDS
+
+
+class FakeProcess:
+    """Stands in for psutil.Process, reporting the next of the given (cpu, rss) readings."""
+
+    pid = 1
+
+    def __init__(self, readings):
+        self.readings = iter(readings)
+        self.ctx = 0
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def cpu_percent(self, interval=None):
+        self.cpu, self.rss = next(self.readings)
+        return self.cpu
+
+    def memory_info(self):
+        return SimpleNamespace(rss=self.rss)
+
+    def num_ctx_switches(self):
+        self.ctx += 1
+        return SimpleNamespace(voluntary=self.ctx, involuntary=0)
+
+    def io_counters(self):
+        return SimpleNamespace(read_bytes=100 * self.ctx, write_bytes=10 * self.ctx)
+
+
+def test_early_spike_survives_the_ring_wrapping():
+    # An RSS and CPU spike in the second sample, then 20 quiet samples.
+    readings = [(10.0, 1000.0), (400.0, 9000.0)] + [(50.0, 2000.0)] * 20
+    sampler = ResourceSampler(capacity=5)
+    process = FakeProcess(readings)
+    sampler._processes = lambda: [process]
+    sampler._start = time.perf_counter()
+    for _ in readings:
+        sampler._sample()
+
+    assert sampler.samples().shape == (5, len(FIELDS))
+    summary = sampler.summary()
+    assert summary["samples"] == 22 and summary["window_samples"] == 5
+    assert summary["rss_peak_bytes"] == 9000.0 and summary["cpu_peak_pct"] == 400.0
+    assert summary["rss_mean_bytes"] == pytest.approx(sum(r for _, r in readings) / len(readings))
+    assert summary["cpu_mean_pct"] == pytest.approx(sum(c for c, _ in readings) / len(readings))
+    # p95 is over the retained window, which no longer holds the spike.
+    assert summary["rss_p95_bytes"] == 2000.0 and summary["cpu_p95_pct"] == 50.0
+    assert summary["rss_baseline_bytes"] == 1000.0
+    assert (summary["io_read_bytes"], summary["ctx_switches"]) == (2100.0, 21.0)
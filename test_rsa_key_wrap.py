@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+RSA key wrapping: runs that wrap a session key per file, once per run or
+once per directory all decrypt back; outputs share a wrapped key exactly
+as their mode says; RSA setup time is reported apart from the AEAD time.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import decrypt, encrypt, scanner
+from Backend.output_header import parse_header, HEADER_LEN
+from Backend.safe_zone import SafeZoneVerifier
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return scanner.generate_key("RSA")
+
+
+@pytest.fixture
+def zone(tmp_path, monkeypatch, rsa_key):
+    zone = tmp_path / "Ransomware_Test"
+    for d in range(2):
+        (zone / f"d{d}").mkdir(parents=True)
+        for f in range(6):
+            (zone / f"d{d}" / f"f{f}.txt").write_bytes(os.urandom(500 * f))
+    verifier = SafeZoneVerifier(zone)
+    for module in (scanner, encrypt, decrypt):
+        monkeypatch.setattr(module, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "_verify_safety_path", verifier.verify)
+    monkeypatch.setattr(decrypt, "_verify_safety_path", verifier.verify)
+    # One keypair for every run: generating RSA keys dominates the runtime.
+    monkeypatch.setattr(encrypt, "generate_key", lambda algorithm="AES": rsa_key if algorithm.lower().startswith("rsa") else scanner.generate_key(algorithm))
+    return zone
+
+
+def _wrapped_keys(enc_dir):
+    """Output name -> the session prefix (wrapped key) after its header."""
+    prefixes = {}
+    for path in enc_dir.glob("*.encrypted"):
+        data = path.read_bytes()
+        prefixes[path.name] = data[HEADER_LEN:HEADER_LEN + parse_header(data).prefix_len]
+    return prefixes
+
+
+@pytest.mark.parametrize("mode", encrypt.RSA_KEY_WRAP_MODES)
+def test_round_trip_and_shared_keys(zone, mode):
+    originals = {f"{p.parent.name}__{p.name}": p.read_bytes() for p in zone.rglob("*.txt")}
+    metrics = encrypt.simulate_encrypt_folder(str(zone), algorithm="RSA", rsa_key_wrap=mode,
+                                              executor="serial", use_key_pool=False)
+    assert metrics["encrypted_files"] == 12 and metrics["rsa_key_wrap"] == mode
+    assert metrics["asymmetric_crypto_time_s"] > 0 and metrics["symmetric_crypto_time_s"] > 0
+
+    prefixes = _wrapped_keys(zone / "encrypted")
+    assert len(prefixes) == 12 and all(prefixes.values())
+    by_dir = {d: {prefix for name, prefix in prefixes.items() if name.startswith(d + "__")} for d in ("d0", "d1")}
+    if mode == "file":
+        assert len(set(prefixes.values())) == 12
+    elif mode == "run":
+        assert len(set(prefixes.values())) == 1
+    else:
+        assert [len(keys) for keys in by_dir.values()] == [1, 1] and by_dir["d0"] != by_dir["d1"]
+
+    decrypt.batch_decrypt(str(zone / "encrypted"))
+    restored = {p.name[:-len(".txt.restored")] + ".txt": p.read_bytes() for p in (zone / "decrypted").iterdir()}
+    assert restored == originals
+
+
+def test_symmetric_runs_have_no_asymmetric_time(zone):
+    metrics = encrypt.simulate_encrypt_folder(str(zone), algorithm="AES", executor="serial", use_key_pool=False)
+    assert metrics["asymmetric_crypto_time_s"] == 0 and metrics["symmetric_crypto_time_s"] > 0
+    assert metrics["rsa_key_wrap"] is None
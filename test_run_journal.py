@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Run journal: resuming after a crash (torn last line) and stitching segments.
+"""
+
+import os
+import sys
+from collections import Counter
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend.encrypt import _new_partial_metrics
+from Backend.run_journal import RunJournal, segment_checkpoint, stitch_segments
+
+
+def _checkpoint(done, elapsed):
+    totals = _new_partial_metrics()
+    totals["done"] = done
+    totals["total_bytes_processed"] = done * 100
+    for _ in range(done):
+        totals["file_latency"].record(1e6)
+    return segment_checkpoint(totals, Counter({".txt": done}), 0.5 * done, elapsed)
+
+
+def test_resume_after_crash(tmp_path):
+    journal = RunJournal(tmp_path, "aes")
+    journal.record([["a.txt", 10, 1, "a.txt.encrypted"], ["b.txt", 20, 2, "b.txt.encrypted"]], lambda: _checkpoint(2, 1.0))
+    journal.close(_checkpoint(2, 1.0))
+    with open(journal.path, "a") as fh:
+        fh.write('["c.txt", 30, 3, "c.tx')       # torn write from a crash
+
+    resumed = RunJournal(tmp_path, "aes", resume=True)
+    assert resumed.resumed and len(resumed.segments) == 1
+    assert resumed.done("a.txt", 10, 1) and resumed.done("b.txt", 20, 2)
+    assert not resumed.done("a.txt", 10, 5)        # modified since: encrypt again
+    assert not resumed.done("c.txt", 30, 3)
+    resumed.close(_checkpoint(3, 2.0))
+
+    whole = stitch_segments(RunJournal(tmp_path, "aes", resume=True).segments)
+    assert whole["segments"] == 2 and whole["encrypted_files"] == 5
+    assert whole["elapsed_time"] == 3.0 and whole["file_latency_ms"]["count"] == 5
+    assert whole["average_entropy_increase"] == 0.5
+
+    # Another algorithm cannot reuse the key: the journal starts over.
+    assert not RunJournal(tmp_path, "chacha20", resume=True).resumed
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Adversarial paths for the safe-zone checks: every verifier entry point must
+reject anything that escapes the zone, however it is spelled.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import scanner
+from Backend.encrypt import CIPHERS, _create_output, _encrypt_file_streaming
+from Backend.intermittent import IntermittentPattern, encrypt_intermittent
+from Backend.pack_container import PackWriter, write_index
+from Backend.safe_zone import SafeZoneVerifier
+
+
+@pytest.fixture
+def zone(tmp_path):
+    """A safe zone with a sibling that shares its name as a prefix, plus symlink traps."""
+    zone = tmp_path / "Ransomware_Test"
+    (zone / "docs" / "deep").mkdir(parents=True)
+    (zone / "docs" / "a.txt").write_text("inside")
+    (zone / "docs" / "deep" / "b.txt").write_text("inside")
+    outside = tmp_path / "Ransomware_Test_evil"
+    outside.mkdir()
+    (outside / "secret.txt").write_text("outside")
+    (tmp_path / "secret.txt").write_text("outside")
+    os.symlink(outside, zone / "link_out_dir")
+    os.symlink(outside / "secret.txt", zone / "docs" / "link_out.txt")
+    os.symlink(zone / "docs" / "a.txt", zone / "docs" / "link_in.txt")
+    os.symlink(zone / "docs" / "deep", zone / "link_in_dir")
+    return zone
+
+
+@pytest.fixture
+def verifier(zone):
+    return SafeZoneVerifier(zone)
+
+
+def inside_paths(zone):
+    return [
+        zone,
+        zone / "docs",
+        zone / "docs" / "a.txt",
+        zone / "docs" / "missing.txt",
+        zone / "docs" / ".." / "docs" / "a.txt",
+        zone / "docs" / "deep" / ".." / "a.txt",
+        str(zone) + "//docs///a.txt",
+        str(zone) + "/docs/./a.txt",
+        str(zone) + "/docs/",
+        zone / "docs" / "link_in.txt",
+        zone / "link_in_dir" / "b.txt",
+    ]
+
+
+def outside_paths(zone):
+    base = zone.parent
+    return [
+        base,
+        base / "secret.txt",
+        base / "Ransomware_Test_evil",
+        base / "Ransomware_Test_evil" / "secret.txt",
+        str(zone) + "_evil/secret.txt",
+        zone / "..",
+        zone / ".." / "secret.txt",
+        zone / "docs" / ".." / ".." / "secret.txt",
+        zone / "docs" / "deep" / ".." / ".." / ".." / "secret.txt",
+        zone / "link_out_dir",
+        zone / "link_out_dir" / "secret.txt",
+        zone / "docs" / "link_out.txt",
+        # "link/.." follows the link first, so this lands outside the zone.
+        zone / "link_out_dir" / ".." / "secret.txt",
+        "/",
+        "/etc/passwd",
+        str(zone) + "\0/docs/a.txt",
+    ]
+
+
+def test_verify_accepts_inside(zone, verifier):
+    for path in inside_paths(zone):
+        assert verifier.verify(path), path
+
+
+def test_verify_rejects_outside(zone, verifier):
+    for path in outside_paths(zone):
+        assert not verifier.verify(path), path
+
+
+def test_verify_relative_paths(zone, verifier, monkeypatch):
+    monkeypatch.chdir(zone / "docs")
+    assert verifier.verify("a.txt")
+    assert verifier.verify("deep/b.txt")
+    assert not verifier.verify("../../secret.txt")
+    assert not verifier.verify("link_out.txt")
+    assert verifier.verify_many(["a.txt", "../../secret.txt", "link_out.txt", "../link_out_dir/../docs"]) == [True, False, False, False]
+
+
+def test_verify_many_matches_verify(zone, verifier):
+    paths = inside_paths(zone) + outside_paths(zone)
+    assert verifier.verify_many(paths) == [verifier.verify(p) for p in paths]
+
+
+def test_verify_trusted_is_lexical_and_strict(zone, verifier):
+    assert verifier.verify_trusted(str(zone / "docs" / "a.txt"))
+    assert verifier.verify_trusted(zone)
+    for path in (
+        "docs/a.txt",                                  # relative
+        str(zone) + "/docs/../../secret.txt",          # not normalised
+        str(zone) + "/docs/./a.txt",
+        str(zone) + "//docs/a.txt",
+        str(zone) + "_evil/secret.txt",                # shared name prefix
+        str(zone.parent / "secret.txt"),
+    ):
+        assert not verifier.verify_trusted(path), path
+
+
+def test_verify_entry_checks_symlinks(zone, verifier):
+    entries = {e.name: e for e in os.scandir(zone / "docs")}
+    assert verifier.verify_entry(entries["a.txt"])
+    assert verifier.verify_entry(entries["link_in.txt"])
+    assert not verifier.verify_entry(entries["link_out.txt"])
+
+
+def test_scan_never_yields_outside(zone, verifier, monkeypatch):
+    monkeypatch.setattr(scanner, "safe_zone_verifier", verifier)
+    for use_index in (False, True, True):
+        for workers in (1, 4):
+            found = {os.path.relpath(e.path, zone) for e in scanner.scan_entries(zone, None, workers=workers, use_index=use_index)}
+            assert found == {
+                os.path.join("docs", "a.txt"),
+                os.path.join("docs", "link_in.txt"),
+                os.path.join("docs", "deep", "b.txt"),
+            }
+    for root in (zone / "link_out_dir", zone / ".." / "Ransomware_Test_evil", zone.parent):
+        with pytest.raises(PermissionError):
+            list(scanner.scan_entries(root, None))
+
+
+def test_ransom_note_not_written_through_symlink(zone, verifier, monkeypatch):
+    monkeypatch.setattr(scanner, "safe_zone_verifier", verifier)
+    target = zone.parent / "Ransomware_Test_evil" / "README.txt"
+    os.symlink(target, zone / "docs" / "README.txt")
+    scanner.drop_ransom_notes(zone, "note")
+    assert not target.exists()
+    assert (zone / "docs" / "deep" / "README.txt").read_text() == "note"
+
+
+def test_outputs_not_written_through_symlink(zone):
+    """Outputs are placed by lexical checks, so a link planted at an output name must not be followed."""
+    victim = zone.parent / "Ransomware_Test_evil" / "secret.txt"
+    enc_dir = zone / "encrypted"
+    enc_dir.mkdir()
+    src = zone / "docs" / "a.txt"
+    cipher, prefix = CIPHERS["aes"][1](scanner.generate_key("AES"))
+    writers = {
+        "oneshot": lambda dest: _create_output(dest).close(),
+        "stream": lambda dest: _encrypt_file_streaming(cipher, src, dest, 1000, prefix),
+        "intermittent": lambda dest: encrypt_intermittent(cipher, src, dest, IntermittentPattern("header", block_size=4), prefix),
+        "pack": PackWriter,
+        "pack_index": lambda dest: write_index(dest, []),
+    }
+    for name, write in writers.items():
+        link = enc_dir / f"{name}.encrypted"
+        os.symlink(victim, link)
+        with pytest.raises(OSError):
+            write(link)
+    assert victim.read_text() == "outside"
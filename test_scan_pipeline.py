@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Scan pipeline: the producer thread hands every file (and note directory)
+to the consumer once, in batches that grow, stops when asked even while
+the queue is full, and surfaces scanner errors to the consumer; a stopped
+run writes at most one more file per worker.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import encrypt, scanner
+from Backend.encrypt import _ScanPipeline
+from Backend.safe_zone import SafeZoneVerifier
+
+
+@pytest.fixture
+def zone(tmp_path, monkeypatch):
+    zone = tmp_path / "Ransomware_Test"
+    for d in range(5):
+        (zone / f"d{d}").mkdir(parents=True)
+        for f in range(20):
+            (zone / f"d{d}" / f"f{f}.dat").write_text(f"file {d}/{f}\n" * (f + 1))
+    verifier = SafeZoneVerifier(zone)
+    monkeypatch.setattr(scanner, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "_verify_safety_path", verifier.verify)
+    return zone
+
+
+def test_every_file_once_in_growing_batches(zone):
+    pipeline = _ScanPipeline(zone, {"allowed_ext": None}, maxsize=1000, note_dirs=True)
+    pipeline.start()
+    time.sleep(0.2)                      # let the scan run ahead of the consumer
+    batches = [batch for batch in pipeline.batches(max_batch=8) if batch != ([], [])]
+    pipeline.stop()
+    files = [e.path for entries, _ in batches for e in entries]
+    dirs = [d for _, note_dirs in batches for d in note_dirs]
+    assert sorted(files) == sorted(str(p) for p in zone.rglob("*.dat"))
+    assert sorted(dirs) == sorted([str(zone)] + [str(zone / f"d{d}") for d in range(5)])
+    assert [len(e) + len(n) for e, n in batches[:4]] == [1, 2, 4, 8]
+    assert pipeline.complete and pipeline.discovered == 100
+    assert pipeline.discovered_bytes == sum(p.stat().st_size for p in zone.rglob("*.dat"))
+
+
+def test_stop_while_the_queue_is_full(zone):
+    pipeline = _ScanPipeline(zone, {"allowed_ext": None}, maxsize=2)
+    pipeline.start()
+    time.sleep(0.1)
+    assert pipeline.queue.full()
+    start = time.monotonic()
+    pipeline.stop()
+    assert time.monotonic() - start < 1
+    assert not pipeline.complete and pipeline.discovered < 100
+
+
+def test_scanner_errors_reach_the_consumer(zone):
+    pipeline = _ScanPipeline(zone.parent, {"allowed_ext": None})     # outside the safe zone
+    pipeline.start()
+    with pytest.raises(PermissionError):
+        list(pipeline.batches())
+    pipeline.stop()
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_pipelined_run_matches_scan_first(zone, executor):
+    run = dict(executor=executor, workers=2, use_key_pool=False, allowed_ext={".dat"},
+               drop_ransom_note=True, ransom_note_content="note")
+    metrics = encrypt.simulate_encrypt_folder(str(zone), pipeline=True, **run)
+    assert metrics["encrypted_files"] == metrics["total_files"] == 100 and metrics["scan_complete"]
+    assert len(list(zone.rglob(scanner.RANSOM_NOTE_NAME))) == 6
+    again = encrypt.simulate_encrypt_folder(str(zone), pipeline=False, **run)
+    assert again["encrypted_files"] == 100
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_stop_takes_effect_within_a_file(zone, executor):
+    for path in zone.rglob("*.dat"):
+        path.write_bytes(os.urandom(20000))
+    stop, stopped_at = threading.Event(), []
+
+    def progress(done, discovered, elapsed, complete):
+        if done and not stop.is_set():
+            stopped_at.append(time.time_ns())
+            stop.set()
+
+    metrics = encrypt.simulate_encrypt_folder(str(zone), executor=executor, workers=2, use_key_pool=False,
+                                              stop_event=stop, progress_callback=progress)
+    outputs = list((zone / "encrypted").rglob("*.encrypted"))
+    assert metrics["encrypted_files"] == len(outputs) < 100
+    late = [p for p in outputs if p.stat().st_mtime_ns > stopped_at[0]]
+    assert len(late) <= (1 if executor == "serial" else 2)
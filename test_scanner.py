@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Scanner: the work-stealing parallel walk finds exactly what the serial
+walk finds, and stops cleanly when its consumer does; the scan index only
+reuses listings of directories that have not changed; the directory
+visitor that drops ransom notes sees every directory walked, once.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import scanner
+from Backend.safe_zone import SafeZoneVerifier
+from Backend.scanner import _list_dir, _walk_parallel, _walk_serial, scan_entries
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    """Directories of uneven depth and width, plus encrypted/ and a symlinked directory to skip."""
+    root = tmp_path / "Ransomware_Test"
+    for i in range(6):
+        for j in range(i):
+            leaf = root / f"d{i}" / f"s{j}" / ("deep" if j % 2 else "")
+            leaf.mkdir(parents=True, exist_ok=True)
+            for k in range(3):
+                (leaf / f"f{k}.txt").write_text("x" * (i + j + k))
+        (root / f"d{i}").mkdir(parents=True, exist_ok=True)
+        (root / f"d{i}" / "top.pdf").write_text("pdf")
+    (root / "encrypted").mkdir()
+    (root / "encrypted" / "copy.txt").write_text("skip me")
+    os.symlink(root / "d5", root / "link_dir")
+    monkeypatch.setattr(scanner, "safe_zone_verifier", SafeZoneVerifier(root))
+    return root
+
+
+def _by_dir(batches):
+    listed = {}
+    for dirpath, records in batches:
+        assert dirpath not in listed                 # every directory is listed once
+        listed[dirpath] = sorted(records)
+    return listed
+
+
+def test_parallel_walk_matches_serial(tree):
+    serial = _by_dir(_walk_serial(str(tree), None, False))
+    assert str(tree / "encrypted") not in serial and str(tree / "link_dir") not in serial
+    assert sum(map(len, serial.values())) == 6 + 3 * 15
+    for workers in (2, 8):
+        assert _by_dir(_walk_parallel(str(tree), None, workers)) == serial
+    ordered = [e.path for e in scan_entries(tree, {".txt"}, ordered=True)]
+    assert [e.path for e in scan_entries(tree, {".txt"}, workers=4, ordered=True)] == ordered
+    assert len(ordered) == 45
+
+
+def test_parallel_walk_stops_with_its_consumer(tree):
+    batches = _walk_parallel(str(tree), None, 4)
+    next(batches)
+    batches.close()
+    assert not [t for t in threading.enumerate() if t.name.startswith("scan-")]
+
+    def failing(dirpath, allowed_ext, ordered=False):
+        if dirpath.endswith("s2"):
+            raise RuntimeError("listing failed")
+        return _list_dir(dirpath, allowed_ext, ordered)
+
+    with pytest.raises(RuntimeError):
+        list(_walk_parallel(str(tree), None, 4, failing))
+    assert not [t for t in threading.enumerate() if t.name.startswith("scan-")]
+
+
+def _scan_with_index(root):
+    stats = {}
+    found = {os.path.relpath(e.path, root): e.size for e in scan_entries(root, None, use_index=True, index_stats=stats)}
+    return found, stats
+
+
+def test_scan_index_reuses_only_unchanged_directories(tree):
+    old = time.time_ns() - 10**11                    # clear of the racy-mtime window
+    dirs = [tree] + [p for p in tree.rglob("*") if p.is_dir() and not p.is_symlink() and "encrypted" not in p.parts]
+    for path in dirs:
+        os.utime(path, ns=(old, old))
+    first, stats = _scan_with_index(tree)
+    assert stats["misses"] == len(dirs) and stats["hits"] == 0
+    assert first == {os.path.relpath(e.path, tree): e.size for e in scan_entries(tree, None)}
+
+    again, stats = _scan_with_index(tree)
+    assert again == first and stats["hits"] == len(dirs)
+
+    # Adding a file changes its directory's mtime: only that directory is listed again.
+    (tree / "d3" / "new.txt").write_text("new")
+    (tree / "d4" / "top.pdf").write_text("rewritten in place")
+    found, stats = _scan_with_index(tree)
+    assert found["d3/new.txt"] == 3
+    assert stats["misses"] == 1
+    # An in-place rewrite leaves the directory mtime alone, so the listing's size is stale.
+    assert found["d4/top.pdf"] == 3
+
+    # d3 changed within the racy window, so it is not trusted next time either.
+    _, stats = _scan_with_index(tree)
+    assert stats["misses"] == 1
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_directory_visitor(tree, workers):
+    events = []
+    for entry in scan_entries(tree, {".txt"}, workers=workers, on_directory=lambda d: events.append(("dir", d))):
+        events.append(("file", os.path.dirname(entry.path)))
+    visited = [path for kind, path in events if kind == "dir"]
+    walked = {str(tree)} | {str(p) for p in tree.rglob("*") if p.is_dir() and not p.is_symlink() and "encrypted" not in p.parts}
+    assert sorted(visited) == sorted(walked)
+    # A directory is visited before any of its files is yielded.
+    for i, (kind, path) in enumerate(events):
+        if kind == "file":
+            assert ("dir", path) in events[:i]
+
+
+def test_drop_ransom_notes(tree):
+    scanner.drop_ransom_notes(tree, "note")
+    notes = {p.parent for p in tree.rglob(scanner.RANSOM_NOTE_NAME) if not p.is_symlink()}
+    assert tree in notes and tree / "d1" / "s0" in notes
+    assert not (tree / "encrypted" / scanner.RANSOM_NOTE_NAME).exists()
+    # The symlinked directory was not entered: its target got exactly one note.
+    assert (tree / "d5" / scanner.RANSOM_NOTE_NAME).read_text() == "note"
+    assert len(notes) == 1 + sum(1 for p in tree.rglob("*") if p.is_dir() and not p.is_symlink() and "encrypted" not in p.parts and "link_dir" not in p.parts)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Ordering stage: batches stream through a bounded heap in the requested
+order, and the bytes-over-time curve that shows what ordering buys.
+"""
+
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import scanner
+from Backend.encrypt import _bytes_curve, _time_to_bytes_pct
+from Backend.target_order import order_batches, order_key
+
+
+def test_order_batches_streams_through_a_heap():
+    entries = [scanner.ScanEntry(f"/zone/f{i}", size, 0, suffix)
+               for i, (size, suffix) in enumerate([(5, ".png"), (3, ".txt"), (9, ".docx"), (1, ".zip"), (7, ".pdf")])]
+    upstream = [(entries[:3], ["/zone"]), ([], []), (entries[3:], [])]
+
+    def sizes(batches):
+        return [[e.size for e in files] for files, _ in batches]
+
+    # The note directory goes out first; an idle upstream batch flushes what is held.
+    assert sizes(order_batches(upstream, order_key("smallest_first"), 4)) == [[], [3], [5, 9], [1, 7]]
+    # Without an idle batch the whole stream is ordered; batches grow 1, 2, 4.
+    assert sizes(order_batches([(entries, [])], order_key("largest_first"), 8)) == [[9], [7, 5], [3, 1]]
+    assert sizes(order_batches([(entries, [])], order_key("by_extension_priority"), 8)) == [[9], [7, 3], [5, 1]]
+    # With a window only the files held at once (at least one upstream batch) are ordered.
+    assert sizes(order_batches([(entries, [])], order_key("smallest_first"), 1, window=2)) == [[1], [3], [5], [7], [9]]
+    assert sizes(order_batches([([e], []) for e in entries], order_key("smallest_first"), 1, window=2)) == [[3], [5], [1], [7], [9]]
+
+
+def test_bytes_curve_resamples_collected_batches():
+    points = [(1.0, 100), (2.0, 300), (4.0, 400)]
+    curve = _bytes_curve(points, 400, 4.0, samples=5)
+    assert curve["time_s"] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    # A batch counts from the moment it was collected; nothing is interpolated.
+    assert curve["bytes_encrypted"] == [0, 100, 300, 300, 400]
+    assert curve["pct_bytes"] == [0, 25, 75, 75, 100]
+    assert _time_to_bytes_pct(points, 400) == {"p25": 1.0, "p50": 2.0, "p90": 4.0, "p100": 4.0}
+    # Empty runs.
+    assert _bytes_curve([], 0, 0.0) == {"time_s": [0.0], "bytes_encrypted": [0], "pct_bytes": [0]}
+    assert _time_to_bytes_pct([], 0)["p50"] is None
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Target rules: the compiled matcher, the scanner applying it (with and
+without the scan index) on a small tree, and the rules reported as JSON.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Backend import encrypt, scanner
+from Backend.safe_zone import SafeZoneVerifier
+from Backend.target_rules import TargetRules
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "Ransomware_Test"
+    files = {
+        "report.docx": 10,
+        "~lock.docx": 10,
+        "huge.pdf": 5000,
+        "old.txt": 10,
+        "Projects/app/src/main.txt": 10,
+        "Projects/app/notes.txt": 10,
+        ".git/config.txt": 10,
+        "Archives/2020/a.txt": 10,
+        "Archives/2020/q1/b.txt": 10,
+    }
+    for name, size in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+    week_ago = time.time() - 7 * 86400
+    os.utime(root / "old.txt", (week_ago, week_ago))
+    return root
+
+
+def test_matcher_globs_and_depth():
+    matcher = TargetRules(include=("*.docx", "Projects/*/src/*"), exclude=("~*",), exclude_dirs=(".git",),
+                          max_depth=3, depth_limits=(("Archives", 1),)).compile("/zone")
+    assert matcher.match_name("/zone/a/Report.DOCX", "Report.DOCX")
+    assert not matcher.match_name("/zone/~report.docx", "~report.docx")
+    assert matcher.match_name("/zone/Projects/x/src/m.py", "m.py")
+    assert not matcher.match_name("/zone/Projects/x/m.py", "m.py")
+    assert not matcher.admit_dir("/zone/a/.git", ".git")
+    assert matcher.admit_dir("/zone/a/b/c", "c")
+    assert not matcher.admit_dir("/zone/a/b/c/d", "d")
+    assert matcher.admit_dir("/zone/a/Archives/x", "x")
+    assert not matcher.admit_dir("/zone/a/Archives/x/y", "y")
+
+
+def test_scan_applies_rules(tree, monkeypatch):
+    monkeypatch.setattr(scanner, "safe_zone_verifier", SafeZoneVerifier(tree))
+    rules = TargetRules(exclude=("~*",), exclude_dirs=(".git",), max_size=1000,
+                        modified_after=time.time() - 86400, depth_limits=(("Archives", 1),))
+    for use_index in (False, True, True):
+        for workers in (1, 4):
+            found = {os.path.relpath(e.path, tree).replace(os.sep, "/")
+                     for e in scanner.scan_entries(tree, None, workers=workers, use_index=use_index, rules=rules)}
+            assert found == {"report.docx", "Projects/app/src/main.txt", "Projects/app/notes.txt", "Archives/2020/a.txt"}
+
+
+def test_rules_in_metrics_are_json(tree, monkeypatch):
+    verifier = SafeZoneVerifier(tree)
+    monkeypatch.setattr(scanner, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "safe_zone_verifier", verifier)
+    monkeypatch.setattr(encrypt, "_verify_safety_path", verifier.verify)
+    after = datetime.now() - timedelta(days=1)
+    rules = TargetRules(include=("*.docx",), modified_after=after, modified_before="2100-01-01")
+    metrics = encrypt.simulate_encrypt_folder(str(tree), executor="serial", use_key_pool=False, rules=rules)
+    reported = json.loads(json.dumps(metrics))["target_rules"]      # as reports_storage saves it
+    assert reported["modified_after"] == after.isoformat() and reported["modified_before"] == "2100-01-01"
+    assert reported["include"] == ["*.docx"]
+    # The reported rules select the same files again.
+    assert TargetRules(**reported).compile(tree).mtime_after_ns == rules.compile(tree).mtime_after_ns